@@ -0,0 +1,259 @@
+import json
+import logging
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CATSNAP1"
+FORMAT_VERSION = 1
+_ALIGN = 8
+
+# (frontend key, catalog JSON key, default when the key is missing)
+NUMERIC_FIELDS = [
+    ("price", "price", None),
+    ("stock", "stock_available", None),
+    ("rating", "rating", None),
+    ("reviews", "review_count", None),
+    ("deliveryTimeDays", "delivery_time_days", None),
+    ("returnEligible", "return_eligible", None),
+    ("discountPercentage", "discount_percentage", 0),
+]
+STRING_FIELDS = [
+    ("id", "product_id"),
+    ("name", "product_name"),
+    ("category", "category"),
+    ("description", "description"),
+]
+# Key order of the product dicts the API has always returned
+PRODUCT_KEYS = ("id", "name", "category", "price", "stock", "description", "rating", "reviews",
+                "deliveryTimeDays", "returnEligible", "discountPercentage", "features")
+
+
+def _source_signature(source_path: str) -> Dict[str, int]:
+    stat = os.stat(source_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _data_start(header_len: int) -> int:
+    """Arrays begin at the first aligned offset after the header"""
+    return -(-(len(MAGIC) + 4 + header_len) // _ALIGN) * _ALIGN
+
+
+def _numeric_kind(values) -> str:
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present):
+        return "bool"
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return "int"
+    return "float"
+
+
+_KIND_DTYPES = {"bool": "<u1", "int": "<i8", "float": "<f8"}
+
+
+def encode_catalog(raw_products: List[Dict[str, Any]], source: Optional[Dict[str, int]] = None) -> bytes:
+    """
+    Encode catalog JSON records in the binary snapshot format:
+
+        MAGIC | header length (u32) | JSON header | aligned column arrays
+
+    Numeric fields become typed columns with a null mask; string fields are
+    stored as one UTF-8 blob per field plus an offsets array. `source` (the
+    JSON file's size and mtime) lets a stale snapshot be detected.
+    """
+    arrays = []   # (name, ndarray) in file order
+    header = {"version": FORMAT_VERSION, "source": source, "rows": len(raw_products),
+              "numeric": {}, "strings": {}}
+    for key, raw_key, default in NUMERIC_FIELDS:
+        values = [p.get(raw_key, default) for p in raw_products]
+        kind = _numeric_kind(values)
+        column = np.array([0 if v is None else v for v in values], dtype=_KIND_DTYPES[kind])
+        nulls = np.array([v is None for v in values], dtype=np.uint8)
+        header["numeric"][key] = {"kind": kind}
+        arrays += [(f"{key}.values", column), (f"{key}.nulls", nulls)]
+    for key, raw_key in STRING_FIELDS:
+        values = [p.get(raw_key) for p in raw_products]
+        encoded = [(v or "").encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        arrays += [(f"{key}.offsets", offsets),
+                   (f"{key}.nulls", np.array([v is None for v in values], dtype=np.uint8)),
+                   (f"{key}.data", np.frombuffer(b"".join(encoded), dtype=np.uint8))]
+        header["strings"][key] = {}
+
+    # Lay the arrays out after the header, each 8-byte aligned
+    layout, position = {}, 0
+    for name, array in arrays:
+        layout[name] = {"offset": position, "dtype": array.dtype.str, "length": len(array)}
+        position += -(-array.nbytes // _ALIGN) * _ALIGN
+    header["arrays"] = layout
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix = len(MAGIC) + 4 + len(header_bytes)
+
+    parts = [MAGIC, struct.pack("<I", len(header_bytes)), header_bytes, b"\0" * (_data_start(len(header_bytes)) - prefix)]
+    for name, array in arrays:
+        data = array.tobytes()
+        parts += [data, b"\0" * (-len(data) % _ALIGN)]
+    return b"".join(parts)
+
+
+def build_snapshot(source_path: str, snapshot_path: str):
+    """
+    Convert product_catalog.json into a snapshot file. Written to a temp
+    file and renamed, so workers never map a partial file.
+    """
+    signature = _source_signature(source_path)
+    with open(source_path, "r", encoding="utf-8") as f:
+        raw_products = json.load(f)
+    data = encode_catalog(raw_products, signature)
+
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, snapshot_path)
+
+
+class CatalogSnapshot:
+    """
+    Read-only, columnar product catalog, normally memory-mapped.
+
+    Every worker maps the same file, so the catalog's pages are shared
+    through the OS page cache instead of each worker holding its own dicts.
+    The one mutable field, stock, is copied into a private per-worker array
+    (orders change it); everything else is read straight from the buffer.
+    """
+
+    def __init__(self, buffer, path: Optional[str] = None):
+        self.path = path
+        self._map = buffer
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path or 'buffer'} is not a catalog snapshot")
+        (header_len,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(self._map[start:start + header_len]).decode("utf-8"))
+        if self.header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {self.header.get('version')}")
+        self.rows = self.header["rows"]
+
+        data_start = _data_start(header_len)
+        self._arrays = {}
+        for name, spec in self.header["arrays"].items():
+            self._arrays[name] = np.frombuffer(self._map, dtype=np.dtype(spec["dtype"]), count=spec["length"],
+                                               offset=data_start + spec["offset"])
+        self._kinds = {key: spec["kind"] for key, spec in self.header["numeric"].items()}
+        # Private, writable stock column for this worker
+        self.stock = np.array(self._arrays["stock.values"], dtype=np.int64)
+        self._stock_nulls = np.array(self._arrays["stock.nulls"], dtype=bool)
+
+    @classmethod
+    def open(cls, path: str) -> "CatalogSnapshot":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+    @classmethod
+    def from_products(cls, raw_products: List[Dict[str, Any]]) -> "CatalogSnapshot":
+        """Same columnar layout built in memory, for when snapshot files are disabled"""
+        return cls(encode_catalog(raw_products))
+
+    def __len__(self):
+        return self.rows
+
+    def matches_source(self, source_path: str) -> bool:
+        return self.header["source"] == _source_signature(source_path)
+
+    def close(self):
+        self._arrays = {}
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def string(self, key: str, row: int) -> Optional[str]:
+        if self._arrays[f"{key}.nulls"][row]:
+            return None
+        offsets = self._arrays[f"{key}.offsets"]
+        return self._arrays[f"{key}.data"][offsets[row]:offsets[row + 1]].tobytes().decode("utf-8")
+
+    def number(self, key: str, row: int):
+        if key == "stock":
+            return None if self._stock_nulls[row] else int(self.stock[row])
+        if self._arrays[f"{key}.nulls"][row]:
+            return None
+        value = self._arrays[f"{key}.values"][row]
+        kind = self._kinds[key]
+        return bool(value) if kind == "bool" else int(value) if kind == "int" else float(value)
+
+    def set_stock(self, row: int, value: int):
+        self.stock[row] = value
+        self._stock_nulls[row] = False
+
+    def copy_stock(self, rows: np.ndarray, source: "CatalogSnapshot", source_rows: np.ndarray) -> np.ndarray:
+        """Take the stock of `source_rows` in another catalog into `rows`; returns the rows that changed"""
+        before, before_nulls = self.stock[rows], self._stock_nulls[rows]
+        self.stock[rows] = source.stock[source_rows]
+        self._stock_nulls[rows] = source._stock_nulls[source_rows]
+        return rows[(before != self.stock[rows]) | (before_nulls != self._stock_nulls[rows])]
+
+    def products(self) -> List["ProductView"]:
+        return [ProductView(self, row) for row in range(self.rows)]
+
+
+class ProductView(Mapping):
+    """
+    One catalog row, read like the product dicts the rest of the backend
+    uses (product["stock"], product.get("name")...). Values are decoded on
+    access. Only "stock" can be assigned.
+    """
+
+    __slots__ = ("_catalog", "_row")
+
+    def __init__(self, catalog: CatalogSnapshot, row: int):
+        self._catalog = catalog
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        catalog = self._catalog
+        if key in catalog.header["strings"]:
+            return catalog.string(key, self._row)
+        if key in catalog.header["numeric"]:
+            return catalog.number(key, self._row)
+        if key == "features":
+            return (catalog.string("description", self._row) or "").split('.')  # Simple feature extraction
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key != "stock":
+            raise TypeError(f"Catalog field {key!r} is read-only")
+        self._catalog.set_stock(self._row, value)
+
+    def __iter__(self):
+        return iter(PRODUCT_KEYS)
+
+    def __len__(self):
+        return len(PRODUCT_KEYS)
+
+    def __repr__(self):
+        return f"ProductView({dict(self)!r})"
+
+
+def load_catalog(source_path: str, snapshot_path: str) -> CatalogSnapshot:
+    """Map the snapshot for `source_path`, rebuilding it first if it is missing or stale"""
+    snapshot = None
+    if os.path.exists(snapshot_path):
+        try:
+            snapshot = CatalogSnapshot.open(snapshot_path)
+            if snapshot.matches_source(source_path):
+                return snapshot
+        except Exception as e:
+            logger.warning("Ignoring unreadable catalog snapshot: %s", e)
+        if snapshot is not None:
+            snapshot.close()
+    logger.info("Building catalog snapshot...")
+    build_snapshot(source_path, snapshot_path)
+    return CatalogSnapshot.open(snapshot_path)
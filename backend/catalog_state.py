@@ -0,0 +1,140 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from facet_index import FacetIndex
+from keyword_index import KeywordIndex
+from recommendation_index import RecommendationIndex
+
+# Files a CatalogState is read from (orders are live state and are never reloaded)
+SOURCE_FILES = ("product_catalog.json", "product_faqs.json", "Company_policies.md")
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class CatalogState:
+    """
+    Everything served from the catalog, FAQ and policy files, plus the
+    indexes built from them.
+
+    DataLoader holds one instance and replaces it as a whole on reload, so a
+    request that reads `data.state` once sees products, indexes, FAQs and
+    policies of the same version. A state is only mutated before it is
+    published, except for stock, which orders keep changing in place.
+    """
+
+    def __init__(self):
+        self.catalog = None  # CatalogSnapshot (columnar rows) backing products
+        self.products = []
+        self.products_by_id = {}      # { "P1001": product }
+        self.faqs = []
+        self.faqs_by_product = {}     # { "P1001": [faq, ...] }
+        self.faqs_by_id = {}          # { "P1001#0": faq }, ids of the FAQ vector index
+        self.faq_postings = {}        # { "battery": [positions in faqs] }, question terms for the keyword fallback
+        self.policies = {}            # { "Return Policy": "text...", "Shipping": "text..." }
+        self.policy_chunks = []       # bounded passages of the sections above, what search returns
+        self.keyword_index = KeywordIndex()   # BM25 keyword search over products
+        self.recommendation_index = RecommendationIndex()  # homepage top-N by rating and stock
+        self.facet_index = FacetIndex()  # price/rating/delivery/discount filters and sorts
+        # Stock per catalog row as last read from / written to product_catalog.json.
+        # A reload keeps the live stock of products whose file value still matches.
+        self.file_stock = np.zeros(0, dtype=np.int64)
+        self.sources: Dict[str, Optional[Tuple[int, int]]] = {}  # file -> signature it was read at
+
+    def get_product(self, product_id):
+        return self.products_by_id.get(product_id)
+
+    def set_products(self, catalog):
+        self.catalog = catalog
+        self.products = catalog.products()
+        self.products_by_id = {}
+        for p in self.products:
+            self.products_by_id.setdefault(p["id"], p)
+        self.file_stock = catalog.stock.copy()
+
+    def build_indexes(self):
+        self.keyword_index.build(self.products)
+        self.recommendation_index.build(self.products)
+        self.facet_index.build(self.products)
+
+    def match_rows(self, previous: "CatalogState"):
+        """
+        Pair this state's products with those of `previous` by id. Returns
+        (rows, previous_rows) of products whose stock in the file is the same
+        as when `previous` read or wrote it, so their live stock carries over,
+        and the rows whose stock was edited in the file.
+        """
+        rows, previous_rows, edited = [], [], []
+        if previous.catalog is None:
+            return np.array(rows, dtype=np.int64), np.array(previous_rows, dtype=np.int64), edited
+        for row, product in enumerate(self.products):
+            old = previous.products_by_id.get(product["id"])
+            if old is None:
+                continue
+            if self.file_stock[row] == previous.file_stock[old._row]:
+                rows.append(row)
+                previous_rows.append(old._row)
+            else:
+                edited.append(row)
+        return np.array(rows, dtype=np.int64), np.array(previous_rows, dtype=np.int64), edited
+
+    def carry_stock(self, previous: "CatalogState", rows, previous_rows):
+        """Copy live stock over from `previous` (rows from `match_rows`); returns the products that changed"""
+        if not len(rows):
+            return []
+        changed = self.catalog.copy_stock(rows, previous.catalog, previous_rows)
+        return [self.products[row] for row in changed]
+
+
+class SwapGate:
+    """
+    Shared/exclusive gate between stock writers and a state swap. Order
+    placement holds it shared (many at once); the swap holds it exclusively
+    for the moment it takes to carry stock over and publish the new state,
+    so no stock change lands in the old state after it was copied. Readers
+    never take it.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._holders = 0
+        self._exclusive = False
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            while self._exclusive:
+                self._cond.wait()
+            self._holders += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._holders -= 1
+                if not self._holders:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            while self._exclusive:
+                self._cond.wait()
+            # Block new shared holders first, then wait for the current ones
+            self._exclusive = True
+            while self._holders:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
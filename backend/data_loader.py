@@ -1,68 +1,345 @@
+import datetime
+import heapq
 import json
+import logging
 import os
 import re
+import threading
+import time
+from collections import Counter
+import numpy as np
 from vector_search import VectorSearch
+from order_index import OrderIdIndex
+from keyword_index import tokenize
+from related_index import RelatedProductsIndex
+from catalog_state import SOURCE_FILES, CatalogState, SwapGate, file_signature
+from order_journal import OrderJournal, atomic_write_json
+from policy_chunks import chunk_policies
+from catalog_snapshot import CatalogSnapshot, load_catalog
+from order_records import Order, OrderItem
+from metrics import timed
+
+# Neighbours kept per product; more than the 5 shown so out-of-stock ones can be skipped
+RELATED_TOP_K = int(os.environ.get("RELATED_TOP_K", "20"))
+# Memory budget (MiB) for one block of the related-products similarity pass
+RELATED_BLOCK_MB = int(os.environ.get("RELATED_BLOCK_MB", "64"))
+# Journal events after which the JSON snapshots are rewritten in the background
+JOURNAL_COMPACT_EVERY = int(os.environ.get("JOURNAL_COMPACT_EVERY", "500"))
+# Serve the catalog from a shared memory-mapped snapshot (rebuilt when the JSON changes)
+CATALOG_SNAPSHOT = os.environ.get("CATALOG_SNAPSHOT", "1").lower() not in ("0", "false", "no")
+# Upper bound on a policy passage returned to the assistant (characters)
+POLICY_CHUNK_CHARS = int(os.environ.get("POLICY_CHUNK_CHARS", "500"))
+# Alternative data / vector store locations (benchmarks point these at generated data)
+DATA_DIR = os.environ.get("DATA_DIR")
+VECTOR_CACHE_DIR = os.environ.get("VECTOR_CACHE_DIR")
+# Seconds between checks of the catalog/FAQ/policy files for edits (0 disables the watcher)
+RELOAD_POLL_SECONDS = float(os.environ.get("RELOAD_POLL_SECONDS", "2"))
+# Words ignored by the keyword FAQ fallback, they occur in nearly every question
+FAQ_STOPWORDS = {"a", "an", "the", "is", "it", "are", "do", "does", "i", "can", "how", "what",
+                 "to", "of", "for", "and", "or", "with", "this", "that", "my", "in", "on", "have", "s"}
+
+logger = logging.getLogger(__name__)
 
 class DataLoader:
-    def __init__(self):
+    def __init__(self, base_path=None, vector_cache_path=None):
         # Resolve path relative to this file (backend/data_loader.py)
         # We assume structure is: root/backend/data_loader.py and root/Files
         base_dir = os.path.dirname(os.path.abspath(__file__)) # c:/.../backend
-        self.base_path = os.path.join(base_dir, "..", "Files")
-        self.products = []
+        self.base_path = base_path or DATA_DIR or os.path.join(base_dir, "..", "Files")
+        # Catalog, FAQs, policies and their indexes; replaced as a whole by reload()
+        self.state = CatalogState()
         self.orders = []
-        self.faqs = []
-        self.policies = {} # { "Return Policy": "text...", "Shipping": "text..." }
+
+        # Primary-key indexes (rebuilt on every load, kept current on writes)
+        self.orders_by_id = {}        # { "O0001": order }
+        self.orders_by_id_lower = {}  # { "o0001": order } for case-insensitive lookups
+        self.orders_by_customer = {}  # { "C0029": [order, ...] }
+        self.order_id_index = OrderIdIndex()  # partial / spoken order id resolution
+        self.related_index = RelatedProductsIndex(
+            k=RELATED_TOP_K, block_bytes=RELATED_BLOCK_MB * 1024 * 1024)  # precomputed upsell neighbours
+
+        # Hot reload: one at a time, published under the swap gate stock writers share
+        self._reload_lock = threading.Lock()
+        self._reload_requested = False
+        self._swap_gate = SwapGate()
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+        self._failed_sources = None  # file signatures a reload already failed on
+        self.last_reload = None  # outcome of the most recent reload, for the admin endpoint
+
+        # Write-ahead journal of orders/stock; the JSON files are periodic snapshots
+        self.journal = OrderJournal(os.path.join(self.base_path, "order_journal.jsonl"))
+        self._compaction_lock = threading.Lock()
+
+        # Order placement concurrency: one lock per SKU, plus a short lock for
+        # the order id counter and order indexes
+        self._product_locks = {}
+        self._product_locks_guard = threading.Lock()
+        self._order_lock = threading.Lock()
+        self._last_order_seq = 0  # highest "O<n>" id seen, restored from snapshot + journal
+
+        # Versions for response caches: data_version changes on any mutation
+        # (stock, order status, reload), content_version only when the catalog,
+        # FAQs or policies are (re)loaded, and a product's stock version when
+        # its stock changes (see product_version)
+        self._version_lock = threading.Lock()
+        self.data_version = 0
+        self.content_version = 0
+        self._stock_versions = {}  # { "P1001": data_version of its last stock change }
         
-        # Initialize Vector Search for semantic product search
-        try:
-            self.vector_db = VectorSearch(persist_directory=os.path.join(base_dir, "vector_cache"))
-            print("Vector search initialized.")
-        except Exception as e:
-            print(f"Warning: Vector search initialization failed: {e}")
-            self.vector_db = None
+        # Vector search for semantic product search. Created by load_vectors(),
+        # not here: chromadb and the embedding model take seconds to load
+        self.vector_cache_path = vector_cache_path or VECTOR_CACHE_DIR or os.path.join(base_dir, "vector_cache")
+        self.vectors_enabled = True
+        self.vector_db = None
 
+        # Startup progress, for readiness checks: catalog/FAQs/policies and
+        # keyword indexes loaded; vector store indexed and model warmed up
+        self.ready = threading.Event()
+        self.vectors_ready = threading.Event()
+        # starting, warming, ready, degraded (warm-up failed: keyword fallbacks until a reload warms up) or disabled
+        self.vector_status = "starting"
 
-    def load_all(self):
-        self.load_products()
+    # Views of the current CatalogState under their old names. Code serving a
+    # request should read `self.state` once instead, so a reload cannot land
+    # between two of its lookups.
+    catalog = property(lambda self: self.state.catalog)
+    products = property(lambda self: self.state.products)
+    products_by_id = property(lambda self: self.state.products_by_id)
+    faqs = property(lambda self: self.state.faqs)
+    faqs_by_product = property(lambda self: self.state.faqs_by_product)
+    faqs_by_id = property(lambda self: self.state.faqs_by_id)
+    policies = property(lambda self: self.state.policies)
+    policy_chunks = property(lambda self: self.state.policy_chunks)
+    keyword_index = property(lambda self: self.state.keyword_index)
+    recommendation_index = property(lambda self: self.state.recommendation_index)
+    facet_index = property(lambda self: self.state.facet_index)
+
+    @property
+    def semantic_ready(self):
+        """Semantic search can be used; until then (or if warm-up failed) searches use the keyword indexes"""
+        return self.vector_db is not None and self.vector_status == "ready"
+
+    def load_all(self, background_vectors=False):
+        """
+        Load the data and build the in-memory indexes, then the vector side
+        (see load_vectors). With `background_vectors` the latter runs on a
+        thread, and keyword search serves alone until it is ready.
+        """
+        # Single writer per data directory: fails here if another process owns the journal
+        self.journal.open()
+        state = CatalogState()
+        self.load_products(state)
+        # Published before the journal replay, which applies stock to these products
+        self.state = state
         self.load_orders()
-        self.load_faqs()
-        self.load_policies()
-        
-        # Index products into vector database for semantic search
-        if self.vector_db and self.products:
+        self.replay_journal()
+        self.load_faqs(state)
+        self.load_policies(state)
+
+        # Build the keyword search index once, instead of scanning on every query
+        state.build_indexes()
+        self.content_version = self._bump_data_version()
+        self.ready.set()
+
+        if background_vectors:
+            threading.Thread(target=self.load_vectors, name="vector-warmup", daemon=True).start()
+        else:
+            self.load_vectors()
+
+    def load_vectors(self):
+        """Create the vector store, index the current data into it and warm up the embedding model"""
+        started = time.perf_counter()
+        self.vector_status = "warming"
+        if self.vector_db is None and self.vectors_enabled:
             try:
-                self.vector_db.index_products(self.products)
-                self.vector_db.index_policies(self.policies)
+                self.vector_db = VectorSearch(persist_directory=self.vector_cache_path)
+                logger.info("Vector search initialized.")
             except Exception as e:
-                print(f"Warning: Failed to index in vector DB: {e}")
+                logger.warning("Vector search initialization failed: %s", e)
+        if self.vector_db is None:
+            self.vector_status = "disabled"
+            self.vectors_ready.set()
+            return
+
+        # Serialized with reload(), which syncs the same collections
+        with self._reload_lock:
+            state = self.state
+            # Index products into vector database for semantic search
+            if state.products:
+                changes = self._index_vectors(state)
+                if self.related_index.ready:
+                    # Reload: patch only the neighbour rows the changed products affect
+                    self.refresh_related_index(changes["changed"], changes["removed"])
+                else:
+                    # The neighbour table is a full similarity pass, so compute it off the startup path
+                    threading.Thread(target=self.build_related_index, name="related-index", daemon=True).start()
+
+        self.vector_status = "ready" if self.vector_db.warm_up() else "degraded"
+        self.vectors_ready.set()
+        # FAQ/policy answers cached during warm-up came from the keyword fallbacks
+        self.content_version = self._bump_data_version()
+        logger.info("Semantic search %s after %.1fs.", self.vector_status, time.perf_counter() - started)
+
+    def _index_vectors(self, state):
+        """Bring the vector DB in line with `state`; returns the changed and removed product ids"""
+        changes = {"changed": [], "removed": []}
+        try:
+            # Incremental: only new or edited documents are re-embedded
+            changes = self.vector_db.index_products(state.products)
+            self.vector_db.index_policies(state.policy_chunks)
+            self.vector_db.index_faqs(
+                [dict(faq, id=fid) for fid, faq in state.faqs_by_id.items()]
+            )
+        except Exception as e:
+            logger.warning("Failed to index in vector DB: %s", e)
+        return changes
+
+    # --- Hot reload ---
 
-    def load_products(self):
+    @property
+    def reload_in_progress(self):
+        return self._reload_lock.locked()
+
+    def reload(self):
+        """
+        Re-read the catalog, FAQs and policies without pausing serving.
+
+        The new state (snapshot, indexes, vector documents) is built while
+        requests keep reading the old one, then published with a single
+        reference swap. Only that swap holds off order placement, for as long
+        as copying the stock of orders placed meanwhile takes. Live stock is
+        kept for products whose stock in the file was not edited; an edited
+        value wins and is journaled. If a file cannot be read the old state
+        stays in place. Returns a summary of the reload.
+        """
+        with self._reload_lock, self._compaction_lock:
+            started = time.perf_counter()
+            previous = self.state
+            state = CatalogState()
+            loaded = [self.load_products(state), self.load_faqs(state), self.load_policies(state)]
+            if not all(loaded):
+                self._failed_sources = dict(state.sources)
+                self.last_reload = {"ok": False, "finishedAt": time.time(),
+                                    "message": "Data files could not be read, still serving the previous version"}
+                return self.last_reload
+
+            rows, previous_rows, edited_rows = state.match_rows(previous)
+            # First pass so the indexes are built from (nearly) live stock
+            state.carry_stock(previous, rows, previous_rows)
+            state.build_indexes()
+            changes = self._index_vectors(state) if self.vector_db else {"changed": [], "removed": []}
+            if self.vector_status == "degraded" and self.vector_db.warm_up():
+                # The embedding model failed at startup and works now; the swap's version bump drops fallback answers
+                self.vector_status = "ready"
+
+            with self._swap_gate.exclusive():
+                # Orders placed while the new state was being built
+                late = state.carry_stock(previous, rows, previous_rows)
+                self.state = state
+                self.content_version = self._bump_data_version()
+                edited = {state.products[row]["id"]: state.products[row]["stock"] for row in edited_rows}
+                if edited:
+                    # Otherwise a restart would replay older journaled stock over the edit
+                    self.journal.append([{"type": "stock", "stock": edited}])
+            self._failed_sources = None
+
+            if late:
+                state.recommendation_index.update(late)
+                state.facet_index.update(late)
+                if self.vector_db:
+                    self.vector_db.schedule_metadata_update(late)
+            self.refresh_related_index(changes["changed"], changes["removed"])
+
+            self.last_reload = {
+                "ok": True,
+                "finishedAt": time.time(),
+                "durationMs": round((time.perf_counter() - started) * 1000, 1),
+                "products": len(state.products),
+                "faqs": len(state.faqs),
+                "policySections": len(state.policies),
+                "changedProducts": len(changes["changed"]),
+                "removedProducts": len(changes["removed"]),
+                "editedStock": len(edited),
+            }
+            logger.info("Reloaded data in %.0f ms: %d products (%d changed, %d removed), %d FAQs, %d policy sections.",
+                        self.last_reload["durationMs"], len(state.products), len(changes["changed"]),
+                        len(changes["removed"]), len(state.faqs), len(state.policies))
+            return self.last_reload
+
+    def _source_signatures(self):
+        return {name: file_signature(os.path.join(self.base_path, name)) for name in SOURCE_FILES}
+
+    def start_watching(self, interval=RELOAD_POLL_SECONDS):
+        """Reload when the catalog, FAQ or policy files change (stat polling, no extra dependency)"""
+        if interval <= 0 or self._watcher:
+            return
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="data-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch(self, interval):
+        pending = None
+        while not self._watcher_stop.wait(interval):
+            current = self._source_signatures()
+            if current == self.state.sources or current == self._failed_sources:
+                pending = None
+            elif current != pending:
+                # Wait for the files to stay unchanged for an interval, so a
+                # reload never reads a copy or deploy that is still in progress
+                pending = current
+            else:
+                pending = None
+                try:
+                    self.reload()
+                except Exception:
+                    logger.exception("Reload after file change failed")
+
+    def build_related_index(self):
+        """Compute the related-products table from the stored product embeddings"""
+        try:
+            ids, embeddings = self.vector_db.get_product_embeddings()
+            if not ids:
+                logger.info("No product embeddings stored, related products will use live vector queries.")
+                return
+            self.related_index.build(ids, embeddings)
+            logger.info("Related-products table built for %d products.", len(self.related_index))
+        except Exception as e:
+            logger.warning("Failed to build related-products table: %s", e)
+
+    def refresh_related_index(self, product_ids=(), removed_ids=()):
+        """Recompute only the neighbour rows affected by changed or removed products"""
+        if not self.vector_db or not self.related_index.ready:
+            return
+        try:
+            ids, embeddings = self.vector_db.get_product_embeddings(list(product_ids)) if product_ids else ([], [])
+            self.related_index.refresh(ids, embeddings, removed_ids=removed_ids)
+        except Exception as e:
+            logger.warning("Failed to refresh related-products table: %s", e)
+
+    def load_products(self, state=None):
+        """Read the catalog into `state` (default: the current one); False if it could not be read"""
+        state = state or self.state
+        source_path = f"{self.base_path}/product_catalog.json"
+        state.sources["product_catalog.json"] = file_signature(source_path)
+        if CATALOG_SNAPSHOT:
+            try:
+                # Read-only rows shared by all workers; stock is a per-worker column
+                state.set_products(load_catalog(source_path, f"{self.base_path}/product_catalog.snapshot"))
+                logger.info("Loaded %d products (snapshot).", len(state.products))
+                return True
+            except Exception as e:
+                logger.warning("Catalog snapshot unavailable, reading JSON: %s", e)
         try:
-            with open(f"{self.base_path}/product_catalog.json", "r", encoding="utf-8") as f:
+            with open(source_path, "r", encoding="utf-8") as f:
                 raw_products = json.load(f)
-                # Map JSON fields to our internal/frontend schema if needed
-                # The frontend expects camelCase, but raw is snake_case. 
-                # We will map it here to match the frontend 'Product' interface.
-                self.products = []
-                for p in raw_products:
-                    self.products.append({
-                        "id": p.get("product_id"),
-                        "name": p.get("product_name"),
-                        "category": p.get("category"),
-                        "price": p.get("price"),
-                        "stock": p.get("stock_available"),
-                        "description": p.get("description"),
-                        "rating": p.get("rating"),
-                        "reviews": p.get("review_count"),
-                        "deliveryTimeDays": p.get("delivery_time_days"),
-                        "returnEligible": p.get("return_eligible"),
-                        "discountPercentage": p.get("discount_percentage", 0),
-                        "features": p.get("description", "").split('.')  # Simple feature extraction
-                    })
-            print(f"Loaded {len(self.products)} products.")
+            # Same columnar rows, built in memory: the camelCase product dicts the
+            # frontend expects are only produced when a response is serialized
+            state.set_products(CatalogSnapshot.from_products(raw_products))
+            logger.info("Loaded %d products.", len(state.products))
+            return True
         except Exception as e:
-            print(f"Error loading products: {e}")
+            logger.error("Error loading products: %s", e)
+            return False
 
     def load_orders(self):
         try:
@@ -70,126 +347,272 @@ class DataLoader:
                 raw_orders = json.load(f)
                 self.orders = []
                 for o in raw_orders:
-                    # Frontend Order Schema Mapping
-                    self.orders.append({
-                        "id": o.get("order_id"),
-                        "customerId": o.get("customer_id"),
-                        "status": o.get("order_status"),
-                        "date": o.get("order_date"),
-                        "total": sum(item.get("price_at_purchase", 0) * item.get("quantity", 1) for item in o.get("items", [])), # basic calc
-                        "items": [
-                            {
-                                "productId": i.get("product_id"),
-                                "name": "Product " + i.get("product_id"), # Name might be missing in order lines, lookup needed but simplified for now
-                                "quantity": i.get("quantity"),
-                                "price": i.get("price_at_purchase")
-                            } for i in o.get("items", [])
-                        ]
-                    })
-            print(f"Loaded {len(self.orders)} orders.")
+                    self.orders.append(Order.from_raw(o))
+                self._rebuild_order_indexes()
+            logger.info("Loaded %d orders.", len(self.orders))
         except Exception as e:
-            print(f"Error loading orders: {e}")
+            logger.error("Error loading orders: %s", e)
 
-    def load_faqs(self):
+    def order_to_dict(self, order):
+        """Serialize an order for the API, with item names from the catalog"""
+        return order.to_dict(lambda pid: (self.get_product(pid) or {}).get("name"))
+
+    def replay_journal(self):
+        """Re-apply orders and stock changes journaled since the last snapshot"""
+        replayed = 0
+        for event in self.journal.replay():
+            self._apply_event(event)
+            replayed += 1
+        if replayed:
+            logger.info("Replayed %d journal events.", replayed)
+        self.journal.open()
+
+    def _apply_event(self, event):
+        # Events carry absolute values, so applying one twice is harmless
+        kind = event.get("type")
+        if kind == "order":
+            raw = event["order"]
+            if raw["order_id"] not in self.orders_by_id:
+                order = Order.from_raw(raw)
+                self.orders.append(order)
+                self._index_order(order)
+        elif kind == "status":
+            order = self.orders_by_id.get(event["orderId"])
+            if order:
+                order.status = event["status"]
+        for pid, stock in event.get("stock", {}).items():
+            product = self.products_by_id.get(pid)
+            if product:
+                product["stock"] = stock
+
+    def load_faqs(self, state=None):
+        state = state or self.state
+        source_path = f"{self.base_path}/product_faqs.json"
+        state.sources["product_faqs.json"] = file_signature(source_path)
         try:
-            with open(f"{self.base_path}/product_faqs.json", "r", encoding="utf-8") as f:
+            with open(source_path, "r", encoding="utf-8") as f:
                 raw_faqs = json.load(f)
-                self.faqs = []
+                faqs = []
                 for item in raw_faqs:
                     pid = item.get("product_id")
                     for faq in item.get("faqs", []):
-                        self.faqs.append({
+                        faqs.append({
                             "productId": pid,
                             "question": faq.get("question"),
                             "answer": faq.get("answer")
                         })
-            print(f"Loaded {len(self.faqs)} FAQs.")
+                state.faqs = faqs
+                state.faqs_by_product = {}
+                state.faqs_by_id = {}
+                state.faq_postings = {}
+                for position, faq in enumerate(faqs):
+                    siblings = state.faqs_by_product.setdefault(faq["productId"], [])
+                    state.faqs_by_id[f"{faq['productId']}#{len(siblings)}"] = faq
+                    siblings.append(faq)
+                    for term in set(tokenize(faq["question"])) - FAQ_STOPWORDS:
+                        state.faq_postings.setdefault(term, []).append(position)
+            logger.info("Loaded %d FAQs.", len(state.faqs))
+            return True
         except Exception as e:
-            print(f"Error loading FAQs: {e}")
+            logger.error("Error loading FAQs: %s", e)
+            return False
 
-    def load_policies(self):
+    def load_policies(self, state=None):
+        state = state or self.state
+        source_path = f"{self.base_path}/Company_policies.md"
+        state.sources["Company_policies.md"] = file_signature(source_path)
         try:
             # Simple markdown parsing by headers
-            with open(f"{self.base_path}/Company_policies.md", "r", encoding="utf-8") as f:
+            with open(source_path, "r", encoding="utf-8") as f:
                 content = f.read()
             
             # Split by headers (e.g., **Policy Name**)
             # This is a heuristic.
             sections = re.split(r'\n\s*\*\*(.*?)\*\*\s*\n', content)
             
+            policies = {}
             if len(sections) > 1:
                 # sections[0] is preamble.
                 # sections[1] is Title 1, sections[2] is Content 1...
                 for i in range(1, len(sections), 2):
                     title = sections[i].strip()
                     body = sections[i+1].strip()
-                    self.policies[title] = body
+                    policies[title] = body
             else:
-                self.policies["General"] = content
-                
-            print(f"Loaded {len(self.policies)} policy sections.")
+                policies["General"] = content
+
+            state.policies = policies
+            state.policy_chunks = chunk_policies(policies, max_chars=POLICY_CHUNK_CHARS)
+            logger.info("Loaded %d policy sections (%d passages).", len(state.policies), len(state.policy_chunks))
+            return True
         except Exception as e:
-            print(f"Error loading policies: {e}")
+            logger.error("Error loading policies: %s", e)
+            return False
+
+    # Indexes
+    def _rebuild_order_indexes(self):
+        self.orders_by_id = {}
+        self.orders_by_id_lower = {}
+        self.orders_by_customer = {}
+        self.order_id_index = OrderIdIndex()
+        self._last_order_seq = 0
+        for o in self.orders:
+            self._index_order(o)
+
+    def _index_order(self, order):
+        """Register an order in the id and customer indexes"""
+        # Keep the first order for a given id, like the old linear scan did
+        self.orders_by_id.setdefault(order.id, order)
+        self.orders_by_id_lower.setdefault(order.id.lower(), order)
+        self.orders_by_customer.setdefault(order.customer_id, []).append(order)
+        self.order_id_index.add(order.id)
+        if order.id.startswith("O") and order.id[1:].isdigit():
+            self._last_order_seq = max(self._last_order_seq, int(order.id[1:]))
 
     # Accessors
     def get_product(self, product_id):
-        return next((p for p in self.products if p["id"] == product_id), None)
+        return self.state.products_by_id.get(product_id)
+
+    def get_products(self, product_ids):
+        """Resolve many ids in one pass; returns (products in request order, missing ids)"""
+        products_by_id = self.state.products_by_id
+        found, missing = [], []
+        for product_id in product_ids:
+            product = products_by_id.get(product_id)
+            if product:
+                found.append(product)
+            else:
+                missing.append(product_id)
+        return found, missing
 
     def get_orders(self, user_id):
         # Return all orders for now if user_id matches, or just all for demo
-        return [o for o in self.orders if o["customerId"] == user_id]
+        return list(self.orders_by_customer.get(user_id, []))
 
     def get_order(self, order_id):
         # 1. Exact Match
-        order = next((o for o in self.orders if o["id"] == order_id), None)
+        order = self.orders_by_id.get(order_id)
         if order: 
             return order
         
         # 2. Case-Insensitive Match
-        order = next((o for o in self.orders if o["id"].lower() == order_id.lower()), None)
+        order = self.orders_by_id_lower.get(order_id.lower())
         if order:
             return order
 
         # 3. Partial Match (e.g. user says "8892" for "ORD-123...8892" or "99" for "O0099")
         # useful for voice usage
-        if len(order_id) >= 2:
-            order = next((o for o in self.orders if order_id in o["id"] or o["id"].endswith(order_id)), None)
-            
-        return order
+        matches = self.find_orders(order_id, limit=1)
+        return matches[0] if matches else None
+
+    def find_orders(self, partial_id, limit=5):
+        """All orders matching a full or partial id, best match first"""
+        return [self.orders_by_id[oid] for oid in self.order_id_index.resolve(partial_id, limit=limit)]
 
     
-    def cancel_order(self, order_id):
+    def cancel_order(self, order_id, durable=True):
         order = self.get_order(order_id)
         if not order:
             return False, "Order not found"
-        if order["status"] == "Delivered":
+        if order.status == "Delivered":
              return False, "Cannot cancel delivered order."
         
-        order["status"] = "Cancelled"
+        order.status = "Cancelled"
+        self._bump_data_version()
+        written = self.journal.append([{"type": "status", "orderId": order.id, "status": order.status}])
+        if durable:
+            written.result()
+        self._maybe_compact()
         return True, "Order cancelled successfully."
 
     def get_faqs(self, product_id):
-        return [f for f in self.faqs if f["productId"] == product_id]
+        return list(self.faqs_by_product.get(product_id, []))
+
+    def search_faqs(self, question: str, product_id=None, k: int = 3):
+        """Top-k FAQ answers for a question, optionally for one product: [(faq, score)]"""
+        state = self.state
+        if self.semantic_ready:
+            hits = self.vector_db.search_faqs(question, product_id=product_id, limit=k)
+            results = [(state.faqs_by_id[h["id"]], h["similarity_score"]) for h in hits if h["id"] in state.faqs_by_id]
+            if results:
+                return results
+
+        # Fallback (no vector DB or it failed): share of the question's terms found in the FAQ
+        terms = set(tokenize(question)) - FAQ_STOPWORDS
+        if not terms:
+            return []
+        if product_id:
+            scored = []
+            for faq in state.faqs_by_product.get(product_id, []):
+                overlap = len(terms & set(tokenize(faq["question"])))
+                if overlap:
+                    scored.append((faq, overlap / len(terms)))
+            scored.sort(key=lambda item: item[1], reverse=True)
+            return scored[:k]
+        # Whole catalog: count matching terms through the postings instead of tokenizing every FAQ
+        overlaps = Counter(position for term in terms for position in state.faq_postings.get(term, ()))
+        top = heapq.nsmallest(k, overlaps.items(), key=lambda item: (-item[1], item[0]))
+        return [(state.faqs[position], overlap / len(terms)) for position, overlap in top]
 
     def search_policies(self, query: str):
         """Semantic search for policies"""
-        if self.vector_db:
+        if self.semantic_ready:
             return self.vector_db.search_policies(query)
         
         # Fallback to simple keyword match if vector db is not available
         results = []
-        for title, body in self.policies.items():
-            if query.lower() in title.lower() or query.lower() in body.lower():
-                results.append({"title": title, "content": body, "similarity_score": 0.5})
+        for chunk in self.state.policy_chunks:
+            if query.lower() in chunk["title"].lower() or query.lower() in chunk["text"].lower():
+                results.append({"title": chunk["title"], "content": chunk["text"], "similarity_score": 0.5})
         return results
 
     # --- Write Operations ---
 
+    def _bump_data_version(self):
+        # Called after the mutation, so a body cached under the new version includes it
+        with self._version_lock:
+            self.data_version += 1
+            return self.data_version
+
+    def product_version(self, product_ids):
+        """
+        Cache version of a response built from these products: changes on a
+        reload or when the stock of one of them changes, not on orders for
+        other products
+        """
+        stock_versions = self._stock_versions
+        return max([self.content_version] + [stock_versions.get(pid, 0) for pid in product_ids])
+
+    def _on_stock_changed(self, products):
+        """Single hook for every stock mutation, keeps derived state in sync"""
+        state = self.state
+        # Re-resolved by id: a reload may have published a new state since the change
+        products = [p for p in (state.get_product(p["id"]) for p in products) if p]
+        state.recommendation_index.update(products)
+        state.facet_index.update(products)
+        version = self._bump_data_version()
+        for product in products:
+            self._stock_versions[product["id"]] = version
+        if self.vector_db:
+            # Coalesced metadata-only update, no re-embedding or full re-index
+            self.vector_db.schedule_metadata_update(products)
+
+    def shutdown(self):
+        """Flush pending background writes"""
+        self._watcher_stop.set()
+        if self.vector_db:
+            self.vector_db.flush_metadata_updates()
+            self.vector_db.persist()
+        self.compact()
+        self.journal.close()
+
+    @timed("save_products")
     def save_products(self):
         """Save in-memory products back to JSON in snake_case"""
+        state = self.state
         try:
             raw_products = []
-            for p in self.products:
+            for p in state.products:
                 raw_products.append({
                     "product_id": p["id"],
                     "product_name": p["name"],
@@ -204,120 +627,133 @@ class DataLoader:
                     "discount_percentage": p.get("discountPercentage", 0)
                 })
             
-            with open(f"{self.base_path}/product_catalog.json", "w") as f:
-                json.dump(raw_products, f, indent=4)
-            print("Products saved to disk.")
+            source_path = f"{self.base_path}/product_catalog.json"
+            atomic_write_json(source_path, raw_products)
+            # The file now holds these stock values; and the watcher should not
+            # take our own write for an edit
+            state.file_stock = np.array([p["stock_available"] or 0 for p in raw_products], dtype=np.int64)
+            state.sources["product_catalog.json"] = file_signature(source_path)
+            logger.info("Products saved to disk.")
+            return True
         except Exception as e:
-            print(f"Error saving products: {e}")
+            logger.error("Error saving products: %s", e)
+            return False
 
+    @timed("save_orders")
     def save_orders(self):
         """Save in-memory orders back to JSON in snake_case"""
         try:
-            raw_orders = []
-            for o in self.orders:
-                # Convert items back
-                raw_items = []
-                for item in o["items"]:
-                    raw_items.append({
-                        "product_id": item["productId"],
-                        "quantity": item["quantity"],
-                        "price_at_purchase": item["price"]
-                    })
-
-                raw_orders.append({
-                    "order_id": o["id"],
-                    "customer_id": o["customerId"],
-                    "order_status": o["status"],
-                    "order_date": o["date"],
-                    "items": raw_items
-                })
-            
-            with open(f"{self.base_path}/order_database.json", "w") as f:
-                json.dump(raw_orders, f, indent=4)
-            print("Orders saved to disk.")
+            raw_orders = [o.to_raw() for o in self.orders]
+            atomic_write_json(f"{self.base_path}/order_database.json", raw_orders)
+            logger.info("Orders saved to disk.")
+            return True
         except Exception as e:
-            print(f"Error saving orders: {e}")
+            logger.error("Error saving orders: %s", e)
+            return False
+
+    def compact(self):
+        """Fold the journal into the JSON snapshots (atomic rename), then drop it"""
+        with self._compaction_lock:
+            if not self.journal.rotate():
+                return
+            # Everything in the rotated journal happened before this point,
+            # so the snapshots written now contain all of it
+            if self.save_products() and self.save_orders():
+                self.journal.finish_compaction()
+
+    def _maybe_compact(self):
+        if self.journal.pending_events >= JOURNAL_COMPACT_EVERY and not self._compaction_lock.locked():
+            threading.Thread(target=self.compact, name="journal-compaction", daemon=True).start()
 
-    def create_order(self, user_id, items):
+    def _product_lock(self, product_id):
+        with self._product_locks_guard:
+            lock = self._product_locks.get(product_id)
+            if lock is None:
+                lock = self._product_locks[product_id] = threading.Lock()
+            return lock
+
+    def _allocate_order_id(self):
+        """Next sequential order id from the in-memory counter (no scan over orders)"""
+        with self._order_lock:
+            self._last_order_seq += 1
+            return f"O{self._last_order_seq:04d}"
+
+    def create_order(self, user_id, items, durable=True):
         """
         Create a new order, deduct stock, and save changes.
         items: List of dicts {productId, quantity}
+        durable: wait for the journal fsync before returning. Async callers pass
+        False and await `journal.barrier_async()` instead of blocking the event loop.
+
+        Safe under concurrent calls: the locks of all SKUs in the order are
+        taken (in sorted order, so two orders cannot deadlock) before stock is
+        checked, and the whole reservation succeeds or fails together.
         """
         if not items:
             return False, "No items in order"
 
-        # 1. Validate Stock
+        requested = {}
         for item in items:
-            product = self.get_product(item["productId"])
-            if not product:
-                return False, f"Product {item['productId']} not found"
-            if product["stock"] < item["quantity"]:
-                return False, f"Insufficient stock for {product['name']}"
-
-        # 2. Deduct Stock & Calculate Total
-        new_order_items = []
-        total_amount = 0
-        
-        for item in items:
-            product = self.get_product(item["productId"])
-            product["stock"] -= item["quantity"] # Deduct stock
-            
-            price = product["price"]
-            new_order_items.append({
-                "productId": product["id"],
-                "name": product["name"],
-                "quantity": item["quantity"],
-                "price": price
-            })
-            total_amount += price * item["quantity"]
-
-        # 3. Create Order Object
-        import datetime
-        
-        # Calculate Next Order ID (Sequential)
-        max_id = 0
-        for o in self.orders:
-            if o["id"].startswith("O") and o["id"][1:].isdigit():
-                try:
-                    num = int(o["id"][1:])
-                    if num > max_id:
-                        max_id = num
-                except:
-                    pass
-        
-        next_id_val = max_id + 1
-        order_id = f"O{next_id_val:04d}"
-
-        new_order = {
-            "id": order_id,
-            "customerId": user_id,
-            "status": "Processing",
-            "date": datetime.date.today().strftime("%Y-%m-%d"),
-            "total": total_amount,
-            "items": new_order_items
-        }
-
-        self.orders.append(new_order)
-
-        # 4. Save Changes
-        self.save_products()
-        self.save_orders()
+            if item["quantity"] <= 0:
+                return False, f"Invalid quantity for {item['productId']}"
+            requested[item["productId"]] = requested.get(item["productId"], 0) + item["quantity"]
+
+        # Shared with other orders: a reload cannot publish its state between
+        # the stock check and the journal line, so no deduction is lost
+        with self._swap_gate.shared():
+            state = self.state
+            for product_id in requested:
+                if not state.get_product(product_id):
+                    return False, f"Product {product_id} not found"
+
+            locks = [self._product_lock(product_id) for product_id in sorted(requested)]
+            for lock in locks:
+                lock.acquire()
+            try:
+                # 1. Validate Stock (for the summed quantity if a SKU appears twice)
+                for product_id, quantity in requested.items():
+                    product = state.get_product(product_id)
+                    if product["stock"] < quantity:
+                        return False, f"Insufficient stock for {product['name']}"
+
+                # 2. Deduct Stock
+                for product_id, quantity in requested.items():
+                    state.get_product(product_id)["stock"] -= quantity # Deduct stock
+
+                # 3. Create Order Record (total and item names are derived when serialized)
+                new_order = Order(
+                    self._allocate_order_id(),
+                    user_id,
+                    "Processing",
+                    datetime.date.today().strftime("%Y-%m-%d"),
+                    tuple(
+                        OrderItem(item["productId"], item["quantity"], state.get_product(item["productId"])["price"])
+                        for item in items
+                    ),
+                )
+
+                with self._order_lock:
+                    self.orders.append(new_order)
+                    self._index_order(new_order)
+
+                # 4. Save Changes: one journal line instead of rewriting both JSON files.
+                # Queued while the SKU locks are held so per-product stock events
+                # reach the journal in the same order they were applied.
+                written = self.journal.append([{
+                    "type": "order",
+                    "order": new_order.to_raw(),
+                    "stock": {product_id: state.get_product(product_id)["stock"] for product_id in requested}
+                }])
+            finally:
+                for lock in reversed(locks):
+                    lock.release()
+
+        # The fsync is group-committed by the journal writer, outside the SKU locks
+        if durable:
+            written.result()
+        self._maybe_compact()
         
-        # 5. Update Vector DB with new stock? 
-        # Ideally yes, but for now we might skip re-indexing entire DB for speed, 
-        # or we could make vector_db update a single item. 
-        # For this PoC, we rely on in-memory product list being current for next logic check.
-        # However, search results come from vector DB which has metadata 'stock'.
-        # We should ideally update that.
-        if self.vector_db:
-             # Re-index just the affected products is best, but full re-index is safer/easier code:
-             # self.vector_db.index_products(self.products) 
-             # Optimization: Do nothing, because search filter checks `stock > 0` on the retrieved results?
-             # No, standard vector search usually filters on metadata. 
-             # Let's check vector_search.py: It DOES verify stock in `semantic_search`:
-             # `if metadata['stock'] < min_stock: continue`
-             # BUT `metadata` comes from `self.product_metadata` which is cached in `VectorSearch` class.
-             # So we DO need to update VectorSearch state.
-             pass 
+        # 5. Propagate the new stock levels (vector DB min_stock filter, ...)
+        self._on_stock_changed([state.get_product(product_id) for product_id in requested])
 
         return True, new_order
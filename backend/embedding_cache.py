@@ -0,0 +1,50 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of query embeddings with an optional TTL.
+
+    Keys are normalized query strings (lowercased, whitespace collapsed);
+    all-MiniLM is uncased, so normalizing does not change the embedding
+    but lets "Headphones " and "headphones" share an entry.
+    """
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: Optional[float] = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, embedding)
+        self._lock = threading.Lock()
+        self.hits = 0    # read by the cache metrics on /metrics
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join((text or "").lower().split())
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, embedding = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return embedding
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, embedding: Any):
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
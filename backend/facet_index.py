@@ -0,0 +1,203 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Range-filterable numeric fields (product keys)
+RANGE_FIELDS = ("price", "rating", "deliveryTimeDays", "discountPercentage")
+
+# sort option -> (field, descending)
+SORTS = {
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+    "rating_desc": ("rating", True),
+    "delivery_asc": ("deliveryTimeDays", False),
+    "discount_desc": ("discountPercentage", True),
+}
+
+# Bucket edges for facet counts
+PRICE_BUCKETS = (0, 1000, 5000, 10000, 20000, 50000)
+MIN_RATING_BUCKETS = (4.5, 4.0, 3.0)
+MAX_DELIVERY_BUCKETS = (3, 5, 7, 10)
+MIN_DISCOUNT_BUCKETS = (10, 20, 30, 50)
+
+
+class FacetIndex:
+    """
+    Columnar facet index over the catalog, for filtered and sorted search.
+
+    Each range field is kept as a float column (NaN for missing values)
+    plus a precomputed ascending sort order, so a range filter is two
+    binary searches and a scatter into a boolean mask; masks from several
+    filters compose with `&`. Sorting a result set reuses the same
+    per-field ranks instead of comparing Python objects.
+
+    Filters are a dict of {field: (min, max)} for RANGE_FIELDS (either
+    bound may be None) plus an optional "returnEligible": bool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.build([])
+
+    def __len__(self):
+        return len(self._ids)
+
+    def build(self, products):
+        self._ids = [p["id"] for p in products]
+        self._rows = {}
+        for row, pid in enumerate(self._ids):
+            self._rows.setdefault(pid, row)
+        size = len(self._ids)
+
+        self._columns = {}
+        self._sorted = {}   # field -> (rows in ascending value order, their values), NaN excluded
+        self._ranks = {}    # field -> rank of each row in that order (missing values rank last)
+        for field in RANGE_FIELDS:
+            column = np.array([np.nan if p.get(field) is None else float(p.get(field)) for p in products],
+                              dtype=np.float64).reshape(size)
+            order = np.argsort(column, kind="stable")
+            order = order[~np.isnan(column[order])]
+            ranks = np.full(size, size, dtype=np.int64)
+            ranks[order] = np.arange(len(order))
+            self._columns[field] = column
+            self._sorted[field] = (order, column[order])
+            self._ranks[field] = ranks
+
+        eligible = [p.get("returnEligible") for p in products]
+        self._return_known = np.array([v is not None for v in eligible], dtype=bool).reshape(size)
+        self._return_eligible = np.array([bool(v) for v in eligible], dtype=bool).reshape(size)
+
+        categories = [p.get("category") or "" for p in products]
+        self._category_names = sorted(set(categories))
+        codes = {name: i for i, name in enumerate(self._category_names)}
+        self._category_codes = np.array([codes[c] for c in categories], dtype=np.int32).reshape(size)
+
+        self._stock = np.array([p.get("stock") or 0 for p in products], dtype=np.int64).reshape(size)
+
+    def update(self, products):
+        """Refresh stock for products whose stock changed"""
+        with self._lock:
+            for product in products:
+                row = self._rows.get(product["id"])
+                if row is not None:
+                    self._stock[row] = product.get("stock") or 0
+
+    def mask(self, filters: Optional[Dict[str, Any]] = None, in_stock: bool = True) -> np.ndarray:
+        """Boolean row mask of products passing all filters"""
+        size = len(self._ids)
+        mask = self._stock > 0 if in_stock else np.ones(size, dtype=bool)
+        for field, bounds in (filters or {}).items():
+            if field == "returnEligible":
+                if bounds is not None:
+                    mask &= self._return_known & (self._return_eligible == bool(bounds))
+                continue
+            low, high = bounds
+            if low is None and high is None:
+                continue
+            order, values = self._sorted[field]
+            start = 0 if low is None else np.searchsorted(values, low, side="left")
+            end = len(values) if high is None else np.searchsorted(values, high, side="right")
+            selected = np.zeros(size, dtype=bool)
+            selected[order[start:end]] = True
+            mask &= selected
+        return mask
+
+    def rows(self, product_ids: Iterable[str]) -> np.ndarray:
+        return np.array([self._rows[pid] for pid in product_ids if pid in self._rows], dtype=np.int64)
+
+    def matches(self, mask: np.ndarray):
+        """Predicate on product id for KeywordIndex.search(where=...)"""
+        rows = self._rows
+        return lambda pid: pid in rows and bool(mask[rows[pid]])
+
+    def sort_ids(self, product_ids: Sequence[str], sort: str) -> List[str]:
+        """Order product ids by a SORTS option (stable, missing values last)"""
+        field, descending = SORTS[sort]
+        rows = self.rows(product_ids)
+        ranks = self._ranks[field][rows]
+        if descending:
+            # Reverse the rank but keep missing values (rank == size) at the end
+            ranks = np.where(ranks < len(self._ids), len(self._ids) - 1 - ranks, ranks)
+        return [self._ids[r] for r in rows[np.argsort(ranks, kind="stable")]]
+
+    def top_ids(self, mask: np.ndarray, sort: str, limit: int) -> List[str]:
+        """Best `limit` products in the mask for a sort option, walking the precomputed order"""
+        field, descending = SORTS[sort]
+        order, _ = self._sorted[field]
+        if descending:
+            order = order[::-1]
+        picked = order[mask[order]][:limit]
+        if len(picked) < limit:
+            # Products with no value for the field come last
+            missing = np.flatnonzero(mask & np.isnan(self._columns[field]))
+            picked = np.concatenate([picked, missing[:limit - len(picked)]])
+        return [self._ids[r] for r in picked]
+
+    def top_matches(self, rows: np.ndarray, scores: np.ndarray, mask: np.ndarray,
+                    sort: Optional[str] = None, limit: int = 10) -> List[str]:
+        """
+        Best `limit` keyword matches (rows and scores from KeywordIndex.matches)
+        in `mask`, by a SORTS option with relevance breaking ties, or by
+        relevance alone; file order breaks the remaining ties. A partition
+        picks the candidates, so only those are sorted.
+        """
+        keep = mask[rows]
+        rows, scores = rows[keep], scores[keep]
+        if sort:
+            field, descending = SORTS[sort]
+            primary = self._ranks[field][rows]
+            if descending:
+                primary = np.where(primary < len(self._ids), len(self._ids) - 1 - primary, primary)
+        else:
+            primary = -scores
+        if len(rows) > limit:
+            cutoff = np.partition(primary, limit - 1)[limit - 1]
+            close = primary <= cutoff
+            rows, scores, primary = rows[close], scores[close], primary[close]
+        order = np.lexsort((rows, -scores, primary))[:limit]
+        return [self._ids[r] for r in rows[order]]
+
+    def counts(self, mask: np.ndarray) -> Dict[str, Any]:
+        """Facet counts over the products in `mask`"""
+        rows = np.flatnonzero(mask)
+        price = self._columns["price"][rows]
+        rating = self._columns["rating"][rows]
+        delivery = self._columns["deliveryTimeDays"][rows]
+        discount = self._columns["discountPercentage"][rows]
+        category_counts = np.bincount(self._category_codes[rows], minlength=len(self._category_names))
+
+        price_buckets = []
+        for i, low in enumerate(PRICE_BUCKETS):
+            high = PRICE_BUCKETS[i + 1] if i + 1 < len(PRICE_BUCKETS) else None
+            in_bucket = (price >= low) & (price < high) if high is not None else price >= low
+            price_buckets.append({"min": low, "max": high, "count": int(in_bucket.sum())})
+
+        return {
+            "total": int(len(rows)),
+            "category": {name: int(n) for name, n in zip(self._category_names, category_counts) if n},
+            "price": price_buckets,
+            "minRating": {str(v): int((rating >= v).sum()) for v in MIN_RATING_BUCKETS},
+            "maxDeliveryDays": {str(v): int((delivery <= v).sum()) for v in MAX_DELIVERY_BUCKETS},
+            "minDiscount": {str(v): int((discount >= v).sum()) for v in MIN_DISCOUNT_BUCKETS},
+            "returnEligible": {
+                "true": int((self._return_known[rows] & self._return_eligible[rows]).sum()),
+                "false": int((self._return_known[rows] & ~self._return_eligible[rows]).sum()),
+            },
+        }
+
+
+def parse_filters(min_price=None, max_price=None, min_rating=None, max_rating=None,
+                  min_delivery_days=None, max_delivery_days=None, min_discount=None,
+                  max_discount=None, return_eligible=None) -> Dict[str, Any]:
+    """Build a filters dict from the API's query parameters, dropping unset ones"""
+    filters = {}
+    for field, bounds in (("price", (min_price, max_price)),
+                          ("rating", (min_rating, max_rating)),
+                          ("deliveryTimeDays", (min_delivery_days, max_delivery_days)),
+                          ("discountPercentage", (min_discount, max_discount))):
+        if bounds != (None, None):
+            filters[field] = bounds
+    if return_eligible is not None:
+        filters["returnEligible"] = return_eligible
+    return filters
@@ -0,0 +1,170 @@
+import heapq
+import math
+import re
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall((text or '').lower())
+
+
+class KeywordIndex:
+    """
+    Inverted index with BM25 ranking for product keyword search.
+
+    Name, category and description are tokenized once at build time into a
+    single weighted document per product (a simplified BM25F), so a query
+    only touches the posting lists of its own terms. Every query term must
+    match (exactly or as a prefix, e.g. "earbud" -> "earbuds"), which keeps
+    the old "all of the query must appear" behaviour while ranking hits by
+    relevance instead of file order. Matching is per word, not substring:
+    "phone" does not find "smartphone" or "headphones" (the semantic leg
+    covers those).
+    """
+
+    FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0}
+    K1 = 1.2
+    B = 0.75
+    PREFIX_WEIGHT = 0.7          # prefix expansions score below exact terms
+    MAX_PREFIX_EXPANSIONS = 32   # bounds the work for very short prefixes (most frequent terms kept)
+
+    def __init__(self):
+        self.build([])
+
+    def __len__(self):
+        return len(self._ids)
+
+    def build(self, products):
+        self._ids = []             # doc -> product id
+        self._doc_len = []         # doc -> weighted token count
+        self._postings = {}        # term -> {doc: weighted term frequency}
+        self._doc_category = []    # doc -> lowercase category
+        self._categories = {}      # lowercase category -> [docs] (file order)
+
+        for doc, product in enumerate(products):
+            self._ids.append(product["id"])
+            length = 0.0
+            for field, weight in self.FIELD_WEIGHTS.items():
+                for term in tokenize(product.get(field)):
+                    postings = self._postings.setdefault(term, {})
+                    postings[doc] = postings.get(doc, 0.0) + weight
+                    length += weight
+            self._doc_len.append(length)
+            category = (product.get("category") or "").lower()
+            self._doc_category.append(category)
+            self._categories.setdefault(category, []).append(doc)
+
+        self._vocab = sorted(self._postings)
+        self._avg_len = (sum(self._doc_len) / len(self._doc_len)) if self._doc_len else 0.0
+        # BM25 length normalization depends only on the document, so precompute it
+        self._doc_norm = [
+            self.K1 * (1 - self.B + self.B * length / self._avg_len) for length in self._doc_len
+        ]
+        self._idf = {
+            term: math.log(1 + (len(self._ids) - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self._postings.items()
+        }
+
+    def _expand(self, term: str) -> Dict[str, float]:
+        """
+        Vocabulary terms a query term matches, with their weight. A short
+        prefix can match many terms; only the MAX_PREFIX_EXPANSIONS with the
+        most documents are kept (plus the exact term), so common words win
+        over rare ones instead of whatever sorts first alphabetically.
+        """
+        start = bisect_left(self._vocab, term)
+        end = bisect_left(self._vocab, term + "\x7f", start)  # tokens are [a-z0-9], all below \x7f
+        candidates = self._vocab[start:end]
+        if len(candidates) > self.MAX_PREFIX_EXPANSIONS:
+            candidates = heapq.nlargest(self.MAX_PREFIX_EXPANSIONS, candidates,
+                                        key=lambda c: (c == term, len(self._postings[c])))
+        return {candidate: 1.0 if candidate == term else self.PREFIX_WEIGHT for candidate in candidates}
+
+    def _term_scores(self, term: str) -> Dict[int, float]:
+        scores = {}
+        for candidate, weight in self._expand(term).items():
+            idf = self._idf[candidate]
+            for doc, tf in self._postings[candidate].items():
+                score = weight * idf * tf * (self.K1 + 1) / (tf + self._doc_norm[doc])
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+        return scores
+
+    def _matching_categories(self, category: str):
+        # Same loose matching as before: either string may contain the other
+        cat = category.lower()
+        return {name for name in self._categories if cat in name or name in cat}
+
+    def _scores(self, terms: List[str], allowed=None) -> Dict[int, float]:
+        """BM25 score of every doc matching all terms (and one of the `allowed` categories)"""
+        # Intersect per-term scores, smallest candidate set first
+        per_term = sorted((self._term_scores(t) for t in dict.fromkeys(terms)), key=len)
+        scores = per_term[0]
+        for other in per_term[1:]:
+            scores = {doc: s + other[doc] for doc, s in scores.items() if doc in other}
+            if not scores:
+                return {}
+        if allowed is not None:
+            scores = {doc: s for doc, s in scores.items() if self._doc_category[doc] in allowed}
+        return scores
+
+    def matches(self, query: Optional[str] = None, category: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Every match as (docs, scores) arrays, unordered, for callers that
+        filter and rank the whole match set themselves (FacetIndex). A doc
+        is the product's position in the list the index was built from.
+        Without query terms every doc (of the category) matches with score 0.
+        """
+        allowed = self._matching_categories(category) if category else None
+        terms = tokenize(query) if query else []
+        if not terms:
+            if query and query.strip():
+                scores = {}
+            elif allowed is None:
+                return np.arange(len(self._ids), dtype=np.int64), np.zeros(len(self._ids))
+            else:
+                scores = dict.fromkeys((doc for name in allowed for doc in self._categories[name]), 0.0)
+        else:
+            scores = self._scores(terms, allowed)
+        return (np.fromiter(scores.keys(), dtype=np.int64, count=len(scores)),
+                np.fromiter(scores.values(), dtype=np.float64, count=len(scores)))
+
+    def search(self, query: Optional[str] = None, category: Optional[str] = None,
+               limit: int = 10, where: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """
+        Return up to `limit` product ids, best match first.
+        `where` is an optional predicate on the product id (e.g. in stock).
+        """
+        allowed = self._matching_categories(category) if category else None
+        terms = tokenize(query) if query else []
+
+        if not terms:
+            if query and query.strip():
+                return []  # only punctuation, nothing can match
+            # No query: category (or catalog) listing in file order
+            if allowed is None:
+                docs = range(len(self._ids))
+            else:
+                docs = heapq.merge(*(self._categories[name] for name in allowed))
+            results = []
+            for doc in docs:
+                pid = self._ids[doc]
+                if where is None or where(pid):
+                    results.append(pid)
+                    if len(results) >= limit:
+                        break
+            return results
+
+        scores = self._scores(terms, allowed)
+        candidates = (
+            (score, doc) for doc, score in scores.items()
+            if where is None or where(self._ids[doc])
+        )
+        # Highest score first, file order breaks ties
+        top = heapq.nsmallest(limit, candidates, key=lambda item: (-item[0], item[1]))
+        return [self._ids[doc] for _, doc in top]
@@ -1,9 +1,152 @@
-from fastapi import FastAPI, HTTPException, Query
+import asyncio
+import atexit
+import hmac
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from typing import List, Optional
+from pydantic import BaseModel, Field
 import uvicorn
 from data_loader import DataLoader
 from search_logic import SearchLogic
+from response_cache import ResponseCache
+from policy_chunks import normalize_topic
+from facet_index import SORTS, parse_filters
+from request_trace import TRACE_MAX_BODY, TraceWriter
+from metrics import (REGISTRY, REQUEST_SECONDS, SEMANTIC_OUTCOMES, current_spans, end_request, server_timing,
+                     start_request)
+
+# DEBUG adds a line per request; INFO keeps startup/indexing messages and problems
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# Opt-in: append every API request to this JSON-lines file, for benchmarks/replay_trace.py
+TRACE_FILE = os.environ.get("TRACE_FILE")
+# Shared secret for /api/admin/* (X-Admin-Token header); the admin endpoints are off without it
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# Upper bound on ids / queries in one batch request (a batch is one executor job)
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "50"))
+# Hold /readyz at 503 until semantic search is warmed up too (default: keyword search suffices)
+READY_REQUIRES_VECTORS = os.environ.get("READY_REQUIRES_VECTORS", "0").lower() in ("1", "true", "yes")
+
+def configure_logging():
+    """
+    Leveled logging for the backend. Handlers run on a listener thread, so a
+    log call on the request path only formats the record and queues it.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    listener = QueueListener(log_queue, handler)
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(QueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
+
+configure_logging()
+logger = logging.getLogger("main")
+
+class TimingMiddleware:
+    """
+    Records every request in the http_request_duration_seconds histogram and
+    returns the stage spans it went through in a Server-Timing header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = start_request()
+        spans = current_spans()
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(spans, elapsed).encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request(token)
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(elapsed, scope["method"], getattr(route, "path", "unmatched"), str(status))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s %s -> %d in %.1fms", scope["method"], scope["path"], status, elapsed * 1000)
+
+# Scrapes and probes, not client traffic
+UNTRACED_PATHS = ("/metrics", "/healthz", "/readyz")
+
+class TraceMiddleware:
+    """
+    Records each request (arrival time, session, method, path, query, JSON
+    body, status, duration) to a TraceWriter. The session is the
+    X-Session-Id header when a client sends one, else the client address,
+    so a replay can keep each voice session's tool calls in order.
+    """
+
+    def __init__(self, app, writer: TraceWriter):
+        self.app = app
+        self.writer = writer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in UNTRACED_PATHS:
+            return await self.app(scope, receive, send)
+        arrived = time.time()
+        started = time.perf_counter()
+        body = bytearray()
+        status = 500
+
+        async def receive_and_capture():
+            message = await receive()
+            if message["type"] == "http.request" and len(body) <= TRACE_MAX_BODY:
+                body.extend(message.get("body", b""))
+            return message
+
+        async def send_and_capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_capture, send_and_capture)
+        finally:
+            headers = dict(scope.get("headers") or [])
+            client = scope.get("client")
+            session = headers.get(b"x-session-id", b"").decode("latin-1") or (client[0] if client else "")
+            if len(body) > TRACE_MAX_BODY:
+                recorded_body = {"truncated": True}
+            else:
+                try:
+                    recorded_body = json.loads(body) if body else None
+                except ValueError:
+                    recorded_body = {"unparsed": True}
+            self.writer.record({
+                "ts": round(arrived, 6),
+                "session": session,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "body": recorded_body,
+                "status": status,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            })
 
 app = FastAPI()
 
@@ -14,55 +157,195 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Semantic-Status", "ETag", "Server-Timing"],
 )
+trace_writer = TraceWriter(TRACE_FILE) if TRACE_FILE else None
+if trace_writer:
+    app.add_middleware(TraceMiddleware, writer=trace_writer)
+# Outermost, so the timing includes CORS and routing
+app.add_middleware(TimingMiddleware)
 
 # Initialize Data & Search
 data = DataLoader()
 search_engine = SearchLogic(data)
+# Pre-serialized bodies for the read-mostly catalog endpoints
+response_cache = ResponseCache()
+
+def caches():
+    """Caches reported on /metrics; the query embedding cache exists once the vector store does"""
+    found = {"response": response_cache}
+    if data.vector_db is not None:
+        found["query_embedding"] = data.vector_db.query_cache
+    return found
+
+REGISTRY.collected("cache_hits_total", "Cache hits (response bodies, query embeddings)", "counter", ("cache",),
+                   lambda: {(name,): cache.hits for name, cache in caches().items()})
+REGISTRY.collected("cache_misses_total", "Cache misses (response bodies, query embeddings)", "counter", ("cache",),
+                   lambda: {(name,): cache.misses for name, cache in caches().items()})
+REGISTRY.collected("cache_entries", "Entries currently held per cache", "gauge", ("cache",),
+                   lambda: {(name,): len(cache) for name, cache in caches().items()})
+
+def initialize():
+    started = time.perf_counter()
+    # Returns once keyword search can serve; the vector store indexes and warms up on its own thread
+    data.load_all(background_vectors=True)
+    # Edits to the catalog, FAQ or policy files are picked up without a restart
+    data.start_watching()
+    logger.info("Backend initialized and data loaded in %.1fs.", time.perf_counter() - started)
 
 @app.on_event("startup")
 async def startup_event():
-    data.load_all()
-    print("Backend initialized and data loaded.")
+    # Take the journal's single-writer lock before anything else, so a second
+    # worker on the same data directory fails to boot instead of serving
+    data.journal.open()
+    # Loading runs off the startup path, so the server answers /healthz right
+    # away and /readyz reports when it can take traffic
+    threading.Thread(target=initialize, name="data-load", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    search_engine.shutdown()
+    data.shutdown()
+    if trace_writer:
+        trace_writer.close()
+
+def cached_json(request: Request, key, version: int, body: bytes = None, etag: str = None, build=None):
+    """
+    Serve a cached JSON body (building it on a miss), honouring If-None-Match.
+    `version` is DataLoader.content_version or product_version, depending on
+    what the response is derived from.
+    """
+    if body is None:
+        body, etag = response_cache.get_or_build(key, version, build)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Routes are async: cheap in-memory lookups (keyword fallbacks included) run
+# inline on the event loop, only embedding/ChromaDB work is handed to the search
+# executor and journal writes are awaited, so slow requests no longer tie up
+# Starlette's shared threadpool and cheap ones never queue behind them.
 
 @app.get("/api/products/search")
-def search_products(q: Optional[str] = None, cat: Optional[str] = None):
-    print(f"DEBUG: Search Request - Query='{q}', Category='{cat}'")
-    results = search_engine.search_products(query=q, category=cat)
-    print(f"DEBUG: Found {len(results)} results")
+async def search_products(
+    response: Response,
+    q: Optional[str] = None,
+    cat: Optional[str] = None,
+    minPrice: Optional[float] = None,
+    maxPrice: Optional[float] = None,
+    minRating: Optional[float] = None,
+    maxRating: Optional[float] = None,
+    minDeliveryDays: Optional[int] = None,
+    maxDeliveryDays: Optional[int] = None,
+    minDiscount: Optional[float] = None,
+    maxDiscount: Optional[float] = None,
+    returnEligible: Optional[bool] = None,
+    sort: Optional[str] = None,
+    withFacets: bool = False,
+):
+    logger.debug("Search Request - Query='%s', Category='%s'", q, cat)
+    if sort == "relevance":
+        sort = None
+    if sort is not None and sort not in SORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort '{sort}'; expected one of: relevance, {', '.join(SORTS)}")
+    filters = parse_filters(minPrice, maxPrice, minRating, maxRating, minDeliveryDays, maxDeliveryDays,
+                            minDiscount, maxDiscount, returnEligible)
+    results, semantic_status = await search_engine.hybrid_search_async(query=q, category=cat, filters=filters, sort=sort)
+    # "timeout" tells the client the semantic leg was cut off by the latency budget
+    response.headers["X-Semantic-Status"] = semantic_status
+    SEMANTIC_OUTCOMES.inc(semantic_status)
+    logger.debug("Found %d results (semantic: %s)", len(results), semantic_status)
+    if withFacets:
+        return {"results": results, "facets": search_engine.facet_counts(q, cat, filters)}
     return results
 
+class ProductBatchRequest(BaseModel):
+    ids: List[str] = Field(..., max_length=BATCH_MAX_ITEMS)
+
+class SearchQuery(BaseModel):
+    q: Optional[str] = None
+    cat: Optional[str] = None
+
+class SearchBatchRequest(BaseModel):
+    queries: List[SearchQuery] = Field(..., max_length=BATCH_MAX_ITEMS)
+
+@app.post("/api/products/batch")
+async def get_products_batch(request: ProductBatchRequest):
+    # One hash pass for all ids instead of one HTTP round-trip per product
+    products, missing = data.get_products(request.ids)
+    return {"products": products, "missing": missing}
+
+@app.post("/api/products/search/batch")
+async def search_products_batch(request: SearchBatchRequest):
+    logger.debug("Batch Search Request - %d queries", len(request.queries))
+    responses = await search_engine.hybrid_search_batch_async([(sq.q, sq.cat) for sq in request.queries])
+    for _, semantic_status in responses:
+        SEMANTIC_OUTCOMES.inc(semantic_status)
+    return [
+        {"q": sq.q, "cat": sq.cat, "results": results, "semanticStatus": semantic_status}
+        for sq, (results, semantic_status) in zip(request.queries, responses)
+    ]
+
+# Declared before /api/products/{product_id}, which would otherwise capture it
+@app.get("/api/products/recommendations")
+async def get_recommendations(request: Request, cat: Optional[str] = None):
+    # Simple recommendation: highly rated products, optionally within a category
+    products = search_engine.get_recommendations(cat or None)
+    product_ids = tuple(p["id"] for p in products)
+    # Keyed on the ranking itself and versioned by the stock of those products,
+    # so orders for anything else keep the cached body and its ETag
+    return cached_json(request, ("recommendations", product_ids), data.product_version(product_ids),
+                       build=lambda: products)
+
 @app.get("/api/products/{product_id}")
-def get_product(product_id: str):
+async def get_product(request: Request, product_id: str):
+    # Version first: a body built after it is at least as new as the version it is cached under
+    version = data.product_version([product_id])
     product = data.get_product(product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return cached_json(request, ("product", product_id), version, build=lambda: product)
 
 @app.get("/api/products/{product_id}/related")
-def get_related_products(product_id: str):
-    return search_engine.get_related_products(product_id)
+async def get_related_products(product_id: str):
+    return await search_engine.get_related_products_async(product_id)
 
 @app.get("/api/products/{product_id}/faq")
-def get_product_faqs(product_id: str):
-    return data.get_faqs(product_id)
+async def get_product_faqs(request: Request, product_id: str):
+    return cached_json(request, ("faq", product_id), data.content_version,
+                       build=lambda: data.get_faqs(product_id))
 
-@app.get("/api/products/recommendations")
-def get_recommendations():
-    # Simple recommendation: highly rated products
-    return search_engine.get_recommendations()
+@app.get("/api/faqs/search")
+async def search_faqs(request: Request, q: str, productId: Optional[str] = None, k: int = Query(3, ge=1, le=20)):
+    # Top-k answers for a natural-language question instead of every FAQ of a product
+    key = ("faqs", normalize_topic(q), productId, k)
+    version = data.content_version
+    cached = response_cache.get(key, version)
+    if cached is None:
+        hits = await search_engine.search_faqs_async(q, productId, k)
+        cached = response_cache.put(key, version, [
+            dict(faq, score=round(score, 4)) for faq, score in hits
+        ])
+    return cached_json(request, key, version, *cached)
+
+def require_ready():
+    # Orders need the catalog, the order snapshot and the journal, all loaded by data.load_all()
+    if not data.ready.is_set():
+        raise HTTPException(status_code=503, detail="Backend is starting up", headers={"Retry-After": "1"})
 
 @app.get("/api/orders")
-def get_orders(userId: str):
-    return data.get_orders(userId)
+async def get_orders(userId: str):
+    # Before the orders are loaded an empty list would read as "no orders"
+    require_ready()
+    return [data.order_to_dict(order) for order in data.get_orders(userId)]
 @app.get("/api/orders/{order_id}")
-def get_order_by_id(order_id: str):
+async def get_order_by_id(order_id: str):
+    require_ready()
     order = data.get_order(order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    return order
-
-from pydantic import BaseModel
+    return data.order_to_dict(order)
 
 class OrderItem(BaseModel):
     productId: str
@@ -73,32 +356,93 @@ class OrderRequest(BaseModel):
     items: List[OrderItem]
 
 @app.post("/api/orders")
-def create_order(request: OrderRequest):
+async def create_order(request: OrderRequest):
+    require_ready()
     # Convert Pydantic model to dict list
     items_data = [{"productId": i.productId, "quantity": i.quantity} for i in request.items]
     
-    success, result = data.create_order(request.userId, items_data)
+    # In-memory reservation is cheap; only the journal fsync is awaited
+    success, result = data.create_order(request.userId, items_data, durable=False)
     
     if not success:
         raise HTTPException(status_code=400, detail=result)
-    
-    return result
+
+    await data.journal.barrier_async()
+    return data.order_to_dict(result)
 
 @app.post("/api/orders/{order_id}/cancel")
-def cancel_order(order_id: str):
-    success, message = data.cancel_order(order_id)
+async def cancel_order(order_id: str):
+    require_ready()
+    success, message = data.cancel_order(order_id, durable=False)
     if not success:
         return {"success": False, "message": message} # Return 200 OK with error message for frontend handling logic
+    await data.journal.barrier_async()
     return {"success": True, "message": message}
 
 @app.get("/api/policies/search")
-def search_policies(topic: str):
-    print(f"DEBUG: Policy Search - Topic='{topic}'")
-    content = search_engine.search_policies(topic)
-    return {"policyText": content}
+async def search_policies(request: Request, topic: str):
+    logger.debug("Policy Search - Topic='%s'", topic)
+    key = ("policies", normalize_topic(topic))
+    version = data.content_version
+    cached = response_cache.get(key, version)
+    if cached is None:
+        # Miss: the semantic lookup runs on the search executor, not the event loop
+        content = await search_engine.search_policies_async(topic)
+        cached = response_cache.put(key, version, {"policyText": content})
+    return cached_json(request, key, version, *cached)
+
+def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/api/admin/reload")
+async def reload_data(request: Request, wait: bool = False):
+    """
+    Re-read the catalog, FAQs and policies. The new data is built in the
+    background and swapped in once complete; requests keep being served from
+    the old data meanwhile. `wait=true` responds when the swap is done.
+    """
+    require_admin(request)
+    if wait:
+        # The default executor: a reload must not occupy the search workers
+        result = await asyncio.get_running_loop().run_in_executor(None, data.reload)
+        return JSONResponse(result, status_code=200 if result["ok"] else 422)
+    if data.reload_in_progress:
+        return JSONResponse({"status": "running"}, status_code=202)
+    threading.Thread(target=data.reload, name="data-reload", daemon=True).start()
+    return JSONResponse({"status": "started"}, status_code=202)
+
+@app.get("/api/admin/reload")
+async def reload_status(request: Request):
+    require_admin(request)
+    return {"running": data.reload_in_progress, "last": data.last_reload}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint: stage and request latency histograms, cache hit/miss counters"""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/healthz")
+async def liveness():
+    """Liveness: the process is up and serving HTTP (data may still be loading)"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readiness():
+    """
+    Readiness: catalog, FAQs, policies and keyword indexes are loaded (and,
+    with READY_REQUIRES_VECTORS, semantic search is warmed up). Keyword
+    search serves while `vectors` is still "warming".
+    """
+    ready = data.ready.is_set() and (data.vectors_ready.is_set() or not READY_REQUIRES_VECTORS)
+    body = {"ready": ready, "data": data.ready.is_set(), "vectors": data.vector_status,
+            "relatedIndex": data.related_index.ready}
+    return JSONResponse(body, status_code=200 if ready else 503)
 
 @app.get("/")
-def health_check():
+async def health_check():
     return {"status": "ok", "message": "Voice Agent Backend is running"}
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+import heapq
+import re
+from array import array
+from collections import defaultdict
+from itertools import islice
+from typing import List
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]')
+
+
+def normalize_order_id(order_id: str) -> str:
+    """Lowercase and strip separators so "ORD-1234", "ord 1234" and "ord1234" compare equal"""
+    return _NON_ALNUM.sub('', (order_id or '').lower())
+
+
+class OrderIdIndex:
+    """
+    Suffix + trigram index over normalized order IDs for partial, voice-friendly lookups.
+
+    Spoken fragments are almost always the trailing digits of an ID, so the
+    last 2-4 characters of every ID are kept in a suffix table that answers
+    suffix queries with a single dict hit. Anything else goes through a
+    trigram index: the shortest posting list among the query's trigrams is
+    verified candidate by candidate, so the cost depends on how selective
+    the fragment is rather than on the number of orders. Postings are
+    append-only arrays in insertion order, which keeps inserts O(len(id))
+    and memory compact, and lets a lookup stop as soon as it has `limit`
+    matches of the best tier instead of ranking every candidate.
+    """
+
+    MIN_QUERY_LENGTH = 2
+    GRAM = 3
+    SUFFIX_LENGTHS = (2, 3, 4)
+
+    def __init__(self):
+        self.build([])
+
+    def __len__(self):
+        return len(self._ids)
+
+    def build(self, order_ids):
+        self._ids = list(order_ids)  # position -> original order id
+        # position -> normalized order id
+        self._normalized = normalized = [normalize_order_id(order_id) for order_id in self._ids]
+        self._lengths = {len(norm) for norm in normalized}  # distinct normalized lengths
+        # normalized id -> first position; the rare later ids normalizing the same go to _exact_more
+        self._exact = dict(zip(reversed(normalized), range(len(normalized) - 1, -1, -1)))
+        self._exact_more = {}
+        if len(self._exact) < len(normalized):
+            for pos, norm in enumerate(normalized):
+                if self._exact[norm] != pos:
+                    self._exact_more.setdefault(norm, []).append(pos)
+        suffixes, grams = defaultdict(list), defaultdict(list)
+        gram = self.GRAM
+        # Bulk path: plain lists while filling (much cheaper to append to), arrays once done
+        for pos, norm in enumerate(normalized):
+            for k in self.SUFFIX_LENGTHS:
+                if len(norm) >= k:
+                    suffixes[norm[-k:]].append(pos)
+            for g in {norm[i:i + gram] for i in range(len(norm) - gram + 1)}:
+                grams[g].append(pos)
+        self._suffixes = {key: array('I', postings) for key, postings in suffixes.items()}  # last 2-4 chars
+        self._grams = {key: array('I', postings) for key, postings in grams.items()}  # trigram -> positions
+
+    def add(self, order_id: str):
+        """Index one order id (called when an order is appended)"""
+        pos = len(self._ids)
+        norm = normalize_order_id(order_id)
+        self._ids.append(order_id)
+        self._normalized.append(norm)
+        self._lengths.add(len(norm))
+        if norm in self._exact:
+            self._exact_more.setdefault(norm, []).append(pos)
+        else:
+            self._exact[norm] = pos
+
+        for k in self.SUFFIX_LENGTHS:
+            if len(norm) >= k:
+                self._postings(self._suffixes, norm[-k:]).append(pos)
+
+        for gram in {norm[i:i + self.GRAM] for i in range(len(norm) - self.GRAM + 1)}:
+            self._postings(self._grams, gram).append(pos)
+
+    @staticmethod
+    def _postings(table, key):
+        postings = table.get(key)
+        if postings is None:
+            postings = table[key] = array('I')
+        return postings
+
+    def _gram_postings(self, norm: str):
+        """The shortest trigram posting list of `norm`: a superset of the ids containing it"""
+        if len(norm) < self.GRAM:
+            return ()
+        shortest = None
+        for i in range(len(norm) - self.GRAM + 1):
+            postings = self._grams.get(norm[i:i + self.GRAM])
+            if postings is None:
+                return ()
+            if shortest is None or len(postings) < len(shortest):
+                shortest = postings
+        return shortest
+
+    def _best(self, positions, n):
+        """
+        The first `n` of `positions` (ascending) by closest length, then
+        insertion order. With one id length, that is simply the first `n`,
+        so the scan stops there.
+        """
+        if n is None:
+            return sorted(positions, key=lambda pos: (len(self._normalized[pos]), pos))
+        if len(self._lengths) <= 1:
+            return list(islice(positions, n))
+        return heapq.nsmallest(n, positions, key=lambda pos: (len(self._normalized[pos]), pos))
+
+    def resolve(self, query: str, limit: int = 5) -> List[str]:
+        """
+        Return order ids matching a full or partial id, best match first.
+        Ranking: exact > exact after normalization > suffix > prefix > substring,
+        then the closest length, then insertion order. Fragments shorter than
+        three characters only match as suffixes. Tiers are taken in that
+        order and a lower tier is only scanned while the result is short.
+        """
+        norm = normalize_order_id(query)
+        if len(norm) < self.MIN_QUERY_LENGTH:
+            return []
+
+        exact = [self._exact[norm]] + self._exact_more.get(norm, []) if norm in self._exact else []
+        ranked = [pos for pos in exact if self._ids[pos] == query]
+        ranked += [pos for pos in exact if self._ids[pos] != query]
+        normalized = self._normalized
+        if not limit or len(ranked) < limit:
+            suffix = (pos for pos in self._suffixes.get(norm[-self.SUFFIX_LENGTHS[-1]:], ())
+                      if normalized[pos] != norm and normalized[pos].endswith(norm))
+            ranked += self._best(suffix, limit - len(ranked) if limit else None)
+        if not limit or len(ranked) < limit:
+            # Prefix and substring matches in one pass over the trigram candidates
+            need = limit - len(ranked) if limit else None
+            stop_early = need is not None and len(self._lengths) <= 1
+            prefix, substring = [], []
+            for pos in (pos for pos in self._gram_postings(norm) if norm in normalized[pos]):
+                candidate = normalized[pos]
+                if candidate.endswith(norm):
+                    continue
+                if candidate.startswith(norm):
+                    prefix.append(pos)
+                    if stop_early and len(prefix) >= need:
+                        break
+                elif not stop_early or len(substring) < need:
+                    substring.append(pos)
+            ranked += self._best(iter(prefix), need)
+            if not limit or len(ranked) < limit:
+                ranked += self._best(iter(substring), limit - len(ranked) if limit else None)
+
+        if limit:
+            ranked = ranked[:limit]
+        return [self._ids[pos] for pos in ranked]
@@ -0,0 +1,87 @@
+import sys
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _intern(value):
+    # Customer ids, statuses, dates and product ids repeat across orders
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class OrderItem:
+    """One order line. The product name is looked up at serialization time."""
+
+    __slots__ = ("product_id", "quantity", "price")
+
+    def __init__(self, product_id: str, quantity: int, price):
+        self.product_id = _intern(product_id)
+        self.quantity = quantity
+        self.price = price
+
+
+class Order:
+    """
+    Compact in-memory order. Orders are kept as slotted records (a fraction
+    of the size of the camelCase dicts the API returns); `to_dict` builds
+    the frontend representation when a response is serialized.
+    """
+
+    __slots__ = ("id", "customer_id", "status", "date", "items")
+
+    def __init__(self, order_id: str, customer_id: str, status: str, date: str, items: Tuple[OrderItem, ...]):
+        self.id = order_id
+        self.customer_id = _intern(customer_id)
+        self.status = _intern(status)
+        self.date = _intern(date)
+        self.items = tuple(items)
+
+    @property
+    def total(self):
+        return sum((item.price or 0) * (1 if item.quantity is None else item.quantity) for item in self.items)
+
+    @classmethod
+    def from_raw(cls, o: Dict[str, Any]) -> "Order":
+        """From the snake_case file/journal schema"""
+        return cls(
+            o.get("order_id"),
+            o.get("customer_id"),
+            o.get("order_status"),
+            o.get("order_date"),
+            tuple(
+                OrderItem(i.get("product_id"), i.get("quantity"), i.get("price_at_purchase"))
+                for i in o.get("items", [])
+            ),
+        )
+
+    def to_raw(self) -> Dict[str, Any]:
+        """Back to the snake_case file schema"""
+        return {
+            "order_id": self.id,
+            "customer_id": self.customer_id,
+            "order_status": self.status,
+            "order_date": self.date,
+            "items": [
+                {
+                    "product_id": item.product_id,
+                    "quantity": item.quantity,
+                    "price_at_purchase": item.price
+                } for item in self.items
+            ]
+        }
+
+    def to_dict(self, product_name: Optional[Callable[[str], Optional[str]]] = None) -> Dict[str, Any]:
+        """Frontend Order schema; `product_name` resolves item names from the catalog"""
+        return {
+            "id": self.id,
+            "customerId": self.customer_id,
+            "status": self.status,
+            "date": self.date,
+            "total": self.total,
+            "items": [
+                {
+                    "productId": item.product_id,
+                    "name": (product_name(item.product_id) if product_name else None) or f"Product {item.product_id}",
+                    "quantity": item.quantity,
+                    "price": item.price
+                } for item in self.items
+            ]
+        }
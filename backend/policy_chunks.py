@@ -0,0 +1,95 @@
+import re
+from typing import Dict, List
+
+_IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)(\{[^}]*\})?')
+_CITATION = re.compile(r'【[^】]*】')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def normalize_topic(topic: str) -> str:
+    """Cache key for a policy question: "Refund time?" and "refund  time" are the same topic"""
+    return " ".join(re.findall(r'[a-z0-9]+', (topic or '').lower()))
+
+
+def _clean(paragraph: str) -> str:
+    """Flatten one markdown paragraph to a single line of plain-ish text"""
+    lines = []
+    for line in paragraph.splitlines():
+        line = line.strip()
+        line = re.sub(r'^(>\s*)+', '', line)   # blockquote markers from the docx export
+        line = re.sub(r'^-\s+', '- ', line)   # "-   item" bullets
+        lines.append(line)
+    text = " ".join(line for line in lines if line)
+    text = _CITATION.sub('', _IMAGE.sub('', text))
+    text = " ".join(text.split())
+    # Image captions ("*Delivery timeline icon*") carry no policy content
+    if re.fullmatch(r'\*[^*]+\*', text):
+        return ""
+    return text
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Split an oversized paragraph on sentence boundaries"""
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(text):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _section_chunks(section: str, title: str, paragraphs: List[str], max_chars: int) -> List[Dict[str, str]]:
+    """Pack one section's paragraphs into passages of at most ~`max_chars`"""
+    passages, current = [], ""
+    for paragraph in paragraphs:
+        for piece in (_split_long(paragraph, max_chars) if len(paragraph) > max_chars else [paragraph]):
+            if current and len(current) + 1 + len(piece) > max_chars:
+                passages.append(current)
+                current = piece
+            else:
+                current = f"{current}\n{piece}" if current else piece
+    if current:
+        passages.append(current)
+    return [{"id": f"{section}#{n}", "title": title, "section": section, "text": text}
+            for n, text in enumerate(passages)]
+
+
+def chunk_policies(policies: Dict[str, str], max_chars: int = 500, min_chars: int = 80) -> List[Dict[str, str]]:
+    """
+    Split policy sections into passages of at most ~`max_chars` characters.
+
+    Paragraphs are packed greedily and never split unless a single one is
+    too long. Sections whose body is shorter than `min_chars` (subheaders,
+    one-line notes) do not become passages of their own: their title is
+    kept as context for the following section ("Parent > Child") and their
+    text is merged into its first passage. A short section at the end is
+    appended to the last passage instead. Returns
+    [{"id", "title", "section", "text"}] in document order.
+    """
+    chunks = []
+    context, carried = None, []  # title and paragraphs of short sections awaiting the next section
+    for section, body in policies.items():
+        paragraphs = [p for p in (_clean(p) for p in re.split(r'\n\s*\n', body)) if p]
+        title = f"{context} > {section}" if context else section
+        if sum(len(p) for p in paragraphs) < min_chars:
+            context = title
+            carried += paragraphs
+            continue
+        paragraphs = carried + paragraphs
+        context, carried = None, []
+        chunks += _section_chunks(section, title, paragraphs, max_chars)
+
+    if carried:
+        # Trailing short section(s): nothing follows, so keep the text with the previous passage
+        text = f"{context}: {' '.join(carried)}"
+        if chunks and len(chunks[-1]["text"]) + 1 + len(text) <= max_chars:
+            chunks[-1]["text"] += f"\n{text}"
+        else:
+            section = list(policies)[-1]
+            chunks += _section_chunks(section, context, carried, max_chars)
+    return chunks
+
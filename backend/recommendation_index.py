@@ -0,0 +1,75 @@
+import threading
+from bisect import bisect_left, insort
+from typing import List, Optional
+
+
+class RecommendationIndex:
+    """
+    Materialized "best products" ranking for homepage recommendations.
+
+    In-stock products are kept in sorted lists (one for the whole catalog,
+    one per category) keyed on (-rating, -stock, file position), i.e. the
+    same order the old full sort produced. A stock change moves a single
+    entry (bisect + insert), a product that goes out of stock is dropped,
+    and reading the top N is a slice of the list.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.build([])
+
+    def __len__(self):
+        return len(self._ranking)
+
+    @staticmethod
+    def _category(product) -> str:
+        return (product.get("category") or "").lower()
+
+    def _key(self, product):
+        return (-(product.get("rating") or 0), -(product.get("stock") or 0), self._position[product["id"]], product["id"])
+
+    def build(self, products):
+        self._position = {p["id"]: i for i, p in enumerate(products)}  # file order breaks ties
+        self._keys = {}         # product id -> (key, lowercase category) of its current entry
+        self._ranking = []      # sorted keys, whole catalog
+        self._by_category = {}  # lowercase category -> sorted keys
+        for product in products:
+            if (product.get("stock") or 0) > 0:
+                category = self._category(product)
+                key = self._key(product)
+                self._keys[product["id"]] = (key, category)
+                self._ranking.append(key)
+                self._by_category.setdefault(category, []).append(key)
+        self._ranking.sort()
+        for keys in self._by_category.values():
+            keys.sort()
+
+    @staticmethod
+    def _remove(keys: List, key):
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+
+    def update(self, products):
+        """Re-rank products whose stock (or rating) changed"""
+        with self._lock:
+            for product in products:
+                pid = product["id"]
+                if pid not in self._position:
+                    self._position[pid] = len(self._position)
+                old = self._keys.pop(pid, None)
+                if old is not None:
+                    self._remove(self._ranking, old[0])
+                    self._remove(self._by_category[old[1]], old[0])
+                if (product.get("stock") or 0) > 0:
+                    category = self._category(product)
+                    key = self._key(product)
+                    self._keys[pid] = (key, category)
+                    insort(self._ranking, key)
+                    insort(self._by_category.setdefault(category, []), key)
+
+    def top(self, limit: int = 6, category: Optional[str] = None) -> List[str]:
+        """Ids of the best-ranked in-stock products, optionally within one category"""
+        keys = self._ranking if category is None else self._by_category.get(category.lower(), [])
+        return [key[-1] for key in keys[:limit]]
+
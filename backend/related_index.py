@@ -0,0 +1,129 @@
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class RelatedProductsIndex:
+    """
+    Precomputed top-K neighbour table for "related products".
+
+    Built from the product embeddings already stored in the vector DB: the
+    normalized embedding matrix is multiplied against itself in row blocks
+    (cosine similarity) and the K best neighbours of every product are kept.
+    Lookups are then a dict hit. When products change, only their own rows
+    and the rows whose neighbour lists they enter or leave are recomputed.
+    """
+
+    # Bytes per similarity-matrix cell while a block is processed: the float32
+    # similarities, the negated copy argpartition sorts and its int64 indices
+    BYTES_PER_CELL = 16
+
+    def __init__(self, k: int = 20, block_bytes: int = 64 * 1024 * 1024):
+        self.k = k
+        self.block_bytes = block_bytes  # memory budget for one block of similarity rows
+        self._ids = []                 # row -> product id
+        self._rows = {}                # product id -> row
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._neighbours = {}          # product id -> [(product id, similarity)]
+        self._lock = threading.Lock()
+        self.ready = False
+
+    def __len__(self):
+        return len(self._neighbours)
+
+    @staticmethod
+    def _normalize(embeddings) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) == 0:
+            return np.zeros((0, 0), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _top_k(self, rows: Sequence[int]) -> Dict[str, List[Tuple[str, float]]]:
+        """Neighbour lists for the given matrix rows, computed in blocks"""
+        result = {}
+        k = min(self.k, len(self._ids) - 1)
+        if k <= 0:
+            return {self._ids[r]: [] for r in rows}
+
+        # Rows per block from the memory budget: a block is block_size x N cells
+        block_size = max(1, self.block_bytes // (self.BYTES_PER_CELL * len(self._ids)))
+        for start in range(0, len(rows), block_size):
+            block = np.asarray(rows[start:start + block_size])
+            sims = self._matrix[block] @ self._matrix.T
+            sims[np.arange(len(block)), block] = -np.inf  # never relate a product to itself
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            top_sims = np.take_along_axis(sims, top, axis=1)
+            order = np.argsort(-top_sims, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_sims = np.take_along_axis(top_sims, order, axis=1)
+            for i, row in enumerate(block):
+                result[self._ids[row]] = [
+                    (self._ids[j], float(s)) for j, s in zip(top[i], top_sims[i])
+                ]
+        return result
+
+    def build(self, product_ids: Sequence[str], embeddings):
+        """Compute the full neighbour table"""
+        with self._lock:
+            self._ids = list(product_ids)
+            self._rows = {pid: row for row, pid in enumerate(self._ids)}
+            self._matrix = self._normalize(embeddings)
+            self._neighbours = self._top_k(list(range(len(self._ids))))
+            self.ready = True
+
+    def refresh(self, changed_ids: Sequence[str] = (), embeddings=None, removed_ids: Sequence[str] = ()):
+        """
+        Apply added/changed products (with their new embeddings) and removals,
+        recomputing only the rows that can be affected.
+        """
+        with self._lock:
+            removed = set(removed_ids) & set(self._rows)
+            if removed:
+                keep = [row for row, pid in enumerate(self._ids) if pid not in removed]
+                self._ids = [self._ids[row] for row in keep]
+                self._matrix = self._matrix[keep]
+                self._rows = {pid: row for row, pid in enumerate(self._ids)}
+                for pid in removed:
+                    self._neighbours.pop(pid, None)
+
+            changed = list(changed_ids)
+            if changed:
+                appended = []
+                for pid, vector in zip(changed, self._normalize(embeddings)):
+                    row = self._rows.get(pid)
+                    if row is None:
+                        self._rows[pid] = len(self._ids)
+                        self._ids.append(pid)
+                        appended.append(vector)
+                    else:
+                        self._matrix[row] = vector
+                if appended:
+                    stacked = np.vstack(appended)
+                    self._matrix = stacked if self._matrix.size == 0 else np.vstack([self._matrix, stacked])
+
+            touched = set(changed) | removed
+            if not touched:
+                return
+
+            # Rows to recompute: the changed products themselves, rows that listed a
+            # touched product, and rows where a changed product now beats the K-th entry
+            stale = {self._rows[pid] for pid in changed}
+            best_new = None
+            if stale:
+                best_new = (self._matrix @ self._matrix[sorted(stale)].T).max(axis=1)
+            for pid, neighbours in self._neighbours.items():
+                row = self._rows[pid]
+                if row in stale:
+                    continue
+                floor = neighbours[-1][1] if len(neighbours) >= self.k else -np.inf
+                if (best_new is not None and best_new[row] > floor) or any(nid in touched for nid, _ in neighbours):
+                    stale.add(row)
+
+            self._neighbours.update(self._top_k(sorted(stale)))
+
+    def neighbours(self, product_id: str) -> Optional[List[Tuple[str, float]]]:
+        """Precomputed neighbours, best first (None if the product is unknown)"""
+        return self._neighbours.get(product_id)
@@ -0,0 +1,80 @@
+import json
+import logging
+import queue
+import threading
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Request bodies larger than this are recorded as truncated (replay skips them)
+TRACE_MAX_BODY = 64 * 1024
+
+
+class TraceWriter:
+    """
+    Appends request records to a JSON-lines trace file.
+
+    `record` only queues the entry; a background thread serializes and
+    writes it, so tracing adds no file I/O to the request path. One record
+    per line:
+
+        {"ts": 1760000000.123, "session": "10.0.0.7", "method": "GET",
+         "path": "/api/products/search", "query": "q=headset", "body": null,
+         "status": 200, "duration_ms": 3.21}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._file = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="request-trace", daemon=True)
+        self._thread.start()
+        logger.info("Recording request trace to %s", path)
+
+    def record(self, entry: Dict[str, Any]):
+        self._queue.put(entry)
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            lines = [entry]
+            # Drain whatever queued up meanwhile into one write
+            while True:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    self._write(lines)
+                    return
+                lines.append(entry)
+            self._write(lines)
+
+    def _write(self, entries):
+        try:
+            self._file.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in entries))
+            self._file.flush()
+        except Exception as e:
+            logger.error("Error writing request trace: %s", e)
+
+    def close(self):
+        """Write out queued records and close the file"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._file.close()
+
+
+def read_trace(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a trace file in recorded order (torn lines are skipped)"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Ignoring malformed trace line in %s", path)
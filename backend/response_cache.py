@@ -0,0 +1,81 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    # Catalog rows (catalog_snapshot.ProductView) are mappings, not dicts
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode a JSON response body"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+
+class ResponseCache:
+    """
+    LRU cache of ready-to-send JSON bodies for read-mostly endpoints.
+
+    Entries are keyed on (route, params) and tagged with the data version
+    they were built from; a lookup with a newer version is a miss, so a
+    single counter bump in DataLoader invalidates everything derived from
+    the old data. The ETag is a hash of the body, so clients keep getting
+    304s across version bumps that did not change this particular response.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (version, body, etag)
+        self._lock = threading.Lock()
+        self.hits = 0    # read by the cache metrics on /metrics
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def etag_for(body: bytes) -> str:
+        return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+    def get(self, key: Hashable, version: int) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, version: int, obj: Any) -> Tuple[bytes, str]:
+        body = dumps(obj)
+        etag = self.etag_for(body)
+        with self._lock:
+            self._entries[key] = (version, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body, etag
+
+    def get_or_build(self, key: Hashable, version: int, build: Callable[[], Any]) -> Tuple[bytes, str]:
+        cached = self.get(key, version)
+        if cached is not None:
+            return cached
+        return self.put(key, version, build())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,100 +1,274 @@
+import asyncio
 import concurrent.futures
+import logging
+import os
+import time
+import numpy as np
+from metrics import in_request_context, span, timed
+
+logger = logging.getLogger(__name__)
+
+# Worker threads shared by all requests for the semantic (ChromaDB) leg
+SEARCH_WORKERS = int(os.environ.get("SEARCH_WORKERS", "8"))
+# Latency budget for the semantic leg; keyword results are returned once it runs out
+SEMANTIC_TIMEOUT_MS = int(os.environ.get("SEMANTIC_TIMEOUT_MS", "800"))
 
 class SearchLogic:
-    def __init__(self, data_loader):
+    def __init__(self, data_loader, max_workers=SEARCH_WORKERS, semantic_timeout_ms=SEMANTIC_TIMEOUT_MS):
         self.data_loader = data_loader
+        self.semantic_timeout = semantic_timeout_ms / 1000.0
+        # Long-lived pool: creating one per request adds thread churn under concurrent handlers
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="semantic-search"
+        )
 
-    def _keyword_search(self, query, category):
-        """Perform keyword-based search"""
-        results = self.data_loader.products
-        
-        # Category Filter
-        if category:
-            results = [p for p in results if category.lower() in p["category"].lower() or p["category"].lower() in category.lower()]
-        
-        # Keyword Search
-        if query:
-            q = query.lower()
-            results = [
-                p for p in results 
-                if q in p["name"].lower() or q in p["description"].lower() or q in p["category"].lower()
-            ]
-        
-        # Filter out out-of-stock products
-        results = [p for p in results if p.get("stock", 0) > 0]
-        
-        return results[:10]
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    @timed("keyword_search")
+    def _keyword_search(self, query, category, filters=None, sort=None):
+        """
+        Perform keyword-based search (BM25 ranked, in-stock products only).
+        `filters` (FacetIndex filters) and `sort` (a facet_index.SORTS option)
+        are applied over the full match set, before the page is cut.
+        """
+        # One state for the whole search: facet rows must match the keyword index's catalog
+        state = self.data_loader.state
+        keyword_index = state.keyword_index
+        if not filters and not sort:
+            product_ids = keyword_index.search(
+                query,
+                category,
+                limit=10,
+                where=lambda pid: state.get_product(pid).get("stock", 0) > 0
+            )
+            return [state.get_product(pid) for pid in product_ids]
+
+        facets = state.facet_index
+        mask = facets.mask(filters)
+        if sort and not query and not category:
+            # Sorted catalog listing: walk the precomputed order for the field
+            product_ids = facets.top_ids(mask, sort, 10)
+        else:
+            # Keyword docs are catalog rows, so the match set is filtered and
+            # ranked as arrays, with a top-k selection instead of a full sort
+            rows, scores = keyword_index.matches(query, category)
+            product_ids = facets.top_matches(rows, scores, mask, sort, 10)
+        return [state.get_product(pid) for pid in product_ids]
+
+    def facet_counts(self, query=None, category=None, filters=None):
+        """Facet counts over every keyword match of (query, category) that passes `filters`"""
+        state = self.data_loader.state
+        keyword_index = state.keyword_index
+        facets = state.facet_index
+        mask = facets.mask(filters)
+        if query or category:
+            rows, _ = keyword_index.matches(query, category)
+            matched = np.zeros(len(facets), dtype=bool)
+            matched[rows] = True
+            mask &= matched
+        return facets.counts(mask)
     
-    def _semantic_search(self, query):
+    def _semantic_search(self, query, filters=None):
         """Perform semantic search using vector similarity"""
-        if not query or not self.data_loader.vector_db:
+        if not query or not self.data_loader.semantic_ready:
             return []
         
+        state = self.data_loader.state
         try:
-            # Only return products with stock > 0
-            semantic_results = self.data_loader.vector_db.semantic_search(query, limit=8, min_stock=1)
+            # Only return products with stock > 0 (and passing the facet filters)
+            semantic_results = self.data_loader.vector_db.semantic_search(query, limit=8, min_stock=1, filters=filters)
+            if filters:
+                # The vector DB metadata can trail a stock change briefly; re-check in memory
+                allowed = state.facet_index.matches(state.facet_index.mask(filters))
+                semantic_results = [hit for hit in semantic_results if allowed(hit['id'])]
             # Enrich with full product data
-            enriched = []
-            for sem_result in semantic_results:
-                full_product = self.data_loader.get_product(sem_result['id'])
-                if full_product:
-                    full_product['source'] = 'semantic_match'
-                    full_product['similarity_score'] = sem_result.get('similarity_score', 0)
-                    enriched.append(full_product)
+            with span("enrichment"):
+                enriched = []
+                for sem_result in semantic_results:
+                    full_product = state.get_product(sem_result['id'])
+                    if full_product:
+                        # Copy so search annotations never leak into the shared catalog entry
+                        enriched.append(dict(
+                            full_product,
+                            source='semantic_match',
+                            similarity_score=sem_result.get('similarity_score', 0)
+                        ))
             return enriched
         except Exception as e:
-            print(f"Semantic search failed: {e}")
+            logger.warning("Semantic search failed: %s", e)
             return []
 
-    def search_products(self, query=None, category=None):
+    def _semantic_search_batch(self, queries):
+        """Semantic leg for several queries with one embedding call and one ChromaDB query"""
+        if not self.data_loader.semantic_ready:
+            return [[] for _ in queries]
+        try:
+            batch = self.data_loader.vector_db.semantic_search_batch(queries, limit=8, min_stock=1)
+        except Exception as e:
+            logger.warning("Semantic search failed: %s", e)
+            return [[] for _ in queries]
+        state = self.data_loader.state
+        with span("enrichment"):
+            enriched = []
+            for semantic_results in batch:
+                products = []
+                for sem_result in semantic_results:
+                    full_product = state.get_product(sem_result['id'])
+                    if full_product:
+                        products.append(dict(
+                            full_product,
+                            source='semantic_match',
+                            similarity_score=sem_result.get('similarity_score', 0)
+                        ))
+                enriched.append(products)
+        return enriched
+
+    def search_products(self, query=None, category=None, filters=None, sort=None):
         """
-        Parallel search: runs keyword and semantic search concurrently
-        Returns merged results with keyword matches prioritized
+        Hybrid search: keyword matches first, topped up with semantic matches
         """
-        # Run both searches in parallel using ThreadPoolExecutor
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            # Submit both search tasks
-            keyword_future = executor.submit(self._keyword_search, query, category)
-            semantic_future = executor.submit(self._semantic_search, query) if query else None
-            
-            # Get keyword results (usually very fast)
-            keyword_results = keyword_future.result()
-            
-            # If we have keyword results, return them immediately
-            # But also check semantic results for additional suggestions
-            if len(keyword_results) > 0:
-                if semantic_future:
-                    semantic_results = semantic_future.result()
-                    # Merge: keyword results first, then unique semantic results
-                    seen_ids = {p['id'] for p in keyword_results}
-                    for sem_product in semantic_results:
-                        if sem_product['id'] not in seen_ids and len(keyword_results) < 10:
-                            keyword_results.append(sem_product)
-                            seen_ids.add(sem_product['id'])
-                return keyword_results[:10]
-            
-            # If no keyword results, wait for semantic results
-            if semantic_future:
-                semantic_results = semantic_future.result()
-                if len(semantic_results) > 0:
-                    print(f"No keyword matches, returning {len(semantic_results)} semantic matches")
-                    return semantic_results
-        
-        return []  # No results from either search
+        results, _ = self.hybrid_search(query, category, filters, sort)
+        return results
+
+    def hybrid_search(self, query=None, category=None, filters=None, sort=None):
+        """
+        Runs keyword search inline and the semantic leg on the shared executor,
+        waiting for the latter at most `semantic_timeout` seconds.
+        Returns (results, semantic_status) where semantic_status is one of
+        "ok", "timeout", "skipped" (no query, no vector DB, or keyword
+        results already fill the page) or "warming" (vector DB still starting).
+        """
+        started = time.monotonic()
+
+        # Keyword search is an in-memory index lookup, no need for a thread hop
+        keyword_results = self._keyword_search(query, category, filters, sort)
+        if not self._needs_semantic(query, keyword_results):
+            return keyword_results[:10], self._skipped(query)
+
+        semantic_future = self.executor.submit(in_request_context(self._semantic_search), query, filters)
+        try:
+            semantic_results = semantic_future.result(timeout=self._remaining_budget(started))
+        except concurrent.futures.TimeoutError:
+            return self._semantic_timed_out(keyword_results)
+        return self._sorted(self._merge_results(keyword_results, semantic_results), sort), "ok"
+
+    async def hybrid_search_async(self, query=None, category=None, filters=None, sort=None):
+        """Event-loop version of hybrid_search: the semantic leg is awaited, not blocked on"""
+        started = time.monotonic()
+
+        keyword_results = self._keyword_search(query, category, filters, sort)
+        if not self._needs_semantic(query, keyword_results):
+            return keyword_results[:10], self._skipped(query)
+
+        semantic_future = asyncio.wrap_future(
+            self.executor.submit(in_request_context(self._semantic_search), query, filters)
+        )
+        try:
+            semantic_results = await asyncio.wait_for(semantic_future, timeout=self._remaining_budget(started))
+        except asyncio.TimeoutError:
+            return self._semantic_timed_out(keyword_results)
+        return self._sorted(self._merge_results(keyword_results, semantic_results), sort), "ok"
+
+    async def hybrid_search_batch_async(self, requests):
+        """
+        Hybrid search for several (query, category) pairs in one call.
+        Keyword legs run inline; every query that still needs semantic results
+        shares one batched semantic call under a single latency budget.
+        Returns a list of (results, semantic_status), in request order.
+        """
+        started = time.monotonic()
+        keyword_results = [self._keyword_search(query, category) for query, category in requests]
+        pending = [i for i, (query, _) in enumerate(requests) if self._needs_semantic(query, keyword_results[i])]
+
+        responses = [(results[:10], self._skipped(query)) for (query, _), results in zip(requests, keyword_results)]
+        if not pending:
+            return responses
+
+        semantic_future = asyncio.wrap_future(
+            self.executor.submit(in_request_context(self._semantic_search_batch), [requests[i][0] for i in pending])
+        )
+        try:
+            semantic_batch = await asyncio.wait_for(semantic_future, timeout=self._remaining_budget(started))
+        except asyncio.TimeoutError:
+            logger.info("Batched semantic search exceeded %.0fms budget, returning keyword results",
+                        self.semantic_timeout * 1000)
+            for i in pending:
+                responses[i] = (keyword_results[i], "timeout")
+            return responses
+
+        for i, semantic_results in zip(pending, semantic_batch):
+            responses[i] = (self._merge_results(keyword_results[i], semantic_results), "ok")
+        return responses
+
+    async def run_blocking(self, fn, *args):
+        """Run a blocking call (embedding, ChromaDB) on the search executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, in_request_context(fn), *args)
+
+    def _needs_semantic(self, query, keyword_results):
+        return bool(query) and self.data_loader.semantic_ready and len(keyword_results) < 10
+
+    def _skipped(self, query):
+        """Status of a search answered from keywords alone"""
+        # "warming": the vector side is still starting up, so this query got no semantic leg
+        return "warming" if query and not self.data_loader.vectors_ready.is_set() else "skipped"
+
+    def _remaining_budget(self, started):
+        return max(self.semantic_timeout - (time.monotonic() - started), 0)
+
+    def _semantic_timed_out(self, keyword_results):
+        logger.info("Semantic search exceeded %.0fms budget, returning keyword results", self.semantic_timeout * 1000)
+        return keyword_results, "timeout"
+
+    def _sorted(self, products, sort):
+        """Re-apply a sort option after semantic matches were merged in"""
+        if not sort:
+            return products
+        by_id = {p['id']: p for p in products}
+        return [by_id[pid] for pid in self.data_loader.state.facet_index.sort_ids(list(by_id), sort)]
+
+    def _merge_results(self, keyword_results, semantic_results):
+        if len(keyword_results) > 0:
+            # Merge: keyword results first, then unique semantic results
+            seen_ids = {p['id'] for p in keyword_results}
+            for sem_product in semantic_results:
+                if sem_product['id'] not in seen_ids and len(keyword_results) < 10:
+                    keyword_results.append(sem_product)
+                    seen_ids.add(sem_product['id'])
+            return keyword_results[:10]
+
+        # No keyword results, fall back to semantic matches
+        if len(semantic_results) > 0:
+            logger.debug("No keyword matches, returning %d semantic matches", len(semantic_results))
+        return semantic_results
 
     def get_related_products(self, product_id):
         """
-        Use semantic vector search to find related products
+        Use semantic vector similarity to find related products
         This finds complementary/similar items instead of just same-category products
         Example: Phone -> Phone case, Screen protector
                  Laptop -> Mouse, Laptop bag
         """
-        main_product = self.data_loader.get_product(product_id)
+        state = self.data_loader.state
+        main_product = state.get_product(product_id)
         if not main_product:
             return []
+
+        # Precomputed neighbour table: a dict lookup instead of an embedding + vector query
+        neighbours = self.data_loader.related_index.neighbours(product_id)
+        if neighbours is not None:
+            related = []
+            for neighbour_id, similarity in neighbours:
+                product = state.get_product(neighbour_id)
+                if product and product.get('stock', 0) > 0:
+                    related.append(dict(product, similarity_score=similarity))
+                    if len(related) >= 5:
+                        break
+            return related
         
         # Use vector search if available
-        if self.data_loader.vector_db:
+        if self.data_loader.semantic_ready:
             try:
                 # Create search query from product name and category
                 query = f"{main_product['name']} {main_product.get('category', '')}"
@@ -110,52 +284,68 @@ class SearchLogic:
                 related = []
                 for sem_result in semantic_results:
                     if sem_result['id'] != product_id:  # Exclude the main product
-                        full_product = self.data_loader.get_product(sem_result['id'])
+                        full_product = state.get_product(sem_result['id'])
                         if full_product and full_product.get('stock', 0) > 0:
-                            full_product['similarity_score'] = sem_result.get('similarity_score', 0)
-                            related.append(full_product)
+                            related.append(dict(
+                                full_product,
+                                similarity_score=sem_result.get('similarity_score', 0)
+                            ))
                 
                 # Sort by similarity score and return top 5
                 related.sort(key=lambda x: x.get('similarity_score', 0), reverse=True)
                 return related[:5]
                 
             except Exception as e:
-                print(f"Vector search for related products failed: {e}")
+                logger.warning("Vector search for related products failed: %s", e)
                 # Fall through to fallback logic
         
-        # Fallback: Category-based if vector search unavailable
-        category = main_product.get("category", "")
-        related = [
-            p for p in self.data_loader.products 
-            if p["category"] == category 
-            and p["id"] != product_id
-            and p.get("stock", 0) > 0
-        ]
-        related.sort(key=lambda x: x.get("rating", 0), reverse=True)
-        return related[:5]
-
-    def get_recommendations(self):
+        # Fallback: Category-based if vector search unavailable. The materialized
+        # ranking already holds in-stock products by rating per category
+        category = main_product.get("category") or ""
+        product_ids = state.recommendation_index.top(6, category)
+        return [state.get_product(pid) for pid in product_ids if pid != product_id][:5]
+
+    async def get_related_products_async(self, product_id):
+        """
+        Served inline from the neighbour table or the category fallback;
+        only a vector query (embedding + ChromaDB) goes to the executor
+        """
+        if self.data_loader.related_index.neighbours(product_id) is not None or not self.data_loader.semantic_ready:
+            return self.get_related_products(product_id)
+        return await self.run_blocking(self.get_related_products, product_id)
+
+    async def search_faqs_async(self, question, product_id=None, k=3):
+        """The keyword fallback runs inline (posting lookups); only semantic FAQ search goes to the executor"""
+        if not self.data_loader.semantic_ready:
+            return self.data_loader.search_faqs(question, product_id, k)
+        return await self.run_blocking(self.data_loader.search_faqs, question, product_id, k)
+
+    async def search_policies_async(self, topic):
+        """Like search_faqs_async: the substring fallback over a few passages runs inline"""
+        if not self.data_loader.semantic_ready:
+            return self.search_policies(topic)
+        return await self.run_blocking(self.search_policies, topic)
+
+    def get_recommendations(self, category=None, limit=6):
         # --- HOMEPAGE RECOMMENDATIONS ---
         # 1. Edge Case: Filter Out of Stock items (Bad user experience to recommend unreachable items)
         # 2. Logic: High Rating + High Stock (Available & Good)
-        
-        available_products = [p for p in self.data_loader.products if p["stock"] > 0]
-        
-        # Sort by Rating and ensure they have reasonable stock
-        sorted_products = sorted(available_products, key=lambda p: (p["rating"], p["stock"]), reverse=True)
-        
-        return sorted_products[:6] # Top 6
+        # The ranking is materialized and kept current on stock changes, so this
+        # only reads the first `limit` entries
+        state = self.data_loader.state
+        product_ids = state.recommendation_index.top(limit, category)
+        return [state.get_product(pid) for pid in product_ids]
 
     def search_policies(self, topic):
         """Search for policies using semantic search"""
         if not topic:
             return "Please provide a topic to search for in our policies."
-            
+
         # Use semantic search from data_loader
         results = self.data_loader.search_policies(topic)
         
         if results and len(results) > 0:
-            # Return the top match
+            # Return the top passage (bounded size) rather than the whole section
             top_hit = results[0]
             return f"**{top_hit['title']}**\n\n{top_hit['content']}"
                 
@@ -0,0 +1,373 @@
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from order_journal import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+class VectorCollection(ABC):
+    """
+    The collection API VectorSearch relies on: the subset of a ChromaDB
+    collection it uses (same argument names and result shapes), plus
+    `persist()` for engines that do not write through on every call.
+    """
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None,
+            limit: Optional[int] = None, offset: Optional[int] = None) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]):
+        ...
+
+    @abstractmethod
+    def update(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        ...
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        ...
+
+    @abstractmethod
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        ...
+
+    def persist(self):
+        pass
+
+
+class ChromaCollection(VectorCollection):
+    """ChromaDB collection; Chroma persists every write itself"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def count(self):
+        return self._collection.count()
+
+    def get(self, ids=None, include=None, limit=None, offset=None):
+        return self._collection.get(ids=ids, include=include or ["metadatas"], limit=limit, offset=offset)
+
+    def upsert(self, ids, documents, metadatas):
+        self._collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+
+    def update(self, ids, metadatas):
+        self._collection.update(ids=ids, metadatas=metadatas)
+
+    def delete(self, ids):
+        self._collection.delete(ids=ids)
+
+    def query(self, query_embeddings, n_results=10, where=None):
+        return self._collection.query(query_embeddings=query_embeddings, n_results=n_results, where=where)
+
+
+class ChromaBackend:
+    """Persistent ChromaDB client (HNSW index, SQLite metadata)"""
+
+    name = "chroma"
+
+    def __init__(self, persist_directory: str):
+        import chromadb
+        self.client = chromadb.PersistentClient(path=persist_directory)
+
+    def collection(self, name: str, embedding_fn) -> VectorCollection:
+        return ChromaCollection(self.client.get_or_create_collection(
+            name=name,
+            embedding_function=embedding_fn,
+            metadata={"hnsw:space": "cosine"}
+        ))
+
+
+def _where_mask(where: Optional[Dict[str, Any]], column, size: int) -> Optional[np.ndarray]:
+    """
+    Translate a Chroma `where` filter ({"stock": {"$gte": 1}}, {"productId": "P1"},
+    {"$and": [...]}, {"$or": [...]}) into a boolean row mask. None means no filter.
+    """
+    if not where:
+        return None
+    mask = np.ones(size, dtype=bool)
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [_where_mask(part, column, size) for part in condition]
+            parts = [np.ones(size, dtype=bool) if p is None else p for p in parts]
+            if not parts:
+                continue
+            combined = np.logical_and.reduce(parts) if key == "$and" else np.logical_or.reduce(parts)
+            mask &= combined
+            continue
+        values = column(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, operand in condition.items():
+            if op == "$in" or op == "$nin":
+                hit = np.isin(values, list(operand))
+                mask &= hit if op == "$in" else ~hit
+                continue
+            with np.errstate(invalid="ignore"):
+                if op == "$eq":
+                    mask &= values == operand
+                elif op == "$ne":
+                    mask &= values != operand
+                elif op == "$gt":
+                    mask &= values > operand
+                elif op == "$gte":
+                    mask &= values >= operand
+                elif op == "$lt":
+                    mask &= values < operand
+                elif op == "$lte":
+                    mask &= values <= operand
+                else:
+                    raise ValueError(f"Unsupported where operator: {op}")
+    return mask
+
+
+class NumpyCollection(VectorCollection):
+    """
+    In-process vector collection: a contiguous float32 matrix of normalized
+    embeddings searched with one matrix product, and metadata filters
+    evaluated as NumPy masks over per-key columns.
+
+    State lives in `<directory>/embeddings.npy` (opened memory-mapped, so a
+    restart does not read the whole matrix up front) and `records.json`
+    (ids, documents, metadata). Writes stay in memory until `persist()`;
+    the matrix is copied out of the map only on the first write.
+    """
+
+    def __init__(self, directory: str, embedding_fn):
+        self.directory = directory
+        self.embedding_fn = embedding_fn
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        self._ids = []
+        self._rows = {}
+        self._documents = []
+        self._metadatas = []
+        self._columns = {}  # metadata key -> array over rows, built on first filter
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        records_path = os.path.join(self.directory, "records.json")
+        matrix_path = os.path.join(self.directory, "embeddings.npy")
+        if not (os.path.exists(records_path) and os.path.exists(matrix_path)):
+            return
+        try:
+            with open(records_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            matrix = np.load(matrix_path, mmap_mode="r")
+            if len(matrix) != len(records["ids"]):
+                raise ValueError("embeddings.npy and records.json disagree")
+        except Exception as e:
+            logger.warning("Ignoring unreadable vector store in %s: %s", self.directory, e)
+            return
+        self._matrix = matrix
+        self._size = len(matrix)
+        self._ids = records["ids"]
+        self._rows = {item_id: row for row, item_id in enumerate(self._ids)}
+        self._documents = records["documents"]
+        self._metadatas = records["metadatas"]
+
+    def persist(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            matrix_path = os.path.join(self.directory, "embeddings.npy")
+            tmp_path = matrix_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(self._matrix[:self._size]))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, matrix_path)
+            atomic_write_json(os.path.join(self.directory, "records.json"), {
+                "ids": self._ids, "documents": self._documents, "metadatas": self._metadatas
+            }, indent=None)
+            self._dirty = False
+
+    def count(self):
+        return self._size
+
+    # Storage helpers
+
+    @staticmethod
+    def _normalize(embeddings) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _reserve(self, rows: int, dim: int):
+        """Make room for `rows` more rows in a writable (non-mapped) matrix"""
+        needed = self._size + rows
+        if self._matrix.shape[1:] != (dim,) and self._size:
+            raise ValueError(f"Embedding dimension {dim} does not match the collection ({self._matrix.shape[1]})")
+        if isinstance(self._matrix, np.memmap) or len(self._matrix) < needed or self._matrix.shape[1:] != (dim,):
+            capacity = max(needed, 2 * len(self._matrix), 64)
+            grown = np.zeros((capacity, dim), dtype=np.float32)
+            if self._size:
+                grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+
+    def _column(self, key: str) -> np.ndarray:
+        column = self._columns.get(key)
+        if column is None:
+            values = [meta.get(key) for meta in self._metadatas]
+            if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                column = np.asarray(values, dtype=np.float64)
+            else:
+                column = np.asarray(values, dtype=object)
+            self._columns[key] = column
+        return column
+
+    # Collection API
+
+    def get(self, ids=None, include=None, limit=None, offset=None):
+        include = include or ["metadatas"]
+        with self._lock:
+            if ids is None:
+                start = offset or 0
+                end = self._size if limit is None else min(self._size, start + limit)
+                rows = list(range(start, end))
+            else:
+                rows = [self._rows[i] for i in ids if i in self._rows]
+            result = {"ids": [self._ids[r] for r in rows]}
+            if "metadatas" in include:
+                result["metadatas"] = [dict(self._metadatas[r]) for r in rows]
+            if "documents" in include:
+                result["documents"] = [self._documents[r] for r in rows]
+            if "embeddings" in include:
+                result["embeddings"] = np.array(self._matrix[rows]) if rows else np.zeros((0, 0), dtype=np.float32)
+            return result
+
+    def upsert(self, ids, documents, metadatas):
+        if not ids:
+            return
+        vectors = self._normalize(self.embedding_fn(documents))
+        with self._lock:
+            new = [i for i in dict.fromkeys(ids) if i not in self._rows]
+            self._reserve(len(new), vectors.shape[1])
+            for item_id, document, metadata, vector in zip(ids, documents, metadatas, vectors):
+                row = self._rows.get(item_id)
+                if row is None:
+                    row = self._size
+                    self._rows[item_id] = row
+                    self._ids.append(item_id)
+                    self._documents.append(document)
+                    self._metadatas.append(dict(metadata))
+                    self._size += 1
+                else:
+                    self._documents[row] = document
+                    self._metadatas[row] = dict(metadata)
+                self._matrix[row] = vector
+            self._columns = {}
+            self._dirty = True
+
+    def update(self, ids, metadatas):
+        with self._lock:
+            for item_id, metadata in zip(ids, metadatas):
+                row = self._rows.get(item_id)
+                if row is None:
+                    continue
+                # Like Chroma, keys are merged into the stored metadata
+                self._metadatas[row].update(metadata)
+                for key, value in metadata.items():
+                    column = self._columns.get(key)
+                    if column is None:
+                        continue
+                    if column.dtype == np.float64 and isinstance(value, (int, float)) and not isinstance(value, bool):
+                        column[row] = value  # stock updates patch the column in place
+                    elif column.dtype == object:
+                        column[row] = value
+                    else:
+                        del self._columns[key]
+            self._dirty = True
+
+    def delete(self, ids):
+        with self._lock:
+            doomed = {self._rows[i] for i in ids if i in self._rows}
+            if not doomed:
+                return
+            keep = [r for r in range(self._size) if r not in doomed]
+            self._matrix = np.array(self._matrix[keep], dtype=np.float32).reshape(len(keep), self._matrix.shape[1])
+            self._ids = [self._ids[r] for r in keep]
+            self._documents = [self._documents[r] for r in keep]
+            self._metadatas = [self._metadatas[r] for r in keep]
+            self._rows = {item_id: row for row, item_id in enumerate(self._ids)}
+            self._size = len(keep)
+            self._columns = {}
+            self._dirty = True
+
+    def query(self, query_embeddings, n_results=10, where=None):
+        queries = self._normalize(query_embeddings)
+        with self._lock:
+            # Writes replace these lists rather than shrinking them, so the
+            # references stay consistent while the product runs unlocked
+            size = self._size
+            matrix = self._matrix[:size]
+            ids, documents, metadatas = self._ids, self._documents, self._metadatas
+            mask = _where_mask(where, self._column, size)
+
+        candidates = None
+        if mask is not None and mask.sum() < size // 2:
+            # Selective filter: score only the matching rows
+            candidates = np.flatnonzero(mask)
+            matrix = matrix[candidates]
+            mask = None
+        result = {"ids": [], "distances": [], "metadatas": [], "documents": []}
+        k = min(n_results, len(matrix) if mask is None else int(mask.sum()))
+        scores = queries @ matrix.T if k > 0 else None
+        if mask is not None and k > 0:
+            # Broad filter: scoring everything beats copying most of the matrix
+            scores[:, ~mask] = -np.inf
+        for q in range(len(queries)):
+            if k == 0:
+                for key in result:
+                    result[key].append([])
+                continue
+            row_scores = scores[q]
+            top = np.argpartition(-row_scores, k - 1)[:k]
+            top = top[np.argsort(-row_scores[top], kind="stable")]
+            rows = candidates[top] if candidates is not None else top
+            result["ids"].append([ids[r] for r in rows])
+            result["distances"].append([float(1.0 - row_scores[t]) for t in top])
+            result["metadatas"].append([dict(metadatas[r]) for r in rows])
+            result["documents"].append([documents[r] for r in rows])
+        return result
+
+
+class NumpyBackend:
+    """In-process engine: one NumpyCollection per name under `<persist_directory>/numpy/`"""
+
+    name = "numpy"
+
+    def __init__(self, persist_directory: str):
+        self.directory = os.path.join(persist_directory, "numpy")
+
+    def collection(self, name: str, embedding_fn) -> VectorCollection:
+        return NumpyCollection(os.path.join(self.directory, name), embedding_fn)
+
+
+BACKENDS = {"chroma": ChromaBackend, "numpy": NumpyBackend}
+
+
+def create_backend(name: str, persist_directory: str):
+    try:
+        backend = BACKENDS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown vector backend {name!r} (choose from {', '.join(BACKENDS)})")
+    return backend(persist_directory)
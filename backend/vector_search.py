@@ -1,186 +1,436 @@
-import chromadb
-from chromadb.utils import embedding_functions
 from typing import List, Dict, Any
+import hashlib
+import logging
 import os
+import threading
+from embedding_cache import EmbeddingCache
+from metrics import span, timed
+from vector_backends import create_backend
+
+logger = logging.getLogger(__name__)
+
+# Vector engine: "chroma" (persistent HNSW + SQLite) or "numpy" (in-process matrix, .npy on disk)
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "chroma")
+
+# Query embedding cache sizing (voice traffic repeats the same queries a lot)
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL = float(os.environ.get("QUERY_CACHE_TTL", "3600"))
+# Chunk size for ChromaDB writes (its per-call batch limit is a few thousand)
+UPSERT_BATCH_SIZE = 1000
+# Page size when reading stored metadata back for the incremental diff
+STORED_PAGE_SIZE = 10000
+# Stock changes arriving within this window are written to ChromaDB in one update
+STOCK_SYNC_DELAY = float(os.environ.get("STOCK_SYNC_DELAY", "0.25"))
+
+# Semantic keyword mappings for enrichment
+SEMANTIC_KEYWORDS = {
+    'earbuds': 'headphone headphones earphone earphones audio listen music wireless bluetooth sound',
+    'earbud': 'headphone headphones earphone earphones audio listen music wireless bluetooth sound',
+    'headset': 'headphone headphones earphone earphones audio listen music gaming voice sound',
+    'headphone': 'earbuds earphone audio listen music wireless bluetooth sound',
+    'headphones': 'earbuds earphone audio listen music wireless bluetooth sound',
+    'speaker': 'audio sound music bluetooth wireless portable speaker speakers',
+    'laptop': 'computer computers portable notebook work coding programming device technology',
+    'tablet': 'computer computers portable touchscreen mobile device technology ipad android',
+    'computer': 'laptop desktop workstation device technology',
+    'phone': 'mobile smartphone device portable communication tablet smartwatch technology',
+    'smartphone': 'phone mobile device portable communication tablet smartwatch technology android iphone',
+    'mobile': 'phone smartphone device portable communication tablet technology',
+    'watch': 'smartwatch wearable fitness tracker device technology',
+    'smartwatch': 'watch wearable fitness tracker device mobile phone technology',
+    'camera': 'photo photography video capture image technology device',
+}
+
 
 class VectorSearch:
-    def __init__(self, persist_directory="./vector_cache"):
-        """Initialize ChromaDB vector search"""
+    def __init__(self, persist_directory="./vector_cache", backend=None, embedding_fn=None):
+        """Initialize vector search on the configured backend"""
         self.persist_directory = persist_directory
         # Ensure directory exists
         os.makedirs(persist_directory, exist_ok=True)
         
-        # Initialize Client
-        # Using PersistentClient to save data to disk
-        self.client = chromadb.PersistentClient(path=persist_directory)
-        
-        # Use default embedding function (all-MiniLM-L6-v2)
-        self.embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+        # Storage/search engine behind the collections (see vector_backends.py)
+        self.backend = create_backend(backend or VECTOR_BACKEND, persist_directory)
         
-        # Get or create collections
-        # Using cosine distance for similarity search
-        self.collection = self.client.get_or_create_collection(
-            name="product_search",
-            embedding_function=self.embedding_fn,
-            metadata={"hnsw:space": "cosine"}
-        )
+        # Use default embedding function (all-MiniLM-L6-v2) unless one is supplied
+        if embedding_fn is None:
+            # Imported here: chromadb takes seconds to import, and the server
+            # constructs VectorSearch off its startup path
+            from chromadb.utils import embedding_functions
+            embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+        self.embedding_fn = embedding_fn
+
+        # Normalized query -> embedding, so repeated queries skip model inference
+        self.query_cache = EmbeddingCache(max_size=QUERY_CACHE_SIZE, ttl_seconds=QUERY_CACHE_TTL)
+
+        # Products whose metadata (stock) changed and still need writing: { id: product }
+        self._pending_metadata = {}
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
         
-        self.policy_collection = self.client.get_or_create_collection(
-            name="policy_search",
-            embedding_function=self.embedding_fn,
-            metadata={"hnsw:space": "cosine"}
-        )
+        # Get or create collections (cosine similarity)
+        self.collection = self.backend.collection("product_search", self.embedding_fn)
+        self.policy_collection = self.backend.collection("policy_search", self.embedding_fn)
+        self.faq_collection = self.backend.collection("faq_search", self.embedding_fn)
         
-        print("ChromaDB vector search initialized.")
+        logger.info("Vector search initialized (%s backend).", self.backend.name)
+
+    @timed("warm_up")
+    def warm_up(self) -> bool:
+        """
+        Load the embedding model and run one product query, so the first
+        real search does not pay for model loading. False if it failed.
+        """
+        try:
+            embedding = self.embedding_fn(["warm up"])
+            if self.collection.count():
+                self.collection.query(query_embeddings=embedding, n_results=1)
+            return True
+        except Exception as e:
+            logger.warning("Vector search warm-up failed: %s", e)
+            return False
+
+    @timed("query_embedding")
+    def embed_queries(self, queries: List[str]) -> List[Any]:
+        """Embed queries through the LRU cache; misses are embedded in one batch"""
+        keys = [EmbeddingCache.normalize(q) for q in queries]
+        embeddings = [self.query_cache.get(key) for key in keys]
+
+        missing = list(dict.fromkeys(key for key, emb in zip(keys, embeddings) if emb is None))
+        if missing:
+            computed = dict(zip(missing, self.embedding_fn(missing)))
+            for key, embedding in computed.items():
+                self.query_cache.put(key, embedding)
+            embeddings = [emb if emb is not None else computed[key] for key, emb in zip(keys, embeddings)]
+
+        return embeddings
+
+    def embed_query(self, query: str) -> Any:
+        return self.embed_queries([query])[0]
     
-    def index_products(self, products: List[Dict[str, Any]]):
-        """Index all products using ChromaDB"""
-        if not products:
-            print("No products to index.")
-            return
-        
-        print(f"Indexing {len(products)} products with ChromaDB...")
-        
-        ids = []
-        documents = []
-        metadatas = []
+    @staticmethod
+    def product_document(product: Dict[str, Any]) -> str:
+        """Text that gets embedded for a product"""
+        # Create rich document
+        doc = f"{product['name']} {product['name']} {product['description']} {product['category']}"
         
-        # Semantic keyword mappings for enrichment
-        semantic_keywords = {
-            'earbuds': 'headphone headphones earphone earphones audio listen music wireless bluetooth sound',
-            'earbud': 'headphone headphones earphone earphones audio listen music wireless bluetooth sound',
-            'headset': 'headphone headphones earphone earphones audio listen music gaming voice sound',
-            'headphone': 'earbuds earphone audio listen music wireless bluetooth sound',
-            'headphones': 'earbuds earphone audio listen music wireless bluetooth sound',
-            'speaker': 'audio sound music bluetooth wireless portable speaker speakers',
-            'laptop': 'computer computers portable notebook work coding programming device technology',
-            'tablet': 'computer computers portable touchscreen mobile device technology ipad android',
-            'computer': 'laptop desktop workstation device technology',
-            'phone': 'mobile smartphone device portable communication tablet smartwatch technology',
-            'smartphone': 'phone mobile device portable communication tablet smartwatch technology android iphone',
-            'mobile': 'phone smartphone device portable communication tablet technology',
-            'watch': 'smartwatch wearable fitness tracker device technology',
-            'smartwatch': 'watch wearable fitness tracker device mobile phone technology',
-            'camera': 'photo photography video capture image technology device',
+        # Add semantic keywords
+        for keyword, synonyms in SEMANTIC_KEYWORDS.items():
+            if keyword.lower() in product['name'].lower() or keyword.lower() in product['category'].lower():
+                doc += f" {synonyms}"
+        return doc
+
+    @staticmethod
+    def product_metadata(product: Dict[str, Any]) -> Dict[str, Any]:
+        """Filterable metadata stored next to a product embedding (simple types only)"""
+        return {
+            'name': product['name'] if product['name'] else "",
+            'category': product['category'] if product['category'] else "",
+            'price': float(product['price']) if product['price'] is not None else 0.0,
+            'stock': int(product['stock']) if product['stock'] is not None else 0,
+            # Facet fields, so filters can run inside the vector query
+            'rating': float(product.get('rating') or 0.0),
+            'deliveryTimeDays': int(product.get('deliveryTimeDays') or 0),
+            'discountPercentage': float(product.get('discountPercentage') or 0.0),
+            'returnEligible': bool(product.get('returnEligible'))
         }
+
+    @staticmethod
+    def facet_where(filters: Dict[str, Any] = None, min_stock: int = 0):
+        """Chroma `where` clause for a min stock plus FacetIndex-style filters (None if unfiltered)"""
+        conditions = []
+        if min_stock > 0:
+            conditions.append({"stock": {"$gte": min_stock}})
+        for field, bounds in (filters or {}).items():
+            if field == "returnEligible":
+                if bounds is not None:
+                    conditions.append({"returnEligible": bool(bounds)})
+                continue
+            low, high = bounds
+            if low is not None:
+                conditions.append({field: {"$gte": low}})
+            if high is not None:
+                conditions.append({field: {"$lte": high}})
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    @staticmethod
+    def content_hash(document: str) -> str:
+        return hashlib.sha1(document.encode("utf-8")).hexdigest()
+
+    def _sync_collection(self, collection, ids: List[str], documents: List[str],
+                         metadatas: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        Bring a collection in line with the given documents without re-embedding
+        unchanged ones. A content hash of each document is kept in its metadata:
+        new or edited documents are upserted (embedded), documents whose text is
+        unchanged but whose metadata differs only get a metadata update, and IDs
+        no longer present are deleted.
+        """
+        stored = {}
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=STORED_PAGE_SIZE, offset=offset)
+            stored.update(zip(page['ids'], page['metadatas'] or []))
+            if len(page['ids']) < STORED_PAGE_SIZE:
+                break
+            offset += STORED_PAGE_SIZE
+
+        embed_ids, embed_docs, embed_metas = [], [], []
+        update_ids, update_metas = [], []
+        for pid, doc, meta in zip(ids, documents, metadatas):
+            meta = dict(meta, content_hash=self.content_hash(doc))
+            previous = stored.get(pid)
+            if previous is None or previous.get('content_hash') != meta['content_hash']:
+                embed_ids.append(pid)
+                embed_docs.append(doc)
+                embed_metas.append(meta)
+            elif previous != meta:
+                update_ids.append(pid)
+                update_metas.append(meta)
+
+        current = set(ids)
+        removed = [pid for pid in stored if pid not in current]
+
+        for start in range(0, len(embed_ids), UPSERT_BATCH_SIZE):
+            end = start + UPSERT_BATCH_SIZE
+            collection.upsert(ids=embed_ids[start:end], documents=embed_docs[start:end], metadatas=embed_metas[start:end])
+        for start in range(0, len(update_ids), UPSERT_BATCH_SIZE):
+            end = start + UPSERT_BATCH_SIZE
+            collection.update(ids=update_ids[start:end], metadatas=update_metas[start:end])
+        for start in range(0, len(removed), UPSERT_BATCH_SIZE):
+            collection.delete(ids=removed[start:start + UPSERT_BATCH_SIZE])
+        collection.persist()
+
+        return {"changed": embed_ids, "updated": update_ids, "removed": removed}
+
+    def index_products(self, products: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        Incrementally index products in ChromaDB. Only new or edited products are
+        re-embedded; returns the changed/updated/removed product IDs.
+        """
+        if not products:
+            logger.info("No products to index.")
+            return {"changed": [], "updated": [], "removed": []}
         
+        logger.info("Indexing %d products into the vector store...", len(products))
+
+        ids = [str(product['id']) for product in products]  # Ensure ID is a string
+        documents = [self.product_document(product) for product in products]
+        metadatas = [self.product_metadata(product) for product in products]
+
+        try:
+            changes = self._sync_collection(self.collection, ids, documents, metadatas)
+            logger.info("Indexed products in the vector store: %d embedded, %d metadata-only, %d removed, %d unchanged.",
+                        len(changes['changed']), len(changes['updated']), len(changes['removed']),
+                        len(ids) - len(changes['changed']) - len(changes['updated']))
+            return changes
+        except Exception as e:
+            logger.error("Error indexing products in the vector store: %s", e)
+            return {"changed": [], "updated": [], "removed": []}
+
+    def update_product_metadata(self, products: List[Dict[str, Any]]):
+        """
+        Write current metadata (stock, price...) for existing products without
+        re-embedding them. The content hash is recomputed so a later incremental
+        index still sees the document as unchanged.
+        """
+        if not products:
+            return
+        ids, metadatas = [], []
         for product in products:
-            # Create rich document
-            doc = f"{product['name']} {product['name']} {product['description']} {product['category']}"
-            
-            # Add semantic keywords
-            for keyword, synonyms in semantic_keywords.items():
-                if keyword.lower() in product['name'].lower() or keyword.lower() in product['category'].lower():
-                    doc += f" {synonyms}"
-            
-            # Ensure ID is a string
-            pid = str(product['id'])
-            ids.append(pid)
-            documents.append(doc)
-            
-            # Prepare metadata (ensure simple types)
-            meta = {
-                'name': product['name'] if product['name'] else "",
-                'category': product['category'] if product['category'] else "",
-                'price': float(product['price']) if product['price'] is not None else 0.0,
-                'stock': int(product['stock']) if product['stock'] is not None else 0
-            }
-            metadatas.append(meta)
-
-        # Upsert into ChromaDB
+            ids.append(str(product['id']))
+            metadatas.append(dict(
+                self.product_metadata(product),
+                content_hash=self.content_hash(self.product_document(product))
+            ))
         try:
-            self.collection.upsert(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas
-            )
-            print(f"Successfully indexed {len(products)} products in ChromaDB.")
+            for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+                end = start + UPSERT_BATCH_SIZE
+                self.collection.update(ids=ids[start:end], metadatas=metadatas[start:end])
         except Exception as e:
-            print(f"Error indexing products in ChromaDB: {e}")
+            logger.error("Error updating product metadata in the vector store: %s", e)
+
+    def schedule_metadata_update(self, products: List[Dict[str, Any]]):
+        """
+        Queue a metadata refresh for products (e.g. after a stock change).
+        Bursts are coalesced: each product is written once per STOCK_SYNC_DELAY
+        window with whatever its values are at flush time.
+        """
+        with self._pending_lock:
+            for product in products:
+                self._pending_metadata[str(product['id'])] = product
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(STOCK_SYNC_DELAY, self.flush_metadata_updates)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush_metadata_updates(self):
+        """Write all queued metadata updates now"""
+        with self._pending_lock:
+            pending = list(self._pending_metadata.values())
+            self._pending_metadata = {}
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        self.update_product_metadata(pending)
 
-    def semantic_search(self, query: str, limit: int = 5, min_stock: int = 0) -> List[Dict[str, Any]]:
+    def persist(self):
+        """Write collections to disk (a no-op for backends that persist every write)"""
+        for collection in (self.collection, self.policy_collection, self.faq_collection):
+            collection.persist()
+
+    def get_product_embeddings(self, ids: List[str] = None):
+        """Stored product embeddings as (ids, embeddings), for offline similarity work"""
+        results = self.collection.get(ids=ids, include=["embeddings"])
+        embeddings = results.get('embeddings')
+        if embeddings is None:
+            embeddings = []
+        return results['ids'], embeddings
+
+    def semantic_search(self, query: str, limit: int = 5, min_stock: int = 0,
+                        filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
         Perform semantic search using ChromaDB
         """
         if not query or not query.strip():
             return []
+        return self.semantic_search_batch([query], limit=limit, min_stock=min_stock, filters=filters)[0]
+
+    def semantic_search_batch(self, queries: List[str], limit: int = 5, min_stock: int = 0,
+                              filters: Dict[str, Any] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Semantic search for several queries at once: the queries are embedded in
+        one model call (cache misses only) and sent to ChromaDB as one query.
+        Returns one hit list per input query, in order.
+        """
+        hits_per_query = [[] for _ in queries]
+        active = [i for i, q in enumerate(queries) if q and q.strip()]
+        if not active:
+            return hits_per_query
         
         try:
-            # Prepare where clause
-            where_clause = {}
-            if min_stock > 0:
-                where_clause["stock"] = {"$gte": min_stock}
-
-            # Query the collection
-            # If where_clause is empty, pass None to avoid warnings/errors in some versions
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=limit,
-                where=where_clause if where_clause else None
-            )
-            
-            if not results['ids'] or len(results['ids'][0]) == 0:
-                return []
+            embeddings = self.embed_queries([queries[i] for i in active])
+            # Stock and facet filters run inside the vector query
+            with span("vector_query"):
+                results = self.collection.query(
+                    query_embeddings=embeddings,
+                    n_results=limit,
+                    where=self.facet_where(filters, min_stock)
+                )
 
-            hits = []
-            ids = results['ids'][0]
-            distances = results['distances'][0]
-            metadatas = results['metadatas'][0]
-            
-            for i in range(len(ids)):
-                dist = distances[i]
-                meta = metadatas[i]
-                
-                # Convert cosine distance to similarity score
-                # distance ranges from 0 (identical) to 2 (opposite).
-                # Similarity = 1 - distance. 
-                # If distance is small (< 1), similarity is positive.
-                similarity = 1.0 - dist
-                
-                hits.append({
-                    'id': ids[i],
-                    'similarity_score': similarity,
-                    'name': meta.get('name'),
-                    'category': meta.get('category'),
-                    'price': meta.get('price'),
-                    'stock': meta.get('stock')
-                })
-            
-            # Sort by similarity desc
-            hits.sort(key=lambda x: x['similarity_score'], reverse=True)
-            
-            return hits[:limit]
+            for row, i in enumerate(active):
+                hits_per_query[i] = self._parse_product_hits(results, row)[:limit]
+            return hits_per_query
 
         except Exception as e:
-            print(f"ChromaDB search failed: {e}")
+            logger.warning("Vector search failed: %s", e)
+            return hits_per_query
+
+    @staticmethod
+    def _parse_product_hits(results, row: int) -> List[Dict[str, Any]]:
+        if not results['ids'] or len(results['ids'][row]) == 0:
             return []
-    def index_policies(self, policies: Dict[str, str]):
-        """Index all policies using ChromaDB"""
-        if not policies:
-            print("No policies to index.")
-            return
+
+        hits = []
+        ids = results['ids'][row]
+        distances = results['distances'][row]
+        metadatas = results['metadatas'][row]
+        
+        for i in range(len(ids)):
+            dist = distances[i]
+            meta = metadatas[i]
             
-        print(f"Indexing {len(policies)} policy sections with ChromaDB...")
+            # Convert cosine distance to similarity score
+            # distance ranges from 0 (identical) to 2 (opposite).
+            # Similarity = 1 - distance. 
+            # If distance is small (< 1), similarity is positive.
+            similarity = 1.0 - dist
+            
+            hits.append({
+                'id': ids[i],
+                'similarity_score': similarity,
+                'name': meta.get('name'),
+                'category': meta.get('category'),
+                'price': meta.get('price'),
+                'stock': meta.get('stock')
+            })
+        
+        # Sort by similarity desc
+        hits.sort(key=lambda x: x['similarity_score'], reverse=True)
+        return hits
+
+    def index_policies(self, chunks: List[Dict[str, str]]) -> Dict[str, List[str]]:
+        """Incrementally index policy passages in ChromaDB (unchanged passages are not re-embedded)"""
+        if not chunks:
+            logger.info("No policies to index.")
+            return {"changed": [], "updated": [], "removed": []}
+            
+        logger.info("Indexing %d policy passages into the vector store...", len(chunks))
         
         ids = []
         documents = []
         metadatas = []
         
-        for title, content in policies.items():
-            ids.append(title)
-            # Combine title and content for better semantic matching
-            documents.append(f"{title}\n{content}")
-            metadatas.append({"title": title})
+        for chunk in chunks:
+            ids.append(chunk["id"])
+            # Title as context so short passages still match the topic of their section
+            documents.append(f"{chunk['title']}\n{chunk['text']}")
+            metadatas.append({"title": chunk["title"], "section": chunk["section"]})
             
         try:
-            self.policy_collection.upsert(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas
-            )
-            print(f"Successfully indexed {len(policies)} policy sections in ChromaDB.")
+            changes = self._sync_collection(self.policy_collection, ids, documents, metadatas)
+            logger.info("Indexed policy passages in the vector store: %d embedded, %d removed.",
+                        len(changes['changed']), len(changes['removed']))
+            return changes
+        except Exception as e:
+            logger.error("Error indexing policies in the vector store: %s", e)
+            return {"changed": [], "updated": [], "removed": []}
+
+    def index_faqs(self, faqs: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """Incrementally index product FAQs in ChromaDB (unchanged entries are not re-embedded)"""
+        if not faqs:
+            logger.info("No FAQs to index.")
+            return {"changed": [], "updated": [], "removed": []}
+
+        logger.info("Indexing %d FAQs into the vector store...", len(faqs))
+        ids = [faq["id"] for faq in faqs]
+        # Questions carry most of the signal; the answer helps paraphrased questions
+        documents = [f"{faq['question']}\n{faq['answer']}" for faq in faqs]
+        metadatas = [{"productId": faq["productId"]} for faq in faqs]
+
+        try:
+            changes = self._sync_collection(self.faq_collection, ids, documents, metadatas)
+            logger.info("Indexed FAQs in the vector store: %d embedded, %d removed.",
+                        len(changes['changed']), len(changes['removed']))
+            return changes
+        except Exception as e:
+            logger.error("Error indexing FAQs in the vector store: %s", e)
+            return {"changed": [], "updated": [], "removed": []}
+
+    def search_faqs(self, query: str, product_id: str = None, limit: int = 3) -> List[Dict[str, Any]]:
+        """Semantic search over FAQs, optionally restricted to one product. Returns [{id, similarity_score}]"""
+        if not query or not query.strip():
+            return []
+
+        try:
+            embedding = self.embed_query(query)
+            with span("faq_vector_query"):
+                results = self.faq_collection.query(
+                    query_embeddings=[embedding],
+                    n_results=limit,
+                    where={"productId": product_id} if product_id else None
+                )
+            if not results['ids'] or len(results['ids'][0]) == 0:
+                return []
+            return [
+                {'id': fid, 'similarity_score': 1.0 - dist}
+                for fid, dist in zip(results['ids'][0], results['distances'][0])
+            ]
         except Exception as e:
-            print(f"Error indexing policies in ChromaDB: {e}")
+            logger.warning("Vector FAQ search failed: %s", e)
+            return []
 
     def search_policies(self, query: str, limit: int = 3) -> List[Dict[str, Any]]:
         """Perform semantic search on policies"""
@@ -188,10 +438,12 @@ class VectorSearch:
             return []
             
         try:
-            results = self.policy_collection.query(
-                query_texts=[query],
-                n_results=limit
-            )
+            embedding = self.embed_query(query)
+            with span("policy_vector_query"):
+                results = self.policy_collection.query(
+                    query_embeddings=[embedding],
+                    n_results=limit
+                )
             
             if not results['ids'] or len(results['ids'][0]) == 0:
                 return []
@@ -205,13 +457,14 @@ class VectorSearch:
             for i in range(len(ids)):
                 # Similarity = 1 - distance (for cosine)
                 similarity = 1.0 - distances[i]
+                title = metadatas[i].get('title', ids[i])
                 hits.append({
-                    'title': ids[i],
-                    'content': docs[i],
+                    'title': title,
+                    'content': docs[i][len(title) + 1:] if docs[i].startswith(title + "\n") else docs[i],
                     'similarity_score': similarity
                 })
                 
             return hits
         except Exception as e:
-            print(f"ChromaDB policy search failed: {e}")
+            logger.warning("Vector policy search failed: %s", e)
             return []
@@ -0,0 +1,313 @@
+"""
+Backend benchmark suite: load time, microbenchmarks and an in-process HTTP
+load test, run against seeded synthetic data (see synthetic_data.py).
+
+Each scale runs in its own process so load time and peak RSS are measured
+from a cold start. Results go to JSON; pass an earlier file as --compare to
+see the change per benchmark.
+
+    python benchmarks/bench_backend.py --scale 1k --scale 100k --json bench.json
+    python benchmarks/bench_backend.py --scale 100k --compare bench.json
+
+Semantic search needs an embedding model; --vectors picks "none" (keyword
+only, the default), "hash" (deterministic stand-in vectors, no download)
+or "model" (the real MiniLM model, as in production).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from synthetic_data import SCALES, generate_scale
+
+DATA_FILES = ("product_catalog.json", "order_database.json", "product_faqs.json", "Company_policies.md")
+
+SEARCH_QUERIES = [
+    ("headset", None), ("wireless earbuds", None), ("yoga mat", None), ("lip balm", None),
+    ("nova speaker pro", None), ("cookware set", "Home & Kitchen"), ("running shoes", "Sports & Fitness"),
+    (None, "Electronics"), ("something for my morning run", None), ("gift for a coffee lover", None),
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies_ms, elapsed_s=None):
+    stats = {
+        "calls": len(latencies_ms),
+        "mean_ms": round(statistics.mean(latencies_ms), 4),
+        "p50_ms": round(statistics.median(latencies_ms), 4),
+        "p95_ms": round(percentile(latencies_ms, 95), 4),
+        "p99_ms": round(percentile(latencies_ms, 99), 4),
+    }
+    stats["ops_per_s"] = round(len(latencies_ms) / (elapsed_s or sum(latencies_ms) / 1000), 1)
+    return stats
+
+
+def timed(fn, calls):
+    """Run fn(i) for i in range(calls); per-call latency stats"""
+    latencies = []
+    for i in range(calls):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return summarize(latencies)
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_microbenchmarks(data, engine, calls, rng):
+    products = data.products
+    order_ids = [order.id for order in data.orders]
+    product_ids = [p["id"] for p in products]
+    results = {}
+
+    results["search_products"] = timed(lambda i: engine.search_products(*SEARCH_QUERIES[i % len(SEARCH_QUERIES)]), calls)
+    related_ids = [rng.choice(product_ids) for _ in range(calls)]
+    results["get_related_products"] = timed(lambda i: engine.get_related_products(related_ids[i]), calls)
+
+    exact_ids = [rng.choice(order_ids) for _ in range(calls)]
+    results["get_order_exact"] = timed(lambda i: data.get_order(exact_ids[i]), calls)
+    # What a caller says out loud: the trailing digits, or the id in lower case
+    partial_ids = [oid.lstrip("O").lstrip("0")[-3:] if i % 2 else oid.lower() for i, oid in
+                   enumerate(rng.choice(order_ids) for _ in range(calls))]
+    results["get_order_partial"] = timed(lambda i: data.get_order(partial_ids[i]), calls)
+
+    in_stock = [pid for pid in product_ids if data.get_product(pid)["stock"] > 0]
+    baskets = [[{"productId": pid, "quantity": 1} for pid in rng.sample(in_stock, rng.randint(1, 3))]
+               for _ in range(calls)]
+    results["create_order"] = timed(lambda i: data.create_order("bench_user", baskets[i]), calls)
+    return results
+
+
+async def run_http_load(app, data, requests, concurrency, rng):
+    """Mixed read/write traffic through the ASGI app, `concurrency` requests in flight"""
+    import httpx
+
+    product_ids = [p["id"] for p in data.products]
+    order_ids = [order.id for order in data.orders]
+    customers = list(data.orders_by_customer)
+
+    def next_request():
+        roll = rng.random()
+        if roll < 0.35:
+            q, cat = rng.choice(SEARCH_QUERIES)
+            return "search", "GET", "/api/products/search", {k: v for k, v in (("q", q), ("cat", cat)) if v}, None
+        if roll < 0.55:
+            return "product", "GET", f"/api/products/{rng.choice(product_ids)}", None, None
+        if roll < 0.65:
+            return "related", "GET", f"/api/products/{rng.choice(product_ids)}/related", None, None
+        if roll < 0.72:
+            return "recommendations", "GET", "/api/products/recommendations", None, None
+        if roll < 0.82:
+            return "order", "GET", f"/api/orders/{rng.choice(order_ids)}", None, None
+        if roll < 0.90:
+            return "customer_orders", "GET", "/api/orders", {"userId": rng.choice(customers)}, None
+        if roll < 0.95:
+            return "faq_search", "GET", "/api/faqs/search", {"q": "battery life", "productId": rng.choice(product_ids)}, None
+        item = {"productId": rng.choice(product_ids), "quantity": 1}
+        return "create_order", "POST", "/api/orders", None, {"userId": "bench_user", "items": [item]}
+
+    plan = [next_request() for _ in range(requests)]
+    latencies, statuses = {}, {}
+    queue = iter(plan)
+
+    async def worker(client):
+        for name, method, url, params, body in queue:
+            start = time.perf_counter()
+            response = await client.request(method, url, params=params, json=body)
+            latencies.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            # ASGITransport calls the app directly, so a request that never blocks does
+            # not return to the event loop; a socket client would. Without this the
+            # other workers starve anything waiting on a thread (journal fsync, executor)
+            await asyncio.sleep(0)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    every = [ms for samples in latencies.values() for ms in samples]
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "statuses": statuses,
+        "overall": summarize(every, elapsed),
+        "endpoints": {name: summarize(samples) for name, samples in sorted(latencies.items())},
+    }
+
+
+def use_embeddings(data, mode, directory):
+    """Swap the vector store according to --vectors before loading"""
+    if mode == "none":
+        data.vectors_enabled = False
+    elif mode == "hash":
+        from bench_vector_engines import HashEmbedding
+        from vector_search import VectorSearch
+        data.vector_db = VectorSearch(directory, embedding_fn=HashEmbedding())
+
+
+def run_scale(args):
+    """Child process: benchmark one scale, write its results to args.out"""
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix=f"bench_{args.scale}_")
+    try:
+        _run_scale(args, rng, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run_scale(args, rng, workdir):
+    data_dir = os.path.join(workdir, "data")
+    if args.data_dir:
+        # Link the source files so the journal, snapshot and compactions of
+        # this run stay in the work directory and the data can be reused
+        os.makedirs(data_dir)
+        for name in DATA_FILES:
+            os.symlink(os.path.abspath(os.path.join(args.data_dir, name)), os.path.join(data_dir, name))
+    else:
+        started = time.perf_counter()
+        generate_scale(data_dir, args.scale, args.seed)
+        print(f"[{args.scale}] generated data in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    # main.py builds its DataLoader at import time, from these
+    os.environ["DATA_DIR"] = data_dir
+    os.environ["VECTOR_CACHE_DIR"] = os.path.join(workdir, "vector_cache")
+    os.environ.setdefault("LOG_LEVEL", "INFO" if args.verbose else "WARNING")
+    started = time.perf_counter()
+    import main
+    import_s = time.perf_counter() - started
+
+    data, engine = main.data, main.search_engine
+    use_embeddings(data, args.vectors, os.environ["VECTOR_CACHE_DIR"])
+    rss_before = peak_rss_mb()
+    # As at server startup: returns once keyword search can serve (readiness),
+    # the vector side continues on a thread
+    started = time.perf_counter()
+    data.load_all(background_vectors=True)
+    ready_s = time.perf_counter() - started
+    data.vectors_ready.wait()
+    result = {"import_main_s": round(import_s, 3), "ready_s": round(ready_s, 3),
+              "load_all_s": round(time.perf_counter() - started, 3),
+              "rss_before_load_mb": rss_before, "peak_rss_after_load_mb": peak_rss_mb(),
+              "products": len(data.products), "orders": len(data.orders), "faqs": len(data.faqs)}
+    print(f"[{args.scale}] ready {result['ready_s']}s, load_all {result['load_all_s']}s", file=sys.stderr)
+
+    result["micro"] = run_microbenchmarks(data, engine, args.calls, rng)
+    print(f"[{args.scale}] microbenchmarks done", file=sys.stderr)
+    if args.http_requests:
+        result["http"] = asyncio.run(run_http_load(main.app, data, args.http_requests, args.concurrency, rng))
+        print(f"[{args.scale}] http load test done", file=sys.stderr)
+
+    engine.shutdown()
+    data.shutdown()
+    result["peak_rss_mb"] = peak_rss_mb()
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    for scale, result in report["scales"].items():
+        print(f"\n=== {scale}: {result['products']} products, {result['orders']} orders, {result['faqs']} FAQs ===")
+        print(f"import {result.get('import_main_s')}s, ready {result.get('ready_s')}s, "
+              f"load_all {result['load_all_s']}s, peak RSS {result['peak_rss_mb']} MiB")
+        rows = [(name, stats) for name, stats in result["micro"].items()]
+        rows += [(f"http {name}", stats) for name, stats in result.get("http", {}).get("endpoints", {}).items()]
+        if "http" in result:
+            rows.append(("http overall", result["http"]["overall"]))
+        base = (baseline or {}).get("scales", {}).get(scale)
+        for name, stats in rows:
+            line = f"  {name:<26} p50 {stats['p50_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms  {stats['ops_per_s']:>10} ops/s"
+            if base:
+                if name.startswith("http "):
+                    section = base.get("http", {})
+                    before = section.get("overall") if name == "http overall" else section.get("endpoints", {}).get(name[5:])
+                else:
+                    before = base["micro"].get(name)
+                if before and before["p50_ms"]:
+                    line += f"  p50 {(stats['p50_ms'] / before['p50_ms'] - 1) * 100:+.1f}% vs {baseline.get('commit')}"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", action="append", choices=SCALES, help="repeatable (default: 1k)")
+    parser.add_argument("--vectors", choices=("none", "hash", "model"), default="none")
+    parser.add_argument("--calls", type=int, default=200, help="calls per microbenchmark")
+    parser.add_argument("--http-requests", type=int, default=2000, help="0 skips the HTTP load test")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", help="reuse data written by synthetic_data.py (single scale only)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="earlier --json output to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show backend output")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.scale = args.scale[0]
+        run_scale(args)
+        return
+
+    scales = args.scale or ["1k"]
+    if args.data_dir and len(scales) > 1:
+        parser.error("--data-dir can only be used with a single --scale")
+    report = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": platform.python_version(), "platform": platform.platform(),
+              "config": {k: v for k, v in vars(args).items() if k not in ("child", "out", "json", "compare", "verbose")},
+              "scales": {}}
+    for scale in scales:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            out = tmp.name
+        command = [sys.executable, os.path.abspath(__file__), "--child", "--scale", scale, "--out", out,
+                   *(["--verbose"] if args.verbose else []),
+                   "--vectors", args.vectors, "--calls", str(args.calls), "--seed", str(args.seed),
+                   "--http-requests", str(args.http_requests), "--concurrency", str(args.concurrency)]
+        if args.data_dir:
+            command += ["--data-dir", args.data_dir]
+        subprocess.run(command, check=True, cwd=os.path.join(ROOT, "backend"),
+                       stdout=None if args.verbose else subprocess.DEVNULL)
+        with open(out, encoding="utf-8") as f:
+            report["scales"][scale] = json.load(f)
+        os.unlink(out)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
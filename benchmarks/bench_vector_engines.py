@@ -0,0 +1,133 @@
+"""
+Compare the vector engines behind VectorSearch (ChromaDB vs in-process NumPy).
+
+Uses synthetic products and a deterministic stand-in embedding function, so
+no model download is needed and both engines index identical vectors.
+
+    python benchmarks/bench_vector_engines.py --products 20000 --queries 300
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from chromadb.utils.embedding_functions import EmbeddingFunction
+from vector_backends import create_backend
+
+CATEGORIES = ["Electronics", "Home", "Clothing", "Sports", "Beauty", "Toys", "Books", "Garden"]
+
+
+class HashEmbedding(EmbeddingFunction):
+    """Deterministic pseudo-embeddings: the same text always maps to the same vector"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def __call__(self, input):
+        return [
+            np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(self.dim).astype(np.float32)
+            for text in input
+        ]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def bench_engine(name, products, queries, embedding_fn, limit):
+    with tempfile.TemporaryDirectory() as directory:
+        collection = create_backend(name, directory).collection("product_search", embedding_fn)
+
+        start = time.perf_counter()
+        for i in range(0, len(products), 1000):
+            batch = products[i:i + 1000]
+            collection.upsert(
+                ids=[p["id"] for p in batch],
+                documents=[p["document"] for p in batch],
+                metadatas=[{"category": p["category"], "stock": p["stock"]} for p in batch],
+            )
+        collection.persist()
+        index_s = time.perf_counter() - start
+
+        query_vectors = embedding_fn(queries)
+        result = {"engine": name, "index_s": round(index_s, 3)}
+        hits = {}
+        for label, where in [
+            ("unfiltered", None),
+            ("in_stock", {"stock": {"$gte": 1}}),
+            ("category_in_stock", {"$and": [{"category": "Electronics"}, {"stock": {"$gte": 1}}]}),
+        ]:
+            latencies, hits[label] = [], []
+            for vector in query_vectors:
+                start = time.perf_counter()
+                found = collection.query(query_embeddings=[vector], n_results=limit, where=where)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits[label].append(found["ids"][0])
+            result[label] = {
+                "p50_ms": round(statistics.median(latencies), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+            }
+
+        start = time.perf_counter()
+        collection.query(query_embeddings=query_vectors, n_results=limit, where={"stock": {"$gte": 1}})
+        result["batch_in_stock_ms_per_query"] = round((time.perf_counter() - start) * 1000 / len(queries), 3)
+        return result, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--engines", default="chroma,numpy")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    products = [
+        {"id": f"P{i:07d}", "document": f"product {i}",
+         "category": CATEGORIES[rng.integers(len(CATEGORIES))], "stock": int(rng.integers(0, 5))}
+        for i in range(args.products)
+    ]
+    queries = [f"query {i}" for i in range(args.queries)]
+    embedding_fn = HashEmbedding(args.dim)
+
+    results, all_hits = [], {}
+    for engine in args.engines.split(","):
+        result, all_hits[engine] = bench_engine(engine, products, queries, embedding_fn, args.limit)
+        results.append(result)
+
+    # NumPy search is exact, so it doubles as ground truth for the HNSW recall
+    if "numpy" in all_hits:
+        for result in results:
+            for label, exact in all_hits["numpy"].items():
+                found = all_hits[result["engine"]][label]
+                overlap = [len(set(a) & set(b)) / max(1, len(b)) for a, b in zip(found, exact)]
+                result[label]["recall"] = round(statistics.mean(overlap), 4)
+
+    print(f"\n{args.products} products, {args.queries} queries, top {args.limit}, dim {args.dim}")
+    for result in results:
+        print(f"\n[{result['engine']}] index {result['index_s']}s, "
+              f"batched in-stock query {result['batch_in_stock_ms_per_query']} ms/query")
+        for label in ("unfiltered", "in_stock", "category_in_stock"):
+            stats = result[label]
+            recall = f", recall {stats['recall']}" if "recall" in stats else ""
+            print(f"  {label:<18} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms{recall}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Replay a recorded request trace against the backend, for capacity planning
+with the real traffic mix of voice sessions.
+
+Record a trace by starting the backend with TRACE_FILE set, then replay it
+against the in-process ASGI app (on a scratch copy of the data, so orders
+placed during the replay do not touch Files/) or a running server:
+
+    TRACE_FILE=/tmp/trace.jsonl python backend/main.py
+    python benchmarks/replay_trace.py /tmp/trace.jsonl --speed 10 --concurrency 64
+    python benchmarks/replay_trace.py /tmp/trace.jsonl --copies 20 --url http://localhost:8000
+
+Each session's requests are sent in recorded order, one after another (a
+tool call waits for the previous one), at the recorded gaps divided by
+--speed. --copies multiplies the number of sessions. Reports throughput,
+latency percentiles per endpoint and how far requests fell behind the
+schedule (a growing lag means the backend is saturated).
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from bench_backend import DATA_FILES, summarize, use_embeddings
+from request_trace import read_trace
+
+_ID_SEGMENT = re.compile(r"/[^/]*\d[^/]*")
+
+
+def endpoint_of(record):
+    """"GET /api/products/{id}/related" style key: path segments with digits are ids"""
+    return f"{record['method']} {_ID_SEGMENT.sub('/{id}', record['path'])}"
+
+
+def load_sessions(path, copies):
+    """Replayable records grouped per session, with offsets (s) from the first request"""
+    records = [r for r in read_trace(path) if not (isinstance(r.get("body"), dict) and
+                                                   (r["body"].get("truncated") or r["body"].get("unparsed")))]
+    records.sort(key=lambda r: r["ts"])
+    if not records:
+        return [], 0.0
+    start = records[0]["ts"]
+    sessions = {}
+    for record in records:
+        sessions.setdefault(record.get("session", ""), []).append(dict(record, offset=record["ts"] - start))
+    replay = [requests for _ in range(copies) for requests in sessions.values()]
+    return replay, records[-1]["ts"] - start
+
+
+async def replay(client, sessions, speed, concurrency):
+    in_flight = asyncio.Semaphore(concurrency)
+    latencies, lags, statuses, errors = {}, [], {}, []
+    started = time.perf_counter()
+
+    async def run_session(requests):
+        for record in requests:
+            if speed > 0:
+                delay = started + record["offset"] / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            async with in_flight:
+                sent = time.perf_counter()
+                if speed > 0:
+                    lags.append(max(0.0, sent - started - record["offset"] / speed) * 1000)
+                url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+                try:
+                    response = await client.request(record["method"], url, json=record.get("body"))
+                    statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+                except Exception as e:
+                    errors.append(repr(e))
+                    continue
+                latencies.setdefault(endpoint_of(record), []).append((time.perf_counter() - sent) * 1000)
+
+    await asyncio.gather(*(run_session(requests) for requests in sessions))
+    elapsed = time.perf_counter() - started
+
+    every = [ms for samples in latencies.values() for ms in samples]
+    result = {
+        "requests": sum(len(requests) for requests in sessions),
+        "sessions": len(sessions),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(every) / elapsed, 1) if elapsed else None,
+        "statuses": statuses,
+        "errors": len(errors),
+        "overall": summarize(every, elapsed) if every else None,
+        "endpoints": {name: summarize(samples) for name, samples in sorted(latencies.items())},
+    }
+    if lags:
+        result["schedule_lag"] = {"p50_ms": round(sorted(lags)[len(lags) // 2], 3),
+                                  "p95_ms": round(sorted(lags)[int(len(lags) * 0.95)], 3),
+                                  "max_ms": round(max(lags), 3)}
+    return result
+
+
+def prepare_app(args, workdir):
+    """Load the backend in-process on a scratch copy of the data directory"""
+    data_dir = os.path.join(workdir, "data")
+    os.makedirs(data_dir)
+    source = os.path.abspath(args.data_dir)
+    for name in DATA_FILES:
+        os.symlink(os.path.join(source, name), os.path.join(data_dir, name))
+    journal = os.path.join(source, "order_journal.jsonl")
+    if os.path.exists(journal):
+        # Orders placed since the last compaction; copied because the replay appends to it
+        shutil.copy(journal, data_dir)
+
+    os.environ["DATA_DIR"] = data_dir
+    os.environ["VECTOR_CACHE_DIR"] = os.path.join(workdir, "vector_cache")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.pop("TRACE_FILE", None)
+    import main
+
+    use_embeddings(main.data, args.vectors, os.environ["VECTOR_CACHE_DIR"])
+    main.data.load_all()
+    return main
+
+
+async def run(args):
+    import httpx
+
+    sessions, span_s = load_sessions(args.trace, args.copies)
+    if not sessions:
+        sys.exit(f"No replayable requests in {args.trace}")
+    total = sum(len(requests) for requests in sessions)
+    offered = total / (span_s / args.speed) if args.speed > 0 and span_s > 0 else None
+    speed = f"{args.speed:g}x" if args.speed else "max"
+    print(f"Replaying {total} requests from {len(sessions)} sessions "
+          f"(trace spans {span_s:.1f}s, speed {speed}, concurrency {args.concurrency})", file=sys.stderr)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+            result = await replay(client, sessions, args.speed, args.concurrency)
+        return dict(result, offered_rps=offered and round(offered, 1))
+
+    workdir = tempfile.mkdtemp(prefix="replay_")
+    try:
+        main = prepare_app(args, workdir)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=60) as client:
+            result = await replay(client, sessions, args.speed, args.concurrency)
+        main.search_engine.shutdown()
+        main.data.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return dict(result, offered_rps=offered and round(offered, 1))
+
+
+def print_report(result):
+    print(f"\n{result['requests']} requests, {result['sessions']} sessions in {result['elapsed_s']}s: "
+          f"{result['throughput_rps']} req/s (offered {result['offered_rps'] or 'max'}), "
+          f"statuses {result['statuses']}, errors {result['errors']}")
+    if "schedule_lag" in result:
+        lag = result["schedule_lag"]
+        print(f"schedule lag p50 {lag['p50_ms']} ms, p95 {lag['p95_ms']} ms, max {lag['max_ms']} ms")
+    rows = list(result["endpoints"].items())
+    if result["overall"]:
+        rows.append(("overall", result["overall"]))
+    for name, stats in rows:
+        print(f"  {name:<40} {stats['calls']:>7}  p50 {stats['p50_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms"
+              f"  p99 {stats['p99_ms']:>9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="JSON-lines trace written with TRACE_FILE")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression factor; 0 sends as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=64, help="maximum requests in flight")
+    parser.add_argument("--copies", type=int, default=1, help="replay every session this many times")
+    parser.add_argument("--url", help="replay against a running server instead of the in-process app")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "Files"), help="data for the in-process app")
+    parser.add_argument("--vectors", choices=("none", "hash", "model"), default="none")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(dict(result, config=vars(args)), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
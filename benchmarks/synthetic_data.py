@@ -0,0 +1,179 @@
+"""
+Seeded synthetic data in the same schema as Files/: product_catalog.json,
+order_database.json, product_faqs.json and Company_policies.md.
+
+The same seed and scale always produce byte-identical files, so benchmark
+runs on different commits measure the same data.
+
+    python benchmarks/synthetic_data.py --scale 100k --out /tmp/shop_100k
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import time
+
+# scale name -> (products, FAQs per product); orders are half the product count
+SCALES = {
+    "1k": (1_000, 6),
+    "100k": (100_000, 2),
+    "1m": (1_000_000, 1),
+}
+
+BRANDS = ["Luma", "Zenith", "Aero", "Nova", "Pulse", "Quanta", "Orion", "Echo", "Optima", "Vertex",
+          "Aura", "Haven", "Nourish", "Cascade", "Harmony", "Essence", "Bloom", "Glow", "Aroma", "Breeze",
+          "Nimbus", "Eclipse", "Aurora", "Dusk", "Apex", "Flex", "Core", "Momentum", "Orbit", "Summit"]
+VARIANTS = ["", " Pro", " Plus", " Max", " Mini", " Lite"]
+CATEGORIES = {
+    "Electronics": (["Monitor", "Headset", "Earbuds", "Speaker", "Smartwatch", "Laptop", "Drone", "Camera",
+                     "Tablet", "Soundbar", "Phone", "Keyboard"],
+                    ["Built to deliver dependable operation and user-friendly features in a compact form.",
+                     "Combining sleek design with practical features, this gadget is a versatile choice.",
+                     "Wireless connectivity and long battery life for work and entertainment."]),
+    "Clothing": (["Shirt", "Jeans", "Hoodie", "Sweater", "Coat", "Dress", "Skirt", "Denim Jacket", "T-Shirt"],
+                 ["A stylish addition to your wardrobe, offering both elegance and ease.",
+                  "A versatile garment designed for everyday wear with a flattering fit."]),
+    "Home & Kitchen": (["Lamp", "Blender", "Cooker", "Cookware Set", "Curtains", "Faucet", "Knife Set",
+                        "Mattress", "Vacuum Cleaner", "Kettle"],
+                       ["A practical addition to your household that enhances your living space.",
+                        "Durable materials and a thoughtful design for everyday cooking and cleaning."]),
+    "Beauty & Personal Care": (["Shampoo", "Lip Balm", "Foundation", "Face Wash", "Perfume", "Soap",
+                                "Deodorant", "Body Lotion"],
+                               ["Combines nourishing properties with a pleasant fragrance for daily care.",
+                                "Gentle on skin and suitable for everyday use."]),
+    "Sports & Fitness": (["Dumbbells", "Yoga Mat", "Treadmill", "Skateboard", "Exercise Ball", "Fitness Tracker",
+                          "Running Shoes", "Resistance Bands", "Water Bottle", "Backpack"],
+                         ["A reliable companion for training routines, suited for various fitness levels.",
+                          "Built for endurance and comfort, helping you stay motivated on your fitness journey."]),
+}
+ORDER_STATUSES = ["Cancelled", "Delivered", "Placed", "Out for Delivery", "Shipped", "Processing"]
+FAQ_TEMPLATES = [
+    ("How do I set up and use {name}?",
+     "Simply follow the included user manual to connect and turn on the device; it's designed for easy setup."),
+    ("What is the battery life or power requirement of {name}?",
+     "It offers up to {n} hours of battery life on a single charge and can also be powered via a standard outlet."),
+    ("Is {name} compatible with other devices such as smartphones or computers?",
+     "Yes, it connects via Bluetooth or standard ports and is compatible with most modern devices."),
+    ("What warranty does {name} have and is it durable?",
+     "It comes with a {n}-month limited warranty covering manufacturing defects and is built with durable materials."),
+    ("Can I return or replace {name} if there's an issue?",
+     "Yes, you can return or replace it within 30 days of delivery if unused and in original condition."),
+    ("How is {name} packaged and how long does delivery take?",
+     "It is securely packaged with protective materials, and delivery typically takes {days} days."),
+]
+POLICY_TOPICS = ["Return Window", "Refund Processing", "Order Cancellation", "Delivery Timelines",
+                 "Damaged Items", "Exchanges", "Warranty Claims", "Payment Methods"]
+
+
+def product_id(i: int) -> str:
+    return f"P{1001 + i}"
+
+
+def order_id(i: int) -> str:
+    return f"O{i + 1:04d}"
+
+
+def make_products(rng: random.Random, count: int):
+    names = list(CATEGORIES)
+    products = []
+    for i in range(count):
+        category = names[i % len(names)]
+        types, descriptions = CATEGORIES[category]
+        products.append({
+            "product_id": product_id(i),
+            "product_name": f"{rng.choice(BRANDS)} {rng.choice(types)}{rng.choice(VARIANTS)}",
+            "category": category,
+            "price": rng.randint(199, 60000),
+            "stock_available": 0 if rng.random() < 0.1 else rng.randint(1, 200),
+            "description": rng.choice(descriptions),
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "review_count": rng.randint(0, 5000),
+            "delivery_time_days": rng.randint(1, 14),
+            "return_eligible": rng.random() < 0.7,
+            "discount_percentage": rng.choice([0, 5, 10, 15, 18, 20, 25, 30, 40, 50]),
+        })
+    return products
+
+
+def make_orders(rng: random.Random, products, count: int):
+    customers = max(10, count // 4)
+    start = datetime.date(2025, 1, 1)
+    orders = []
+    for i in range(count):
+        items = []
+        for product in rng.sample(products, rng.randint(1, 3)):
+            items.append({"product_id": product["product_id"], "quantity": rng.randint(1, 3),
+                          "price_at_purchase": product["price"]})
+        orders.append({
+            "order_id": order_id(i),
+            "customer_id": f"C{rng.randrange(customers):04d}",
+            "order_status": rng.choice(ORDER_STATUSES),
+            "order_date": (start + datetime.timedelta(days=rng.randrange(400))).isoformat(),
+            "items": items,
+        })
+    return orders
+
+
+def make_faqs(rng: random.Random, products, per_product: int):
+    faqs = []
+    for product in products:
+        entries = []
+        for question, answer in FAQ_TEMPLATES[:per_product]:
+            values = {"name": product["product_name"], "n": rng.choice([6, 8, 12, 24]),
+                      "days": product["delivery_time_days"]}
+            entries.append({"question": question.format(**values), "answer": answer.format(**values)})
+        faqs.append({"product_id": product["product_id"], "product_name": product["product_name"], "faqs": entries})
+    return faqs
+
+
+def make_policies(rng: random.Random, sections: int) -> str:
+    parts = ["**Company Policy: Returns, Refunds, Cancellations & Delivery Timelines**"]
+    for n in range(sections):
+        topic = POLICY_TOPICS[n % len(POLICY_TOPICS)]
+        title = topic if n < len(POLICY_TOPICS) else f"{topic} ({n // len(POLICY_TOPICS) + 1})"
+        days = rng.choice([7, 10, 15, 30])
+        paragraphs = [
+            f"Customers may contact support about {topic.lower()} within {days} days of delivery. "
+            f"Requests are reviewed within {rng.randint(1, 5)} business days.",
+            f"-   **Condition:** Items must be unused and in their original packaging. "
+            f"Refunds are issued to the original payment method within {rng.randint(5, 10)} business days.",
+            f"Orders that have already shipped follow the {topic.lower()} process described above; "
+            f"personalized and final sale items are excluded.",
+        ]
+        parts.append(f"**{title}**\n\n" + "\n\n".join(paragraphs[:rng.randint(2, 3)]))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate(directory: str, products: int, faqs_per_product: int = 6, orders: int = None, seed: int = 42):
+    """Write a complete data directory (the files DataLoader reads) and return its counts"""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    catalog = make_products(rng, products)
+    order_list = make_orders(rng, catalog, orders if orders is not None else max(100, products // 2))
+    faqs = make_faqs(rng, catalog, faqs_per_product)
+
+    for name, payload in (("product_catalog.json", catalog), ("order_database.json", order_list),
+                          ("product_faqs.json", faqs)):
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+    with open(os.path.join(directory, "Company_policies.md"), "w", encoding="utf-8") as f:
+        f.write(make_policies(rng, len(POLICY_TOPICS) + products // 100_000))
+    return {"products": len(catalog), "orders": len(order_list), "faqs": len(catalog) * faqs_per_product}
+
+
+def generate_scale(directory: str, scale: str, seed: int = 42):
+    products, faqs_per_product = SCALES[scale]
+    return generate(directory, products, faqs_per_product, seed=seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--out", required=True, help="directory to write the data files to")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate_scale(args.out, args.scale, args.seed)
+    print(f"Wrote {counts} to {args.out} in {time.perf_counter() - started:.1f}s")
@@ -10,13 +10,26 @@ let SESSION_CART: Cart = { items: [], total: 0 };
 
 // --- PUBLIC ASYNC API SERVICE (The "Frontend-to-Backend" Bridge) ---
 
+export interface SearchFilters {
+    minPrice?: number;
+    maxPrice?: number;
+    minRating?: number;
+    maxDeliveryDays?: number;
+    minDiscount?: number;
+    returnEligible?: boolean;
+    sort?: 'relevance' | 'price_asc' | 'price_desc' | 'rating_desc' | 'delivery_asc' | 'discount_desc';
+}
+
 export const db = {
     // 1. PRODUCT CATALOG API
-    searchProducts: async (query?: string, category?: string): Promise<Product[]> => {
+    searchProducts: async (query?: string, category?: string, filters: SearchFilters = {}): Promise<Product[]> => {
         try {
             const params = new URLSearchParams();
             if (query) params.append("q", query);
             if (category) params.append("cat", category);
+            for (const [key, value] of Object.entries(filters)) {
+                if (value !== undefined && value !== null) params.append(key, String(value));
+            }
 
             const res = await fetch(`${API_BASE_URL}/products/search?${params.toString()}`);
             if (!res.ok) throw new Error("Search failed");
@@ -38,6 +51,27 @@ export const db = {
         }
     },
 
+    getProductsByIds: async (ids: string[]): Promise<Product[]> => {
+        try {
+            // One round-trip per 50 products (compare, cart refresh); the backend caps a batch at 50 ids
+            const products: Product[] = [];
+            for (let i = 0; i < ids.length; i += 50) {
+                const res = await fetch(`${API_BASE_URL}/products/batch`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ ids: ids.slice(i, i + 50) })
+                });
+                if (!res.ok) return [];
+                const data = await res.json();
+                products.push(...data.products);
+            }
+            return products;
+        } catch (e) {
+            console.error("API Error:", e);
+            return [];
+        }
+    },
+
     getRelatedProducts: async (productId: string): Promise<Product[]> => {
         try {
             const res = await fetch(`${API_BASE_URL}/products/${productId}/related`);
@@ -65,10 +99,23 @@ export const db = {
         }
     },
 
+    searchFaqs: async (question: string, productId?: string, k: number = 3): Promise<FAQ[]> => {
+        try {
+            const params = new URLSearchParams({ q: question, k: String(k) });
+            if (productId) params.set('productId', productId);
+            const res = await fetch(`${API_BASE_URL}/faqs/search?${params}`);
+            if (!res.ok) return [];
+            return await res.json();
+        } catch (e) {
+            return [];
+        }
+    },
+
     // 2. ORDER MANAGEMENT API
     getOrders: async (customerId: string): Promise<Order[]> => {
         try {
             const res = await fetch(`${API_BASE_URL}/orders?userId=${customerId}`);
+            if (!res.ok) return [];
             return await res.json();
         } catch (e) {
             return [];
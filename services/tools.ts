@@ -1,5 +1,5 @@
 import { Tool, Type } from '@google/genai';
-import { db } from './mockData';
+import { db, SearchFilters } from './mockData';
 import { AppState } from '../types';
 
 export const TOOLS: Tool[] = [{
@@ -11,7 +11,17 @@ export const TOOLS: Tool[] = [{
         type: Type.OBJECT,
         properties: {
           query: { type: Type.STRING, description: 'Search term (product name, category, or feature)' },
-          category: { type: Type.STRING, description: 'Optional category filter' }
+          category: { type: Type.STRING, description: 'Optional category filter' },
+          minPrice: { type: Type.NUMBER, description: 'Optional minimum price' },
+          maxPrice: { type: Type.NUMBER, description: 'Optional maximum price (e.g. "under 5000")' },
+          minRating: { type: Type.NUMBER, description: 'Optional minimum rating (0-5)' },
+          maxDeliveryDays: { type: Type.NUMBER, description: 'Optional maximum delivery time in days' },
+          minDiscount: { type: Type.NUMBER, description: 'Optional minimum discount percentage' },
+          returnEligible: { type: Type.BOOLEAN, description: 'Only products that can be returned' },
+          sort: {
+            type: Type.STRING,
+            description: 'Result order: relevance (default), price_asc, price_desc, rating_desc, delivery_asc or discount_desc'
+          }
         }
       }
     },
@@ -26,6 +36,18 @@ export const TOOLS: Tool[] = [{
         required: ['productId']
       }
     },
+    {
+      name: 'ask_product_faq',
+      description: 'Answer a specific question about a product (battery life, warranty, compatibility, setup) from the product FAQs. Returns only the most relevant answers.',
+      parameters: {
+        type: Type.OBJECT,
+        properties: {
+          question: { type: Type.STRING, description: 'The customer question in natural language' },
+          productId: { type: Type.STRING, description: 'Optional product ID to restrict the answers to' }
+        },
+        required: ['question']
+      }
+    },
     {
       name: 'compare_products',
       description: 'Compare 2-4 products side-by-side. Use this when the user wants to choose between specific items or asks for a comparison.',
@@ -134,7 +156,15 @@ export const executeTool = async (name: string, args: any, updateState: (u: Part
   try {
     switch (name) {
       case 'search_products': {
-        const products = await db.searchProducts(args.query as string, args.category as string);
+        const products = await db.searchProducts(args.query as string, args.category as string, {
+          minPrice: args.minPrice as number | undefined,
+          maxPrice: args.maxPrice as number | undefined,
+          minRating: args.minRating as number | undefined,
+          maxDeliveryDays: args.maxDeliveryDays as number | undefined,
+          minDiscount: args.minDiscount as number | undefined,
+          returnEligible: args.returnEligible as boolean | undefined,
+          sort: args.sort as SearchFilters['sort'],
+        });
         // Always switch to PRODUCT_LIST view to show user the results
         updateState({ mode: 'PRODUCT_LIST', products });
 
@@ -162,13 +192,14 @@ export const executeTool = async (name: string, args: any, updateState: (u: Part
         }
         break;
       }
+      case 'ask_product_faq': {
+        const faqs = await db.searchFaqs(args.question as string, args.productId as string | undefined);
+        result = faqs.length ? { faqs } : { error: 'No matching FAQ found.' };
+        break;
+      }
       case 'compare_products': {
         const ids = args.productIds as string[];
-        const products = [];
-        for (const id of ids) {
-          const p = await db.getProductById(id);
-          if (p) products.push(p);
-        }
+        const products = await db.getProductsByIds(ids);
 
         if (products.length < 2) {
           result = { error: 'Need at least 2 valid products to compare.' };
@@ -0,0 +1,31 @@
+import os
+import shutil
+import sys
+import tempfile
+sys.path.insert(0, 'backend')
+
+# Work on a copy of the data so the real files are not modified
+data_dir = tempfile.mkdtemp()
+for name in os.listdir('Files'):
+    shutil.copy(os.path.join('Files', name), data_dir)
+os.environ["DATA_DIR"] = data_dir
+os.environ["VECTOR_CACHE_DIR"] = os.path.join(data_dir, 'vector_cache')
+
+import main
+from fastapi.testclient import TestClient
+
+limit = main.BATCH_MAX_ITEMS
+with TestClient(main.app) as client:
+    main.data.ready.wait(60)
+    print(f"\n=== Batch requests are capped at {limit} items ===")
+    at_limit = client.post('/api/products/batch', json={'ids': [f'P{1001 + i}' for i in range(limit)]})
+    over = client.post('/api/products/batch', json={'ids': [f'P{1001 + i}' for i in range(limit + 1)]})
+    print(f"products/batch: {limit} ids -> {at_limit.status_code}, {limit + 1} ids -> {over.status_code}")
+
+    queries = [{'q': 'monitor'}] * limit
+    at_limit = client.post('/api/products/search/batch', json={'queries': queries})
+    over = client.post('/api/products/search/batch', json={'queries': queries + [{'q': 'kettle'}]})
+    print(f"search/batch: {limit} queries -> {at_limit.status_code}, {limit + 1} queries -> {over.status_code}")
+    print(f"422 detail: {over.json()['detail'][0]['msg']}")
+
+shutil.rmtree(data_dir, ignore_errors=True)
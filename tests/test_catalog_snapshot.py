@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.insert(0, 'backend')
+
+import data_loader
+from catalog_snapshot import load_catalog
+from catalog_state import CatalogState
+from data_loader import DataLoader
+
+directory = tempfile.mkdtemp()
+try:
+    # Real catalog: snapshot rows read back exactly like the JSON-built dicts
+    shutil.copy('Files/product_catalog.json', directory)
+    catalog = load_catalog(f'{directory}/product_catalog.json', f'{directory}/catalog.snapshot')
+    loader = DataLoader.__new__(DataLoader)
+    loader.base_path = 'Files'
+    loader.state = CatalogState()
+    data_loader.CATALOG_SNAPSHOT = False  # the plain JSON path, for comparison
+    loader.load_products()
+    same = all(dict(view) == product for view, product in zip(catalog.products(), loader.products))
+    print(f"\n=== Snapshot rows equal JSON products: {same} ===")
+
+    # Stale detection: touching the source triggers a rebuild
+    os.utime(f'{directory}/product_catalog.json')
+    print("Stale after source change:", not catalog.matches_source(f'{directory}/product_catalog.json'))
+
+    print("\n=== 200k synthetic products ===")
+    raw = [
+        {"product_id": f"P{i:07d}", "product_name": f"Item {i}", "category": "Home",
+         "price": 1000 + i, "stock_available": i % 50, "description": "A sturdy thing. Works well.",
+         "rating": 4.5, "review_count": i, "delivery_time_days": 3, "return_eligible": True,
+         "discount_percentage": 5}
+        for i in range(200_000)
+    ]
+    with open(f'{directory}/big.json', 'w') as f:
+        json.dump(raw, f)
+    del raw
+
+    start = time.perf_counter()
+    load_catalog(f'{directory}/big.json', f'{directory}/big.snapshot').close()
+    print(f"Snapshot build: {time.perf_counter() - start:.2f}s")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(f'{directory}/big.json') as f:
+        dicts = [dict(p, features=p["description"].split('.')) for p in json.load(f)]
+    print(f"JSON load:      {time.perf_counter() - start:.2f}s, {tracemalloc.get_traced_memory()[0] / 2**20:.0f} MiB")
+    del dicts
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    big = load_catalog(f'{directory}/big.json', f'{directory}/big.snapshot')
+    products = big.products()
+    print(f"Snapshot map:   {time.perf_counter() - start:.2f}s, {tracemalloc.get_traced_memory()[0] / 2**20:.0f} MiB private "
+          f"(+{os.path.getsize(f'{directory}/big.snapshot') / 2**20:.0f} MiB shared mapping)")
+    print("Row 123456:", products[123456]["name"], products[123456]["stock"])
+finally:
+    shutil.rmtree(directory)
@@ -0,0 +1,44 @@
+import sys
+import tracemalloc
+sys.path.insert(0, 'backend')
+
+from order_records import Order
+
+N = 200_000
+raw_orders = [
+    {"order_id": f"O{i:07d}", "customer_id": f"C{i % 5000:04d}", "order_status": "Delivered",
+     "order_date": f"2025-0{1 + i % 9}-1{i % 10}",
+     "items": [{"product_id": f"P{1000 + (i * 7 + k) % 125}", "quantity": 1 + k, "price_at_purchase": 1999}
+               for k in range(2)]}
+    for i in range(N)
+]
+
+
+def as_dict(o):
+    # The previous in-memory representation
+    return {
+        "id": o["order_id"], "customerId": o["customer_id"], "status": o["order_status"], "date": o["order_date"],
+        "total": sum(i["price_at_purchase"] * i["quantity"] for i in o["items"]),
+        "items": [{"productId": i["product_id"], "name": "Product " + i["product_id"],
+                   "quantity": i["quantity"], "price": i["price_at_purchase"]} for i in o["items"]],
+    }
+
+
+def measure(build):
+    tracemalloc.start()
+    kept = [build(o) for o in raw_orders]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return kept, size
+
+
+dicts, dict_bytes = measure(as_dict)
+records, record_bytes = measure(Order.from_raw)
+print(f"\n=== {N} orders with 2 items each ===")
+print(f"dicts:   {dict_bytes / N:7.0f} B/order  (~{dict_bytes / N * 1e6 / 2**30:.2f} GiB per million)")
+print(f"records: {record_bytes / N:7.0f} B/order  (~{record_bytes / N * 1e6 / 2**30:.2f} GiB per million)")
+
+names = {"P1000": "Luma Monitor Pro"}
+print("\nSerialized:", records[0].to_dict(names.get))
+print("Same as before (except item names):",
+      all({**r.to_dict(), "items": []} == {**d, "items": []} for r, d in zip(records[:1000], dicts[:1000])))
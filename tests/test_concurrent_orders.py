@@ -0,0 +1,41 @@
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, 'backend')
+
+from data_loader import DataLoader
+
+# Work on a copy of the data so the real catalog is not modified
+data_dir = tempfile.mkdtemp()
+for name in os.listdir('Files'):
+    shutil.copy(os.path.join('Files', name), data_dir)
+
+dl = DataLoader(base_path=data_dir, vector_cache_path=os.path.join(data_dir, 'vector_cache'))
+dl.load_all()
+
+product = dl.get_product('P1001')
+product['stock'] = 10
+other = dl.get_product('P1002')
+other_stock = other['stock']
+
+print("\n=== 50 concurrent checkouts for 10 units ===")
+def checkout(i):
+    # Multi-item order: both items are reserved or neither is
+    return dl.create_order(f'race_user_{i}', [
+        {'productId': 'P1001', 'quantity': 1},
+        {'productId': 'P1002', 'quantity': 1},
+    ])
+
+with ThreadPoolExecutor(max_workers=16) as pool:
+    results = list(pool.map(checkout, range(50)))
+
+placed = [order for ok, order in results if ok]
+ids = [order.id for order in placed]
+print(f"Orders placed: {len(placed)} (expected 10)")
+print(f"P1001 stock left: {product['stock']} (expected 0)")
+print(f"P1002 units sold: {other_stock - other['stock']} (expected {len(placed)})")
+print(f"Unique order ids: {len(set(ids)) == len(ids)}")
+
+shutil.rmtree(data_dir)
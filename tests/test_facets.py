@@ -0,0 +1,102 @@
+import random
+import sys
+import time
+sys.path.insert(0, 'backend')
+
+from facet_index import FacetIndex, SORTS, parse_filters
+
+
+def brute_force(products, filters):
+    # Reference: plain Python filtering over the product dicts
+    kept = []
+    for p in products:
+        if p["stock"] <= 0:
+            continue
+        ok = True
+        for field, bounds in filters.items():
+            if field == "returnEligible":
+                ok = ok and p.get("returnEligible") is not None and p["returnEligible"] == bounds
+                continue
+            low, high = bounds
+            value = p.get(field)
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                ok = False
+        if ok:
+            kept.append(p["id"])
+    return kept
+
+
+random.seed(11)
+categories = ["Electronics", "Home", "Clothing", "Sports"]
+products = [
+    {"id": f"P{i}", "category": random.choice(categories),
+     "price": round(random.uniform(100, 60000), 2),
+     "rating": round(random.uniform(2, 5), 1) if random.random() > 0.02 else None,
+     "deliveryTimeDays": random.randint(1, 12),
+     "discountPercentage": random.choice([0, 5, 10, 15, 20, 30, 50]),
+     "returnEligible": random.random() < 0.7,
+     "stock": random.randint(0, 20)}
+    for i in range(100_000)
+]
+by_id = {p["id"]: p for p in products}
+
+index = FacetIndex()
+start = time.perf_counter()
+index.build(products)
+print(f"\n=== Build over {len(products)} products: {time.perf_counter() - start:.2f}s ===")
+
+cases = [
+    parse_filters(max_price=5000),
+    parse_filters(min_price=1000, max_price=20000, min_rating=4.0),
+    parse_filters(max_delivery_days=3, return_eligible=True),
+    parse_filters(min_discount=20, max_rating=3.5, return_eligible=False),
+    parse_filters(),
+]
+mismatches = 0
+for filters in cases:
+    ids = [pid for pid, keep in zip(index._ids, index.mask(filters)) if keep]
+    if ids != brute_force(products, filters):
+        mismatches += 1
+print(f"Filter mismatches vs brute force: {mismatches} / {len(cases)}")
+
+# Sorting: compare with Python's sort over the same ids (missing values last)
+sample = random.sample([p["id"] for p in products], 2000)
+sort_mismatches = 0
+for sort, (field, descending) in SORTS.items():
+    present = [pid for pid in sample if by_id[pid][field] is not None]
+    missing = [pid for pid in sample if by_id[pid][field] is None]
+    expected = sorted(present, key=lambda pid: by_id[pid][field], reverse=descending)
+    got = index.sort_ids(sample, sort)
+    # Equal values may tie in either order; compare the field values
+    if [by_id[pid][field] for pid in got] != [by_id[pid][field] for pid in expected + missing]:
+        sort_mismatches += 1
+    mask = index.mask(parse_filters(max_price=10000))
+    top = index.top_ids(mask, sort, 10)
+    listing = sorted((pid for pid in brute_force(products, parse_filters(max_price=10000))
+                      if by_id[pid][field] is not None), key=lambda pid: by_id[pid][field], reverse=descending)
+    if [by_id[pid][field] for pid in top] != [by_id[pid][field] for pid in listing[:10]]:
+        sort_mismatches += 1
+print(f"Sort mismatches: {sort_mismatches}")
+
+# Stock updates move products in and out of every filter
+changed = random.sample(products, 500)
+for p in changed:
+    p["stock"] = 0 if p["stock"] else 5
+index.update(changed)
+filters = parse_filters(max_price=5000)
+ids = [pid for pid, keep in zip(index._ids, index.mask(filters)) if keep]
+print(f"Matches brute force after stock updates: {ids == brute_force(products, filters)}")
+
+counts = index.counts(index.mask(parse_filters(min_rating=4.0)))
+print(f"Facet counts (rating >= 4): total={counts['total']} categories={counts['category']}")
+print(f"  price buckets: {[(b['min'], b['count']) for b in counts['price']]}")
+print(f"  returnEligible: {counts['returnEligible']}  maxDeliveryDays: {counts['maxDeliveryDays']}")
+
+filters = parse_filters(min_price=1000, max_price=20000, min_rating=4.0, return_eligible=True)
+start = time.perf_counter()
+for _ in range(100):
+    index.mask(filters)
+print(f"mask (4 filters): {(time.perf_counter() - start) * 10:.3f} ms/call")
+start = time.perf_counter()
+brute_force(products, filters)
+print(f"brute force: {(time.perf_counter() - start) * 1000:.3f} ms/call")
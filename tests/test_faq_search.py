@@ -0,0 +1,18 @@
+import sys
+sys.path.insert(0, 'backend')
+
+from data_loader import DataLoader
+
+loader = DataLoader(base_path='Files')
+loader.load_faqs()
+
+print("\n=== FAQ search (top answers instead of every FAQ) ===")
+for question, product_id in [
+    ("What's the battery life?", "P1001"),
+    ("is it waterproof", "P1002"),
+    ("warranty", None),
+]:
+    print(f"\nQ: {question!r} (product: {product_id})")
+    for faq, score in loader.search_faqs(question, product_id=product_id, k=2):
+        print(f"  [{score:.2f}] {faq['productId']}: {faq['question']}")
+        print(f"         {faq['answer']}")
@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+sys.path.insert(0, 'backend')
+
+from data_loader import DataLoader
+from search_logic import SearchLogic
+
+# Work on a copy of the data so the real files are not modified
+data_dir = tempfile.mkdtemp()
+for name in os.listdir('Files'):
+    shutil.copy(os.path.join('Files', name), data_dir)
+
+dl = DataLoader(base_path=data_dir, vector_cache_path=os.path.join(data_dir, 'vector_cache'))
+dl.load_all()
+search = SearchLogic(dl)
+first_state = dl.state
+# Live stock that differs from the file (orders since the last compaction)
+dl.get_product('P1001')['stock'] = p1001_start = 100000
+
+# Operator edits: rename P1002, restock P1003, drop P1125, add a product, a new policy section
+with open(f'{data_dir}/product_catalog.json') as f:
+    raw = json.load(f)
+for product in raw:
+    if product['product_id'] == 'P1002':
+        product['product_name'] = 'Luma Monitor Ultra'
+    if product['product_id'] == 'P1003':
+        product['stock_available'] = 500
+raw = [p for p in raw if p['product_id'] != 'P1125']
+raw.append(dict(raw[0], product_id='P2000', product_name='Zephyr Trail Kettle', stock_available=7))
+with open(f'{data_dir}/product_catalog.json', 'w') as f:
+    json.dump(raw, f)
+with open(f'{data_dir}/Company_policies.md', 'a') as f:
+    f.write('\n\n**Gift Wrapping**\n\nGift wrapping is free on every order.\n')
+
+print("\n=== Reload while searches and orders keep running ===")
+stop = threading.Event()
+errors, searches, ordered = [], [0], []
+
+def searcher():
+    while not stop.is_set():
+        try:
+            for product in search.search_products('monitor') + search.get_recommendations():
+                assert product['id']
+            search.facet_counts('monitor', None, {'rating': (4.0, None)})
+            searches[0] += 1
+        except Exception as e:
+            errors.append(repr(e))
+
+def buyer():
+    while not stop.is_set():
+        ok, _ = dl.create_order('reload_user', [{'productId': 'P1001', 'quantity': 1},
+                                                {'productId': 'P1003', 'quantity': 1}], durable=False)
+        if ok:
+            ordered.append(1)
+        time.sleep(0.001)
+
+threads = [threading.Thread(target=searcher) for _ in range(3)] + [threading.Thread(target=buyer) for _ in range(2)]
+for t in threads:
+    t.start()
+time.sleep(0.2)
+orders_before_swap = len(ordered)
+result = dl.reload()
+time.sleep(0.2)
+stop.set()
+for t in threads:
+    t.join()
+
+print(f"Reload: ok={result['ok']} {result['durationMs']} ms, {result['products']} products, "
+      f"edited stock {result['editedStock']}")
+print(f"Searches during reload: {searches[0]}, errors: {len(errors)} {errors[:1]}")
+print(f"State replaced: {dl.state is not first_state}")
+print(f"P1001 stock: {dl.get_product('P1001')['stock']} (expected {p1001_start - len(ordered)}, "
+      f"{len(ordered)} orders, {orders_before_swap} before the swap started)")
+print(f"P1003 stock: {dl.get_product('P1003')['stock']} (file edit 500, minus orders after the swap)")
+print(f"Renamed: {dl.get_product('P1002')['name']}, removed P1125: {dl.get_product('P1125') is None}")
+print(f"New product searchable: {[p['id'] for p in search.search_products('zephyr kettle')]}")
+print(f"New policy section: {'Gift Wrapping' in dl.policies}")
+
+print("\n=== Restart keeps the edited and the ordered stock ===")
+dl.journal.close()  # one writer per data directory; dl reopens it on its next write
+dl2 = DataLoader(base_path=data_dir, vector_cache_path=os.path.join(data_dir, 'vector_cache'))
+dl2.load_all()
+print(f"P1001: {dl2.get_product('P1001')['stock']}, P1003: {dl2.get_product('P1003')['stock']} "
+      f"(live: {dl.get_product('P1001')['stock']}, {dl.get_product('P1003')['stock']})")
+dl2.journal.close()
+
+print("\n=== File watcher ===")
+dl.start_watching(interval=0.05)
+with open(f'{data_dir}/product_faqs.json') as f:
+    faqs = json.load(f)
+faqs.append({'product_id': 'P2000', 'faqs': [{'question': 'Is the kettle cordless?', 'answer': 'Yes.'}]})
+with open(f'{data_dir}/product_faqs.json', 'w') as f:
+    json.dump(faqs, f)
+deadline = time.time() + 10
+while not dl.get_faqs('P2000') and time.time() < deadline:
+    time.sleep(0.05)
+print(f"FAQ picked up: {[faq['question'] for faq in dl.get_faqs('P2000')]}")
+
+reloads = dl.last_reload['finishedAt']
+dl.compact()  # our own rewrite of product_catalog.json is not an edit
+time.sleep(0.5)
+print(f"Reloaded after compaction: {dl.last_reload['finishedAt'] != reloads}")
+
+with open(f'{data_dir}/product_faqs.json', 'w') as f:
+    f.write('[{"product_id": ')
+time.sleep(0.5)
+print(f"Broken file keeps old data: {dl.last_reload['ok'] is False and bool(dl.get_faqs('P2000'))}")
+
+search.shutdown()
+dl.shutdown()
+shutil.rmtree(data_dir, ignore_errors=True)
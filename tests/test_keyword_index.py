@@ -0,0 +1,26 @@
+import sys
+sys.path.insert(0, 'backend')
+
+from keyword_index import KeywordIndex
+
+# 40 rare "he..." terms that sort before "headset", and a common "headset"
+products = [{"id": f"R{i}", "name": f"hea{chr(97 + i // 26)}{chr(97 + i % 26)} gadget", "category": "Misc",
+             "description": ""} for i in range(40)]
+products += [{"id": f"H{i}", "name": "Gaming headset", "category": "Electronics", "description": ""}
+             for i in range(5)]
+products += [
+    {"id": "S1", "name": "Nova smartphone", "category": "Electronics", "description": ""},
+    {"id": "S2", "name": "Bass headphones", "category": "Electronics", "description": ""},
+    {"id": "S3", "name": "Desk phone", "category": "Electronics", "description": ""},
+]
+index = KeywordIndex()
+index.build(products)
+
+print("\n=== Short prefix with more than MAX_PREFIX_EXPANSIONS vocabulary terms ===")
+expansions = index._expand("he")
+print(f"'he' expands to {len(expansions)} terms, includes 'headset': {'headset' in expansions}")
+print(f"'he' finds the headsets: {sorted(p for p in index.search('he', limit=50) if p.startswith('H'))}")
+
+print("\n=== Word prefix matching, not substrings ===")
+print(f"'phone' -> {index.search('phone')} (smartphone/headphones are not word prefixes)")
+print(f"'smart' -> {index.search('smart')}, 'headph' -> {index.search('headph')}")
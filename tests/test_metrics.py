@@ -0,0 +1,70 @@
+import concurrent.futures
+import random
+import sys
+import time
+sys.path.insert(0, 'backend')
+
+from metrics import (Histogram, STAGE_SECONDS, current_spans, end_request, in_request_context, server_timing,
+                     span, start_request)
+
+random.seed(3)
+histogram = Histogram("test_latency_seconds", "Test histogram", ("stage",), buckets=(0.001, 0.01, 0.1))
+samples = [random.expovariate(100) for _ in range(10_000)]
+for value in samples:
+    histogram.observe(value, "search")
+
+series = histogram.snapshot()[("search",)]
+cumulative = 0
+bucket_errors = 0
+for bound, count in zip((0.001, 0.01, 0.1, float("inf")), series):
+    cumulative += count
+    if cumulative != sum(1 for v in samples if v <= bound):
+        bucket_errors += 1
+print(f"\n=== Histogram over {len(samples)} samples ===")
+print(f"Bucket mismatches vs direct count: {bucket_errors}")
+print(f"Sum matches: {abs(series[-2] - sum(samples)) < 1e-9}, count: {series[-1]}")
+print("\n".join(histogram.render()))
+
+# Spans from an executor thread land in the request that submitted the work
+executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+def semantic_leg():
+    with span("vector_query"):
+        time.sleep(0.01)
+
+token = start_request()
+with span("keyword_search"):
+    pass
+executor.submit(in_request_context(semantic_leg)).result()
+spans = list(current_spans())
+end_request(token)
+print(f"\nRequest spans: {[stage for stage, _ in spans]}")
+print(f"Server-Timing: {server_timing(spans, 0.012)}")
+print(f"Spans outside a request: {current_spans()}")
+executor.shutdown()
+
+start = time.perf_counter()
+for _ in range(100_000):
+    with span("overhead"):
+        pass
+print(f"span() overhead: {(time.perf_counter() - start) * 10:.3f} us/call")
+print(f"Stage histogram count for 'overhead': {STAGE_SECONDS.snapshot()[('overhead',)][-1]}")
+
+print("\n=== Cache counters are collected at scrape time ===")
+from metrics import Registry
+from embedding_cache import EmbeddingCache
+from response_cache import ResponseCache
+
+registry = Registry()
+embeddings, responses = EmbeddingCache(), ResponseCache()
+caches = {"query_embedding": embeddings, "response": responses}
+registry.collected("cache_hits_total", "Cache hits", "counter", ("cache",),
+                   lambda: {(name,): cache.hits for name, cache in caches.items()})
+registry.collected("cache_entries", "Entries per cache", "gauge", ("cache",),
+                   lambda: {(name,): len(cache) for name, cache in caches.items()})
+embeddings.put("headphones", [0.1])
+embeddings.get("headphones")
+embeddings.get("kettle")
+responses.get_or_build(("product", "P1001"), 1, lambda: {"id": "P1001"})
+responses.get_or_build(("product", "P1001"), 1, lambda: {"id": "P1001"})
+print(registry.render())
@@ -0,0 +1,28 @@
+import sys
+import time
+sys.path.insert(0, 'backend')
+
+from order_index import OrderIdIndex
+
+index = OrderIdIndex()
+index.build(["O0001", "O0099", "O0199", "ORD-1769868892", "ORD-1769868893"])
+
+print("\n=== Partial order ID resolution ===")
+for query in ["O0099", "o0099", "99", "68892", "ord 1769868893", "1769"]:
+    print(f"{query!r:>18} -> {index.resolve(query)}")
+
+# Incremental insert (what create_order does)
+index.add("O0200")
+print(f"{'after add, 200':>18} -> {index.resolve('200')}")
+
+print("\n=== Lookup latency on 200k synthetic orders ===")
+big = OrderIdIndex()
+start = time.perf_counter()
+big.build(f"ORD-{1700000000 + i * 7}" for i in range(200_000))
+print(f"Build: {time.perf_counter() - start:.2f}s")
+
+for query in ["ORD-1700000007", "1700350007", "35007", "07", "ord17"]:
+    start = time.perf_counter()
+    hits = big.resolve(query)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"{query!r:>18} -> {hits[:3]} ({elapsed_ms:.3f} ms)")
@@ -0,0 +1,48 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+sys.path.insert(0, 'backend')
+
+from data_loader import DataLoader
+
+# Work on a copy of the data so the real catalog is not modified
+data_dir = tempfile.mkdtemp()
+for name in os.listdir('Files'):
+    shutil.copy(os.path.join('Files', name), data_dir)
+cache_dir = os.path.join(data_dir, 'vector_cache')
+
+dl = DataLoader(base_path=data_dir, vector_cache_path=cache_dir)
+dl.load_all()
+stock_before = dl.get_product('P1002')['stock']
+
+print("\n=== Placing orders (journal only, snapshots untouched) ===")
+success, order = dl.create_order('journal_test_user', [{'productId': 'P1002', 'quantity': 2}])
+print(f"Created: {order.id}, stock {stock_before} -> {dl.get_product('P1002')['stock']}")
+dl.cancel_order(order.id)
+with open(os.path.join(data_dir, 'order_journal.jsonl')) as f:
+    print(f"Journal lines: {len(f.readlines())}")
+
+print("\n=== A second process on the same data directory ===")
+try:
+    DataLoader(base_path=data_dir, vector_cache_path=cache_dir).load_all()
+    print("Second writer started (expected a refusal)")
+except RuntimeError as e:
+    print(f"Refused: {e}")
+
+print("\n=== Restart: replay journal over the snapshots ===")
+dl.journal.close()  # the first process exits
+dl2 = DataLoader(base_path=data_dir, vector_cache_path=cache_dir)
+dl2.load_all()
+replayed = dl2.get_order(order.id)
+print(f"Replayed order: {replayed.id if replayed else None} status={replayed.status if replayed else None}")
+print(f"Replayed stock for P1002: {dl2.get_product('P1002')['stock']}")
+
+print("\n=== Compaction ===")
+dl2.compact()
+with open(os.path.join(data_dir, 'order_database.json')) as f:
+    print(f"Order in snapshot: {any(o['order_id'] == order.id for o in json.load(f))}")
+print(f"Journal size after compaction: {os.path.getsize(os.path.join(data_dir, 'order_journal.jsonl'))}")
+
+shutil.rmtree(data_dir)
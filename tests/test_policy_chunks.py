@@ -0,0 +1,33 @@
+import sys
+sys.path.insert(0, 'backend')
+
+from catalog_state import CatalogState
+from data_loader import DataLoader
+from policy_chunks import chunk_policies, normalize_topic
+
+# Only the policy parsing is needed, not the vector DB
+loader = DataLoader.__new__(DataLoader)
+loader.base_path = 'Files'
+loader.state = CatalogState()
+loader.load_policies()
+
+print("\n=== Policy passages ===")
+chunks = chunk_policies(loader.policies, max_chars=500)
+for chunk in chunks:
+    print(f"{len(chunk['text']):>4} chars  {chunk['id']:<30} {chunk['title']}")
+print(f"Largest passage: {max(len(c['text']) for c in chunks)} chars "
+      f"(largest section: {max(len(b) for b in loader.policies.values())})")
+
+print("\n=== Subheader sections become title context ===")
+for chunk in chunk_policies({"Returns": "", "Window": "Items can be returned within 30 days of delivery. " * 3}):
+    print(chunk["title"], "->", chunk["text"][:50])
+
+print("\n=== Short sections are merged into neighbouring passages, not titles ===")
+long_body = "Refunds are issued to the original payment method within 7 business days. " * 2
+for chunk in chunk_policies({"Refunds": "", "Note": "Gift cards are refunded as store credit.",
+                             "Timing": long_body, "Contact": "Email help@example.com."}):
+    print(f"{chunk['title']!r} -> {chunk['text']!r}")
+
+print("\n=== Topic normalization ===")
+for topic in ["Refund time?", "  refund   TIME", "return-window"]:
+    print(f"{topic!r:>18} -> {normalize_topic(topic)!r}")
@@ -0,0 +1,54 @@
+import random
+import sys
+import time
+sys.path.insert(0, 'backend')
+
+from recommendation_index import RecommendationIndex
+
+
+def full_sort(products, category=None, limit=6):
+    # The original implementation, used as the reference
+    available = [p for p in products if p["stock"] > 0 and (category is None or p["category"].lower() == category)]
+    return [p["id"] for p in sorted(available, key=lambda p: (p["rating"], p["stock"]), reverse=True)[:limit]]
+
+
+random.seed(7)
+categories = ["Electronics", "Home", "Clothing", "Sports"]
+products = [
+    {"id": f"P{i}", "category": random.choice(categories),
+     "rating": round(random.uniform(3, 5), 1), "stock": random.randint(0, 20)}
+    for i in range(50_000)
+]
+
+index = RecommendationIndex()
+start = time.perf_counter()
+index.build(products)
+print(f"\n=== Build over {len(products)} products: {time.perf_counter() - start:.2f}s ===")
+
+# Random orders and restocks, checked against a full sort after each batch
+mismatches = 0
+for _ in range(200):
+    changed = random.sample(products, 5)
+    for p in changed:
+        p["stock"] = max(0, p["stock"] - random.randint(1, 5)) if random.random() < 0.8 else p["stock"] + 10
+    index.update(changed)
+    for category in [None, "electronics", "home"]:
+        if index.top(6, category) != full_sort(products, category):
+            mismatches += 1
+print(f"Mismatches vs full sort after 200 stock updates: {mismatches}")
+
+start = time.perf_counter()
+for _ in range(10_000):
+    index.top(6)
+print(f"top(6): {(time.perf_counter() - start) * 100:.3f} us/call")
+start = time.perf_counter()
+full_sort(products)
+print(f"full sort: {(time.perf_counter() - start) * 1000:.3f} ms/call")
+
+# Catalog rows with null rating/stock rank last / are skipped instead of failing the build
+nulls = [{"id": "N1", "category": "Home", "rating": None, "stock": 5},
+         {"id": "N2", "category": "Home", "rating": 4.0, "stock": None},
+         {"id": "N3", "category": "Home", "rating": 3.0, "stock": 2}]
+null_index = RecommendationIndex()
+null_index.build(nulls)
+print(f"Null rating/stock rows: top = {null_index.top(6)}")
@@ -0,0 +1,33 @@
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, 'backend')
+sys.path.insert(0, 'benchmarks')
+
+from request_trace import TraceWriter, read_trace
+from replay_trace import endpoint_of, load_sessions
+
+path = os.path.join(tempfile.mkdtemp(), "trace.jsonl")
+writer = TraceWriter(path)
+start = time.time()
+for n in range(1000):
+    session = f"s{n % 10}"
+    writer.record({"ts": start + n * 0.01, "session": session, "method": "GET",
+                   "path": f"/api/products/P{1001 + n % 7}", "query": "", "body": None,
+                   "status": 200, "duration_ms": 1.0})
+writer.record({"ts": start + 11, "session": "s0", "method": "POST", "path": "/api/orders", "query": "",
+               "body": {"truncated": True}, "status": 200, "duration_ms": 2.0})
+writer.close()
+with open(path, "a", encoding="utf-8") as f:
+    f.write('{"ts": 1, "sess')  # torn last line from a crash
+
+records = list(read_trace(path))
+print(f"\n=== Trace round trip ===")
+print(f"Records read: {len(records)} (expected 1001)")
+print(f"Endpoint key: {endpoint_of(records[0])}")
+
+sessions, span_s = load_sessions(path, copies=3)
+print(f"Sessions: {len(sessions)} (expected 30), trace span: {span_s:.2f}s")
+print(f"Truncated bodies skipped: {sum(len(s) for s in sessions) == 3000}")
+print(f"Per-session order kept: {all(s[i]['offset'] < s[i + 1]['offset'] for s in sessions for i in range(len(s) - 1))}")
@@ -0,0 +1,44 @@
+import os
+import shutil
+import sys
+import tempfile
+sys.path.insert(0, 'backend')
+
+# Work on a copy of the data so orders do not modify Files/
+data_dir = tempfile.mkdtemp()
+for name in os.listdir('Files'):
+    shutil.copy(os.path.join('Files', name), data_dir)
+os.environ["DATA_DIR"] = data_dir
+os.environ["VECTOR_CACHE_DIR"] = os.path.join(data_dir, 'vector_cache')
+
+import main
+from fastapi.testclient import TestClient
+
+def get(client, path, etag):
+    response = client.get(path, headers={'If-None-Match': etag})
+    return response.status_code, response.headers['etag']
+
+with TestClient(main.app) as client:
+    main.data.ready.wait(60)
+    recommended = [p['id'] for p in client.get('/api/products/recommendations').json()]
+    other = next(p['id'] for p in main.data.products if p['id'] not in recommended and p['stock'] > 0)
+    viewed = recommended[0]
+    product_etag = client.get(f'/api/products/{viewed}').headers['etag']
+    recommendations_etag = client.get('/api/products/recommendations').headers['etag']
+
+    print(f"\n=== Checkout of an unrelated product ({other}) ===")
+    main.data.create_order('cache_user', [{'productId': other, 'quantity': 1}])
+    hits = main.response_cache.hits
+    print(f"{viewed}: {get(client, f'/api/products/{viewed}', product_etag)[0]}, "
+          f"recommendations: {get(client, '/api/products/recommendations', recommendations_etag)[0]}, "
+          f"served from cache: {main.response_cache.hits - hits}")
+
+    print(f"\n=== Checkout of the viewed product ({viewed}) ===")
+    main.data.create_order('cache_user', [{'productId': viewed, 'quantity': 1}])
+    status, etag = get(client, f'/api/products/{viewed}', product_etag)
+    print(f"{viewed}: {status}, new ETag: {etag != product_etag}, "
+          f"stock {client.get(f'/api/products/{viewed}').json()['stock']}")
+    status, etag = get(client, '/api/products/recommendations', recommendations_etag)
+    print(f"recommendations: {status}, new ETag: {etag != recommendations_etag}")
+
+shutil.rmtree(data_dir, ignore_errors=True)
@@ -0,0 +1,69 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+sys.path.insert(0, 'backend')
+
+# Work on a copy of the data so orders do not modify Files/
+data_dir = tempfile.mkdtemp()
+for name in os.listdir('Files'):
+    shutil.copy(os.path.join('Files', name), data_dir)
+os.environ["DATA_DIR"] = data_dir
+os.environ["VECTOR_CACHE_DIR"] = os.path.join(data_dir, 'vector_cache')
+
+started = time.perf_counter()
+import main
+print(f"\n=== import main: {time.perf_counter() - started:.2f}s, chromadb imported: {'chromadb' in sys.modules} ===")
+
+from fastapi.testclient import TestClient
+
+with TestClient(main.app) as client:
+    print(f"/healthz right after startup: {client.get('/healthz').status_code}")
+    first = client.get('/readyz')
+    print(f"/readyz right after startup: {first.status_code} {first.json()}")
+
+    deadline = time.time() + 60
+    while client.get('/readyz').status_code != 200 and time.time() < deadline:
+        time.sleep(0.02)
+    print(f"ready after {time.perf_counter() - started:.2f}s: {client.get('/readyz').json()}")
+
+    # Order reads during loading say "retry", not "no such order"
+    main.data.ready.clear()
+    loading = [client.get('/api/orders', params={'userId': 'C0029'}), client.get('/api/orders/O0001')]
+    main.data.ready.set()
+    print(f"Order reads while loading: {[(r.status_code, r.headers.get('retry-after')) for r in loading]}, "
+          f"after: {client.get('/api/orders/O0001').status_code}")
+
+    response = client.get('/api/products/search', params={'q': 'monitor'})
+    print(f"Search while vectors are {main.data.vector_status}: {len(response.json())} results, "
+          f"semantic status {response.headers['x-semantic-status']}")
+
+    main.data.vectors_ready.wait(120)
+    response = client.get('/api/products/search', params={'q': 'monitor'})
+    print(f"Vectors {main.data.vector_status} after {time.perf_counter() - started:.2f}s; "
+          f"semantic status now {response.headers['x-semantic-status']}")
+
+print("\n=== Embedding model that cannot load: clean keyword fallback ===")
+from data_loader import DataLoader
+from search_logic import SearchLogic
+from vector_search import VectorSearch
+
+class BrokenEmbedding:
+    def __call__(self, input):
+        raise RuntimeError("model unavailable")
+
+dl = DataLoader(base_path=data_dir, vector_cache_path=os.path.join(data_dir, 'broken_cache'))
+dl.vector_db = VectorSearch(os.path.join(data_dir, 'broken_cache'), backend="numpy", embedding_fn=BrokenEmbedding())
+dl.load_all(background_vectors=True)
+version_during_warmup = dl.content_version
+dl.vectors_ready.wait(60)
+engine = SearchLogic(dl)
+print(f"vector status: {dl.vector_status}, semantic ready: {dl.semantic_ready}")
+print(f"content_version bumped when warm-up finished: {dl.content_version > version_during_warmup}")
+print(f"policy search uses the keyword fallback: {engine.search_policies('refund')[:40]!r}")
+print(f"product search status: {engine.hybrid_search('zzz unknown')[1]}")
+engine.shutdown()
+dl.journal.close()
+
+shutil.rmtree(data_dir, ignore_errors=True)
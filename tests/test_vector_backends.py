@@ -0,0 +1,59 @@
+import shutil
+import sys
+import tempfile
+import zlib
+sys.path.insert(0, 'backend')
+
+import numpy as np
+from vector_backends import NumpyCollection
+from vector_search import VectorSearch
+
+
+def fake_embedding(texts):
+    # Deterministic stand-in for the ONNX model
+    return [np.random.default_rng(zlib.crc32(t.encode())).standard_normal(32) for t in texts]
+
+
+directory = tempfile.mkdtemp()
+try:
+    products = [
+        {"id": f"P{i}", "name": f"Item {i}", "category": ["Audio", "Home"][i % 2],
+         "description": "thing", "price": 10.0 + i, "stock": i % 3}
+        for i in range(300)
+    ]
+
+    # VectorSearch on the NumPy engine, without loading the embedding model
+    vs = object.__new__(VectorSearch)
+    vs.collection = NumpyCollection(f"{directory}/products", fake_embedding)
+    print("\n=== Incremental sync on the NumPy engine ===")
+    print("first :", {k: len(v) for k, v in vs._sync_collection(
+        vs.collection, [p["id"] for p in products], [vs.product_document(p) for p in products],
+        [vs.product_metadata(p) for p in products]).items()})
+    products[0]["stock"] = 9
+    print("second:", {k: len(v) for k, v in vs._sync_collection(
+        vs.collection, [p["id"] for p in products[:-1]], [vs.product_document(p) for p in products[:-1]],
+        [vs.product_metadata(p) for p in products[:-1]]).items()})
+
+    print("\n=== Filtered query vs brute force ===")
+    query = fake_embedding(["headphones"])[0]
+    found = vs.collection.query([query], n_results=5, where={"$and": [{"category": "Audio"}, {"stock": {"$gte": 1}}]})
+    matrix = np.array([fake_embedding([vs.product_document(p)])[0] for p in products[:-1]])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    sims = matrix @ (query / np.linalg.norm(query))
+    allowed = [i for i, p in enumerate(products[:-1]) if p["category"] == "Audio" and p["stock"] >= 1]
+    expected = [products[i]["id"] for i in sorted(allowed, key=lambda i: -sims[i])[:5]]
+    print("engine  :", found["ids"][0])
+    print("expected:", expected)
+
+    print("\n=== Stock update patches the filter column ===")
+    vs.collection.update(ids=[expected[0]], metadatas=[{"stock": 0}])
+    again = vs.collection.query([query], n_results=5, where={"$and": [{"category": "Audio"}, {"stock": {"$gte": 1}}]})
+    print(f"{expected[0]} still returned after selling out: {expected[0] in again['ids'][0]}")
+
+    print("\n=== Reload from memory-mapped .npy ===")
+    vs.collection.persist()
+    reloaded = NumpyCollection(f"{directory}/products", fake_embedding)
+    print("count:", reloaded.count(), "mapped:", isinstance(reloaded._matrix, np.memmap))
+    print("same results:", reloaded.query([query], n_results=5)["ids"] == vs.collection.query([query], n_results=5)["ids"])
+finally:
+    shutil.rmtree(directory)